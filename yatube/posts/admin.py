@@ -1,5 +1,6 @@
 from django.contrib import admin
 
+from . import fulltext
 from .models import Group, Post
 
 
@@ -9,6 +10,17 @@ class PostAdmin(admin.ModelAdmin):
     list_filter = ('pub_date',)
     empty_value_display = '-пусто-'
 
+    def get_search_results(self, request, queryset, search_term):
+        # Поиск по тексту идёт через индекс FTS5 вместо LIKE '%...%'
+        if not fulltext.is_available() or not fulltext.match_query(
+            search_term
+        ):
+            return super().get_search_results(request, queryset,
+                                              search_term)
+        return queryset.filter(
+            id__in=fulltext.matching_ids(search_term)
+        ), False
+
 
 class GroupAdmin(admin.ModelAdmin):
     list_display = ('pk', 'title', 'slug', 'description')
@@ -0,0 +1,156 @@
+"""
+JSON API только для чтения, версия v1.
+
+Списки строятся из тех же querysets, что и HTML-представления
+posts.views, и листаются курсором (?after=, ?before=). Записи
+сериализуются из объектов, выбранных через select_related, без запросов
+на каждую запись. ETag публичных ответов считается из поколений кэша
+(posts.caching), и повторный запрос с If-None-Match получает 304,
+не обращаясь к БД; ETag ленты подписок считается по телу ответа.
+"""
+from functools import wraps
+
+from django.http import Http404, JsonResponse
+from django.shortcuts import get_object_or_404
+from django.utils.cache import (get_conditional_response, patch_vary_headers,
+                                set_response_etag)
+from django.views.decorators.http import require_safe
+
+from . import caching, views
+from .models import Group, Post, User
+from .paginator import GROUP_ORDERING, POST_ORDERING, CursorPaginator
+from .timeline import ORDERING as FEED_ORDERING
+
+JSON_PARAMS = {'ensure_ascii': False, 'separators': (',', ':')}
+
+
+def api_response(data, status=200):
+    return JsonResponse(data, status=status, json_dumps_params=JSON_PARAMS)
+
+
+def api_view(view):
+    """Только GET и HEAD; ненайденный объект — ответ 404 в JSON."""
+    @require_safe
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        try:
+            return view(request, *args, **kwargs)
+        except Http404:
+            return api_response({'detail': 'Не найдено'}, status=404)
+    return wrapper
+
+
+def serialize_post(post):
+    image = None
+    if post.image:
+        image = {'url': post.image.url, 'width': post.image_width,
+                 'height': post.image_height}
+    return {
+        'id': post.id,
+        'author': post.author.username,
+        'group': post.group.slug if post.group_id else None,
+        'text': post.text,
+        'pub_date': post.pub_date,
+        'image': image,
+        'thumbnail': post.thumbnail_url if post.thumbnail else None,
+        'comment_count': post.comment_count,
+    }
+
+
+def serialize_comment(comment):
+    return {
+        'id': comment.id,
+        'author': comment.author.username,
+        'text': comment.text,
+        'created': comment.created,
+    }
+
+
+def serialize_group(group):
+    return {'slug': group.slug, 'title': group.title,
+            'description': group.description}
+
+
+def serialize_author(author):
+    return {
+        'username': author.username,
+        'full_name': author.get_full_name(),
+        'posts_count': author.stats.posts_count,
+        'follows_count': author.stats.follows_count,
+        'followers_count': author.stats.followers_count,
+    }
+
+
+def page_response(request, queryset, serialize, ordering=POST_ORDERING,
+                  **extra):
+    paginator = CursorPaginator(queryset, views.RECORD_COUNT, ordering)
+    page = paginator.get_cursor_page(after=request.GET.get('after'),
+                                     before=request.GET.get('before'))
+    return api_response({
+        **extra,
+        'results': [serialize(obj) for obj in page],
+        'next': page.next_cursor,
+        'previous': page.previous_cursor,
+    })
+
+
+@api_view
+@caching.etag_versioned('index')
+def posts(request):
+    return page_response(request, views.index_posts(), serialize_post)
+
+
+@api_view
+@caching.etag_versioned('post:{post_id}')
+def post_detail(request, post_id):
+    post = get_object_or_404(Post.objects.select_related('author', 'group'),
+                             id=post_id)
+    return api_response(serialize_post(post))
+
+
+@api_view
+@caching.etag_versioned('post:{post_id}')
+def post_comments(request, post_id):
+    post = get_object_or_404(Post, id=post_id)
+    comments = views.get_comment_page(post, request.GET.get('after'))
+    return api_response({
+        'results': [serialize_comment(comment) for comment in comments],
+        'next': comments.next_cursor,
+    })
+
+
+@api_view
+@caching.etag_versioned('groups')
+def groups(request):
+    return page_response(request, Group.objects.all(), serialize_group,
+                         GROUP_ORDERING)
+
+
+@api_view
+@caching.etag_versioned('group:{slug}')
+def group_detail(request, slug):
+    group = get_object_or_404(Group, slug=slug)
+    return page_response(request, views.group_posts_list(group),
+                         serialize_post, group=serialize_group(group))
+
+
+@api_view
+@caching.etag_versioned('author:{username}', 'groups')
+def profile(request, username):
+    author = get_object_or_404(User.objects.select_related('stats'),
+                               username=username)
+    return page_response(request, views.profile_posts(author),
+                         serialize_post, author=serialize_author(author))
+
+
+@api_view
+def follow(request):
+    """Лента подписок; ETag по телу ответа, он зависит от пользователя."""
+    if not request.user.is_authenticated:
+        return api_response({'detail': 'Нужна авторизация'}, status=401)
+    response = page_response(request, views.follow_posts(request.user),
+                             serialize_post, FEED_ORDERING)
+    patch_vary_headers(response, ['Cookie'])
+    set_response_etag(response)
+    return get_conditional_response(request, etag=response['ETag'],
+                                    response=response)
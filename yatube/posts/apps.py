@@ -1,7 +1,18 @@
 from django.apps import AppConfig
+from django.conf import settings
+from django.db.models.signals import post_migrate
 
 # Приложение posts
 
 
 class PostsConfig(AppConfig):
     name = 'posts'
+
+    def ready(self):
+        from . import fulltext, pragmas, signals  # noqa: F401
+        post_migrate.connect(fulltext.restore_index, sender=self)
+        if settings.WARMUP_ON_READY:
+            # admin стоит в INSTALLED_APPS раньше posts: модели в админке
+            # уже зарегистрированы, и URLconf можно импортировать
+            from . import warmup
+            warmup.preload()
@@ -0,0 +1,220 @@
+"""
+Двухуровневый кэш.
+
+Первый уровень — небольшой LRU (LocMemCache) в памяти процесса, второй —
+общий для всех процессов сервера кэш из CACHES (по умолчанию файлы на
+диске, SharedFileCache). Запись идёт в оба уровня, чтение — сначала из
+первого. Копия в памяти живёт не дольше LOCAL_TIMEOUT секунд и не дольше
+записи в общем уровне (там рядом со значением лежит срок его жизни),
+поэтому удаление ключа в другом процессе видно здесь не сразу. Ключи,
+которые инвалидируются удалением или увеличением (поколения
+posts.caching, подписки), перечислены в SHARED_ONLY и читаются только
+из общего уровня; остальные ключи включают поколение и после записи
+не меняются.
+"""
+import fcntl
+import os
+import threading
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.cache.backends.locmem import LocMemCache
+
+LOCK_FILE = 'lock'
+_MISSING = object()
+# Счётчики по имени кэша, общие для всех его экземпляров в процессе
+# (caches создаёт свой экземпляр в каждом потоке)
+_counts = {}
+_counts_lock = threading.Lock()
+# Запись общего уровня для ключей, которые копируются в память
+Entry = namedtuple('Entry', 'expires value')
+
+
+class SharedFileCache(FileBasedCache):
+    """
+    Файловый кэш, в котором add и incr атомарны между процессами:
+    без блокировки два процесса могут увеличить поколение до одного
+    и того же значения.
+    """
+    @contextmanager
+    def lock(self):
+        os.makedirs(self._dir, 0o700, exist_ok=True)
+        with open(os.path.join(self._dir, LOCK_FILE), 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        with self.lock():
+            return super().add(key, value, timeout, version)
+
+    def incr(self, key, delta=1, version=None):
+        with self.lock():
+            return super().incr(key, delta, version)
+
+
+class TieredCache(BaseCache):
+    def __init__(self, name, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self.local = LocMemCache(name, {
+            'TIMEOUT': options.get('LOCAL_TIMEOUT', 60),
+            'OPTIONS': {
+                'MAX_ENTRIES': options.get('LOCAL_MAX_ENTRIES', 1000),
+            },
+        })
+        self.shared_alias = options.get('SHARED', 'shared')
+        self.shared_only = tuple(options.get('SHARED_ONLY', ()))
+        with _counts_lock:
+            self.counts = _counts.setdefault(
+                name, {'l1': [0, 0], 'l2': [0, 0]}
+            )
+
+    @property
+    def shared(self):
+        return caches[self.shared_alias]
+
+    def is_local(self, key):
+        return not key.startswith(self.shared_only)
+
+    def timeout(self, timeout):
+        return self.default_timeout if timeout is DEFAULT_TIMEOUT else timeout
+
+    def local_timeout(self, timeout):
+        """Срок копии в памяти: не дольше записи и LOCAL_TIMEOUT."""
+        if timeout is None:
+            return self.local.default_timeout
+        return min(timeout, self.local.default_timeout)
+
+    def pack(self, key, value, timeout):
+        if not self.is_local(key):
+            return value
+        return Entry(None if timeout is None else time.time() + timeout,
+                     value)
+
+    def unpack(self, key, entry, version):
+        """Значение из общего уровня; копия в памяти — на остаток срока."""
+        if not self.is_local(key):
+            return entry
+        if not isinstance(entry, Entry):
+            # Записано не через TieredCache: срок неизвестен
+            entry = Entry(time.time() + self.local.default_timeout, entry)
+        timeout = (None if entry.expires is None
+                   else entry.expires - time.time())
+        self.local.set(key, entry.value, self.local_timeout(timeout),
+                       version)
+        return entry.value
+
+    def count(self, tier, hits, misses):
+        with _counts_lock:
+            self.counts[tier][0] += hits
+            self.counts[tier][1] += misses
+
+    def tier_stats(self):
+        """Попадания и промахи по уровням с начала работы процесса."""
+        stats = {}
+        with _counts_lock:
+            for tier, (hits, misses) in self.counts.items():
+                total = hits + misses
+                stats[tier] = {
+                    'hits': hits,
+                    'misses': misses,
+                    'hit_rate': round(hits / total, 3) if total else None,
+                }
+        return stats
+
+    def get(self, key, default=None, version=None):
+        if self.is_local(key):
+            value = self.local.get(key, _MISSING, version)
+            self.count('l1', value is not _MISSING, value is _MISSING)
+            if value is not _MISSING:
+                return value
+        value = self.shared.get(key, _MISSING, version)
+        self.count('l2', value is not _MISSING, value is _MISSING)
+        if value is _MISSING:
+            return default
+        return self.unpack(key, value, version)
+
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        found = self.local.get_many(
+            [key for key in keys if self.is_local(key)], version
+        )
+        local_keys = sum(self.is_local(key) for key in keys)
+        self.count('l1', len(found), local_keys - len(found))
+        missing = [key for key in keys if key not in found]
+        if missing:
+            shared = self.shared.get_many(missing, version)
+            self.count('l2', len(shared), len(missing) - len(shared))
+            for key, value in shared.items():
+                found[key] = self.unpack(key, value, version)
+        return found
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        timeout = self.timeout(timeout)
+        self.shared.set(key, self.pack(key, value, timeout), timeout, version)
+        if self.is_local(key):
+            self.local.set(key, value, self.local_timeout(timeout), version)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        timeout = self.timeout(timeout)
+        failed = self.shared.set_many({
+            key: self.pack(key, value, timeout) for key, value in data.items()
+        }, timeout, version)
+        self.local.set_many({
+            key: value for key, value in data.items()
+            if self.is_local(key) and key not in failed
+        }, self.local_timeout(timeout), version)
+        return failed
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        timeout = self.timeout(timeout)
+        added = self.shared.add(key, self.pack(key, value, timeout),
+                                timeout, version)
+        if added and self.is_local(key):
+            self.local.set(key, value, self.local_timeout(timeout), version)
+        return added
+
+    def incr(self, key, delta=1, version=None):
+        self.local.delete(key, version)
+        if self.is_local(key):
+            # Рядом со значением лежит срок: только чтение и запись
+            return super().incr(key, delta, version)
+        return self.shared.incr(key, delta, version)
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        if not self.is_local(key):
+            return self.shared.touch(key, self.timeout(timeout), version)
+        # Срок лежит и рядом со значением, поэтому запись переписывается
+        value = self.get(key, _MISSING, version)
+        if value is _MISSING:
+            return False
+        self.set(key, value, timeout, version)
+        return True
+
+    def delete(self, key, version=None):
+        self.local.delete(key, version)
+        self.shared.delete(key, version)
+
+    def delete_many(self, keys, version=None):
+        keys = list(keys)
+        self.local.delete_many(keys, version)
+        self.shared.delete_many(keys, version)
+
+    def has_key(self, key, version=None):
+        if self.is_local(key) and self.local.has_key(key, version):
+            return True
+        return self.shared.has_key(key, version)
+
+    def clear(self):
+        self.local.clear()
+        self.shared.clear()
+
+    def close(self, **kwargs):
+        self.shared.close(**kwargs)
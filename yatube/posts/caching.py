@@ -0,0 +1,214 @@
+"""
+Версионированные ключи кэша.
+
+У каждой области (лента index, группа, автор, пост) есть счётчик-поколение.
+Сигналы увеличивают его при изменении Post, Comment, Group, Follow и User.
+Страница в кэше помнит поколения, из которых собрана, и после изменения
+считается устаревшей; пока её пересобирает один запрос, остальные получают
+прежнюю версию. Из тех же поколений считаются ETag для условных GET.
+"""
+import hashlib
+import time
+import uuid
+from functools import partial, wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.cache import (get_cache_key, has_vary_header,
+                                learn_cache_key, patch_cache_control,
+                                patch_response_headers, patch_vary_headers)
+from django.utils.http import quote_etag
+from django.views.decorators.http import etag
+
+from .routers import is_pinned, primary_reads
+
+GENERATION_KEY = 'generation:{}'
+# Запись о странице (поколение, срок свежести, ключ самой страницы)
+# перезаписывается на месте; сама страница под своим ключом не меняется
+STALE_KEY = 'stale:{}'
+PAGE_KEY = 'page:{}:{}'
+REBUILD_KEY = 'rebuild:{}:{}'
+REBUILD_POLL_INTERVAL = 0.05
+
+
+def _initial():
+    # Значение растёт со временем: если счётчик вытеснен из кэша,
+    # новое поколение не совпадёт ни с одним из прежних
+    return int(time.time() * 1000)
+
+
+def get_generation(*scopes):
+    """Строка из поколений областей scopes."""
+    keys = [GENERATION_KEY.format(scope) for scope in scopes]
+    found = cache.get_many(keys)
+    for key in keys:
+        if key not in found:
+            cache.add(key, _initial(), None)
+            found[key] = cache.get(key)
+    return '.'.join(str(found[key]) for key in keys)
+
+
+def _bump(*scopes):
+    for scope in scopes:
+        key = GENERATION_KEY.format(scope)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, _initial(), None)
+
+
+def bump(*scopes):
+    """
+    Начинает новое поколение для каждой из областей сейчас и ещё раз после
+    фиксации транзакции: страница, собранная параллельным запросом до
+    фиксации из старых данных, не останется свежей.
+    """
+    _bump(*scopes)
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(partial(_bump, *scopes))
+
+
+def post_scopes(post):
+    scopes = ['index', f'author:{post.author.username}', f'post:{post.id}']
+    if post.group_id:
+        scopes.append(f'group:{post.group.slug}')
+    return scopes
+
+
+def _cached_page(request, prefix, generation):
+    """(страница из кэша, свежая ли она) или (None, False)."""
+    key = get_cache_key(request, prefix, request.method, cache=cache)
+    entry = cache.get(STALE_KEY.format(key)) if key else None
+    response = cache.get(entry['page']) if entry else None
+    if response is None:
+        return None, False
+    fresh = (entry['generation'] == generation
+             and entry['expires'] > time.time())
+    if not fresh:
+        # ETag из новых поколений не должен достаться старой странице
+        response['ETag'] = quote_etag(f'stale.{entry["generation"]}')
+    return response, fresh
+
+
+def _build_page(request, view, args, kwargs, prefix, generation, timeout):
+    """Собирает страницу и сохраняет по тем же правилам, что и cache_page."""
+    # Страница станет свежей для нового поколения, а реплика могла отстать
+    with primary_reads():
+        response = view(request, *args, **kwargs)
+    patch_response_headers(response, timeout)
+    # Меню и кнопки зависят от сеанса, а SessionMiddleware добавит Vary
+    # только после того, как ключ страницы будет выучен
+    patch_vary_headers(response, ['Cookie'])
+    if response.streaming or response.status_code != 200:
+        return response
+    if not request.COOKIES and response.cookies and \
+            has_vary_header(response, 'Cookie'):
+        return response
+    lifetime = timeout + settings.PAGE_CACHE_STALE_TIMEOUT
+    page = PAGE_KEY.format(prefix, uuid.uuid4().hex)
+    cache.set(page, response, lifetime)
+    key = learn_cache_key(request, response, lifetime, prefix, cache=cache)
+    cache.set(STALE_KEY.format(key), {
+        'generation': generation,
+        'expires': time.time() + timeout,
+        'page': page,
+    }, lifetime)
+    return response
+
+
+def rebuild_lock(request, prefix):
+    """
+    Ключ блокировки сборки варианта страницы: тот же ключ с учётом Vary,
+    под которым страница хранится, чтобы сеансы разных пользователей
+    не ждали друг друга. Пока заголовки Vary не известны, берётся адрес.
+    """
+    key = get_cache_key(request, prefix, request.method, cache=cache)
+    if key is None:
+        key = request.build_absolute_uri()
+    return REBUILD_KEY.format(prefix, hashlib.md5(key.encode()).hexdigest())
+
+
+def _serve_page(request, prefix, generation, build):
+    """Свежая страница из кэша, прежняя на время сборки или новая."""
+    lock = rebuild_lock(request, prefix)
+    deadline = time.monotonic() + settings.PAGE_REBUILD_TIMEOUT
+    while True:
+        response, fresh = _cached_page(request, prefix, generation)
+        if fresh:
+            return response
+        if cache.add(lock, True, settings.PAGE_REBUILD_TIMEOUT):
+            try:
+                # Страницу могли собрать и снять блокировку между
+                # проверкой выше и захватом
+                response, fresh = _cached_page(request, prefix, generation)
+                return response if fresh else build()
+            finally:
+                cache.delete(lock)
+        if response is not None and not is_pinned(request):
+            return response
+        if time.monotonic() >= deadline:
+            return build()
+        time.sleep(REBUILD_POLL_INTERVAL)
+
+
+def cache_page_versioned(timeout, *scopes):
+    """
+    Кэш страницы на timeout секунд, пока не изменились поколения scopes.
+    Области задаются шаблонами от аргументов представления: 'group:{slug}'.
+
+    Устаревшую страницу (истёк срок или сменилось поколение) пересобирает
+    один запрос, взявший блокировку в кэше; остальные тем временем
+    получают прежнюю версию. Если прежней нет или браузер только что
+    что-то записал (posts.routers), запросы ждут, пока страницу соберут,
+    но не дольше PAGE_REBUILD_TIMEOUT секунд.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view(request, *args, **kwargs)
+            names = [scope.format(**kwargs) for scope in scopes]
+            generation = get_generation(*names)
+            prefix = view.__name__
+            return _serve_page(request, prefix, generation, partial(
+                _build_page, request, view, args, kwargs, prefix,
+                generation, timeout,
+            ))
+        return wrapper
+    return decorator
+
+
+def etag_versioned(*scopes, per_user=False):
+    """
+    Условный GET: ETag складывается из адреса запроса и поколений scopes
+    (и id пользователя, если per_user), поэтому If-None-Match проверяется
+    одним чтением кэша, без БД. Области задаются так же, как
+    в cache_page_versioned.
+    """
+    def etag_func(request, *args, **kwargs):
+        names = [scope.format(**kwargs) for scope in scopes]
+        raw = f'{request.get_full_path()}:{get_generation(*names)}'
+        if per_user:
+            raw += f':{request.user.pk}'
+        return hashlib.md5(raw.encode()).hexdigest()
+    return etag(etag_func)
+
+
+def conditional_page(*scopes):
+    """
+    ETag страницы HTML: поколения scopes и зритель (меню, кнопки подписки
+    и токен формы у каждого свои). Браузер должен перепроверять страницу
+    при каждом показе, а не брать её из своего кэша, поэтому max-age,
+    выставленный cache_page_versioned, заменяется на no-cache.
+    """
+    def decorator(view):
+        @etag_versioned(*scopes, per_user=True)
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            response = view(request, *args, **kwargs)
+            patch_cache_control(response, private=True, no_cache=True,
+                                max_age=0)
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,43 @@
+"""
+Кэш карточек постов.
+
+Общая для всех зрителей часть карточки (картинка, текст, группа, число
+комментариев, дата) рендерится шаблоном post_card.html и хранится под
+ключом из id поста и времени его изменения. Для страницы ленты все
+карточки читаются одним get_many, отрисовываются только промахи.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+CARD_KEY = 'post_card:{}:{}'
+CARD_TEMPLATE = 'post_card.html'
+
+
+def card_key(post):
+    return CARD_KEY.format(post.id, int(post.updated.timestamp() * 10**6))
+
+
+def render_cards(posts):
+    """HTML карточек постов: {id поста: html}."""
+    keys = {post.id: card_key(post) for post in posts}
+    found = cache.get_many(keys.values())
+    cards, missing = {}, {}
+    for post in posts:
+        html = found.get(keys[post.id])
+        if html is None:
+            html = render_to_string(CARD_TEMPLATE, {'post': post})
+            missing[keys[post.id]] = html
+        cards[post.id] = mark_safe(html)
+    if missing:
+        cache.set_many(missing, settings.POST_CARD_TIMEOUT)
+    return cards
+
+
+def prefetch(posts):
+    """Прикрепляет к каждому посту готовую карточку post.card_html."""
+    posts = list(posts)
+    cards = render_cards(posts)
+    for post in posts:
+        post.card_html = cards[post.id]
@@ -0,0 +1,63 @@
+"""
+Денормализованные счётчики: Post.comment_count и UserStats.
+
+Сигналы меняют их выражениями F() в той же транзакции, что и запись
+(представления, которые создают записи, выполняются в transaction.atomic).
+Команда recount пересчитывает всё заново, если счётчики разошлись.
+"""
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import Comment, Follow, Post, User, UserStats
+
+
+def _count(queryset, field):
+    """Подзапрос с числом строк queryset, сгруппированных по field."""
+    return Coalesce(Subquery(
+        queryset.filter(**{field: OuterRef('pk')}).order_by()
+        .values(field).annotate(total=Count('pk')).values('total'),
+        output_field=IntegerField()
+    ), 0)
+
+
+def bump_comments(post_id, delta):
+    # updated меняется вместе со счётчиком, чтобы сменился ключ карточки
+    Post.objects.filter(pk=post_id).update(
+        comment_count=F('comment_count') + delta, updated=timezone.now()
+    )
+
+
+def bump_user(user_id, **deltas):
+    """
+    Сдвигает счётчики пользователя. Если строки ещё нет, она создаётся
+    пересчётом; при удалении (каскадном тоже) недостающая строка не нужна.
+    """
+    updated = UserStats.objects.filter(user_id=user_id).update(**{
+        field: F(field) + delta for field, delta in deltas.items()
+    })
+    if not updated and min(deltas.values()) > 0:
+        recount_users(User.objects.filter(pk=user_id))
+
+
+def recount_posts(posts=None):
+    posts = Post.objects.all() if posts is None else posts
+    return posts.update(comment_count=_count(Comment.objects, 'post'))
+
+
+def recount_users(users=None):
+    users = User.objects.all() if users is None else users
+    rows = users.order_by().annotate(
+        posts_total=_count(Post.objects, 'author'),
+        follows_total=_count(Follow.objects, 'user'),
+        followers_total=_count(Follow.objects, 'author'),
+    ).values_list('pk', 'posts_total', 'follows_total', 'followers_total')
+    count = 0
+    for user_id, posts, follows, followers in rows.iterator():
+        UserStats.objects.update_or_create(user_id=user_id, defaults={
+            'posts_count': posts,
+            'follows_count': follows,
+            'followers_count': followers,
+        })
+        count += 1
+    return count
@@ -0,0 +1,200 @@
+"""
+Детерминированный синтетический набор данных для нагрузочных тестов.
+
+Одинаковые seed и размеры дают одинаковые строки, поэтому бенчмарки
+и нагрузочные тесты можно сравнивать между собой. Плодовитость авторов,
+подписки и комментарии распределены по степенному закону: ранг
+выбирается как int(n ** u), что даёт вероятность около 1/ранг. Ранги
+разбрасываются по id умножением на взаимно простой шаг, чтобы
+популярные объекты не шли подряд.
+"""
+import datetime as dt
+import math
+import random
+from functools import lru_cache
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.db.models import Max
+
+from .bulkload import raw_dates
+from .models import Comment, Follow, Group, Post, User
+
+SIZES = {
+    'small': {'users': 200, 'groups': 10, 'posts': 5000,
+              'comments': 10000, 'follows': 10},
+    'medium': {'users': 10000, 'groups': 200, 'posts': 200000,
+               'comments': 500000, 'follows': 30},
+    'large': {'users': 100000, 'groups': 1000, 'posts': 2000000,
+              'comments': 5000000, 'follows': 50},
+}
+# Даты фиксированы, чтобы набор не зависел от дня генерации
+END = dt.datetime(2026, 1, 1, tzinfo=dt.timezone.utc)
+SPAN = dt.timedelta(days=365)
+PASSWORD = 'password'
+GROUP_SHARE = 0.6
+IMAGE_SIZES = ((1920, 1080), (1080, 1350), (1280, 720), (800, 800))
+STRIDE = 7919
+BATCH_SIZE = 5000
+WORDS = (
+    'день дом дорога письмо книга время жизнь человек мысль работа утро '
+    'вечер ночь город деревня поле лес река небо солнце дождь снег ветер '
+    'друг брат сестра отец мать дети война мир любовь счастье правда '
+    'дневник тетрадь чтение разговор прогулка обед чай музыка поезд '
+    'новый старый долгий тихий светлый хороший трудный странный важный '
+    'писать читать думать ехать ждать помнить видеть слышать знать жить'
+).split()
+
+
+def power_law_rank(rng, n):
+    """Ранг от 0 до n - 1 с вероятностью, убывающей примерно как 1/ранг."""
+    return min(int(n ** rng.random()), n) - 1
+
+
+@lru_cache(maxsize=None)
+def _stride(n):
+    stride = STRIDE
+    while math.gcd(stride, n) != 1:
+        stride += 1
+    return stride
+
+
+def scatter(rank, n):
+    """Перестановка рангов: популярные объекты разбросаны по id."""
+    return rank * _stride(n) % n
+
+
+class DatasetBuilder:
+    """
+    Создаёт пользователей, группы, посты, комментарии и подписки пачками
+    bulk_create. Новые id идут после уже существующих, имена и адреса
+    групп начинаются с prefix.
+    """
+    def __init__(self, users, groups, posts, comments, follows, seed=0,
+                 images=0.1, prefix='gen', batch_size=BATCH_SIZE,
+                 progress=None):
+        self.sizes = {'users': users, 'groups': groups, 'posts': posts,
+                      'comments': comments}
+        self.follows = follows
+        self.seed = seed
+        self.images = images
+        self.prefix = prefix
+        self.batch_size = batch_size
+        self.progress = progress or (lambda label, count: None)
+
+    def build(self):
+        """Возвращает число созданных строк каждой модели."""
+        self.bases = {
+            model: (model.objects.aggregate(top=Max('id'))['top'] or 0) + 1
+            for model in (User, Group, Post, Comment)
+        }
+        steps = (
+            ('users', User, self.users),
+            ('groups', Group, self.groups),
+            ('posts', Post, self.posts),
+            ('comments', Comment, self.comments),
+            ('follows', Follow, self.follow_rows),
+        )
+        created = {}
+        with raw_dates(Post, Comment, Follow):
+            for label, model, rows in steps:
+                # Отдельный генератор на модель: размер одной части
+                # не сдвигает случайные числа другой
+                rng = random.Random(f'{self.seed}:{label}')
+                created[label] = self.save(label, model, rows(rng))
+        return created
+
+    def save(self, label, model, objects):
+        count = 0
+        while True:
+            batch = list(islice(objects, self.batch_size))
+            if not batch:
+                return count
+            with transaction.atomic():
+                model.objects.bulk_create(batch)
+            count += len(batch)
+            self.progress(label, count)
+
+    def user_id(self, rank):
+        return self.bases[User] + scatter(rank, self.sizes['users'])
+
+    def post_date(self, index):
+        return END - SPAN + SPAN * (index + 1) / (self.sizes['posts'] + 1)
+
+    def users(self, rng):
+        password = make_password(PASSWORD)
+        for index in range(self.sizes['users']):
+            yield User(id=self.bases[User] + index,
+                       username=f'{self.prefix}{index}',
+                       password=password,
+                       date_joined=END - SPAN * (1 + rng.random()))
+
+    def groups(self, rng):
+        for index in range(self.sizes['groups']):
+            yield Group(id=self.bases[Group] + index,
+                        title=f'Группа {self.prefix}{index}',
+                        slug=f'{self.prefix}-{index}',
+                        description=self.text(rng, 10, 30))
+
+    def posts(self, rng):
+        groups = self.sizes['groups']
+        for index in range(self.sizes['posts']):
+            post = Post(
+                id=self.bases[Post] + index,
+                author_id=self.user_id(
+                    power_law_rank(rng, self.sizes['users'])
+                ),
+                text=self.text(rng, 5, 60),
+                pub_date=self.post_date(index),
+            )
+            if groups and rng.random() < GROUP_SHARE:
+                post.group_id = self.bases[Group] + scatter(
+                    power_law_rank(rng, groups), groups
+                )
+            if rng.random() < self.images:
+                post.image = f'posts/generated/{index % 1000}.jpg'
+                post.image_width, post.image_height = rng.choice(IMAGE_SIZES)
+                post.image_size = rng.randint(50000, 500000)
+            yield post
+
+    def comments(self, rng):
+        posts = self.sizes['posts']
+        if not posts:
+            return
+        for index in range(self.sizes['comments']):
+            # Комментарии собираются под горячими постами
+            post = scatter(power_law_rank(rng, posts), posts)
+            published = self.post_date(post)
+            yield Comment(
+                id=self.bases[Comment] + index,
+                post_id=self.bases[Post] + post,
+                author_id=self.user_id(
+                    power_law_rank(rng, self.sizes['users'])
+                ),
+                text=self.text(rng, 2, 20),
+                created=published + (END - published) * rng.random() ** 3,
+            )
+
+    def follow_rows(self, rng):
+        users = self.sizes['users']
+        for index in range(users):
+            user_id = self.bases[User] + index
+            # Парето со средним 2: большинство подписано на немногих,
+            # единицы — на сотни авторов
+            wanted = min(int(self.follows / 2 * rng.paretovariate(2)),
+                         users - 1)
+            authors = set()
+            for _ in range(wanted * 3):
+                if len(authors) >= wanted:
+                    break
+                author_id = self.user_id(power_law_rank(rng, users))
+                if author_id != user_id:
+                    authors.add(author_id)
+            for author_id in sorted(authors):
+                yield Follow(user_id=user_id, author_id=author_id,
+                             subscription_date=END - SPAN * rng.random())
+
+    def text(self, rng, shortest, longest):
+        words = rng.choices(WORDS, k=rng.randint(shortest, longest))
+        return ' '.join(words).capitalize() + '.'
@@ -0,0 +1,200 @@
+"""
+Поток новых постов (Server-Sent Events).
+
+На процесс приходится один опрашивающий поток: раз в SSE_POLL_INTERVAL
+секунд он выбирает посты с id больше последнего увиденного и раскладывает
+их по очередям подписчиков, у которых совпал фильтр (вся лента, группа
+или лента подписок). Пост, сохранённый в этом же процессе, будит поток
+сразу после фиксации транзакции. Пока подписчиков нет, БД не опрашивается.
+"""
+import json
+import logging
+import queue
+import threading
+import time
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Max
+
+from . import follows
+from .models import Post
+
+QUEUE_SIZE = 100
+# Сколько пропущенных постов отдаётся при переподключении с Last-Event-ID
+REPLAY_LIMIT = 100
+POLL_BATCH = 500
+
+logger = logging.getLogger(__name__)
+
+
+def feed_filter(feed, group_id=None, user_id=None):
+    """
+    Функция от строк одного опроса (id, author_id, group_id): id постов,
+    которые нужны ленте.
+    """
+    if feed == 'group':
+        return lambda rows: [post_id for post_id, _, post_group_id in rows
+                             if post_group_id == group_id]
+    if feed == 'follow':
+        def accepts(rows):
+            # Множество подписок читается один раз на опрос
+            following = follows.get_following(user_id)
+            return [post_id for post_id, author_id, _ in rows
+                    if author_id in following]
+        return accepts
+    return lambda rows: [post_id for post_id, _, _ in rows]
+
+
+def feed_posts(feed, group_id=None, user_id=None):
+    """Посты ленты, по которым восполняется пропуск при переподключении."""
+    posts = Post.objects.order_by('id')
+    if feed == 'group':
+        return posts.filter(group_id=group_id)
+    if feed == 'follow':
+        return posts.filter(author_id__in=follows.get_following(user_id))
+    return posts
+
+
+class Subscription:
+    def __init__(self, broadcaster, accepts):
+        self.broadcaster = broadcaster
+        self.accepts = accepts
+        self.queue = queue.Queue(QUEUE_SIZE)
+
+    def put(self, rows):
+        for post_id in self.accepts(rows):
+            try:
+                self.queue.put_nowait(post_id)
+            except queue.Full:
+                # Медленный клиент теряет уведомления, а не держит память
+                break
+
+    def get(self, timeout):
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        self.broadcaster.unsubscribe(self)
+
+
+class Broadcaster:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.subscriptions = set()
+        self.wakeup = threading.Event()
+        self.last_id = None
+        self.thread = None
+
+    def subscribe(self, accepts):
+        subscription = Subscription(self, accepts)
+        with self.lock:
+            self.subscriptions.add(subscription)
+            if self.thread is None:
+                self.start()
+        return subscription
+
+    def start(self):
+        # Отсчёт от текущего максимума, взятого при подписке:
+        # посты, созданные после неё, не теряются
+        self.last_id = self.latest_id()
+        self.thread = threading.Thread(target=self.run, name='post-events',
+                                       daemon=True)
+        self.thread.start()
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            self.subscriptions.discard(subscription)
+
+    def notify(self):
+        self.wakeup.set()
+
+    def latest_id(self):
+        return Post.objects.aggregate(top=Max('id'))['top'] or 0
+
+    def poll(self):
+        """Один опрос БД: новые посты уходят подходящим подписчикам."""
+        rows = list(Post.objects.filter(id__gt=self.last_id).order_by(
+            'id'
+        ).values_list('id', 'author_id', 'group_id')[:POLL_BATCH])
+        if not rows:
+            return 0
+        with self.lock:
+            subscriptions = list(self.subscriptions)
+        for subscription in subscriptions:
+            subscription.put(rows)
+        self.last_id = rows[-1][0]
+        return len(rows)
+
+    def run(self):
+        try:
+            while True:
+                with self.lock:
+                    if not self.subscriptions:
+                        # Поток завершается; следующий подписчик
+                        # запустит новый
+                        self.thread = None
+                        break
+                try:
+                    self.poll()
+                except Exception:
+                    # Упавший поток заглушил бы все потоки событий процесса;
+                    # следующий опрос — через обычный интервал
+                    logger.exception('Не удалось опросить новые посты')
+                finally:
+                    # Соединение живёт между опросами, как между запросами:
+                    # до ошибки или до CONN_MAX_AGE
+                    connection.close_if_unusable_or_obsolete()
+                self.wakeup.wait(settings.SSE_POLL_INTERVAL)
+                self.wakeup.clear()
+        finally:
+            with self.lock:
+                if self.thread is threading.current_thread():
+                    # Следующий подписчик запустит новый поток
+                    self.thread = None
+            connection.close()
+
+
+broadcaster = Broadcaster()
+
+
+def event(post_id):
+    data = json.dumps({'id': post_id})
+    return f'id: {post_id}\nevent: post\ndata: {data}\n\n'
+
+
+def stream(feed, group_id=None, user_id=None, last_event_id=None):
+    """
+    Генератор событий для StreamingHttpResponse. Соединение закрывается
+    через SSE_MAX_AGE секунд, браузер переподключается сам и передаёт
+    Last-Event-ID, по которому досылаются пропущенные посты.
+    """
+    deadline = time.monotonic() + settings.SSE_MAX_AGE
+    subscription = broadcaster.subscribe(
+        feed_filter(feed, group_id, user_id)
+    )
+    try:
+        yield f'retry: {settings.SSE_RETRY * 1000}\n\n'
+        last_id = last_event_id or 0
+        if last_event_id is not None:
+            # Пропуск выбирается после подписки: пост между ними придёт
+            # дважды, но не потеряется; повтор отсекается по id
+            for post_id in feed_posts(feed, group_id, user_id).filter(
+                id__gt=last_event_id
+            ).values_list('id', flat=True)[:REPLAY_LIMIT]:
+                last_id = post_id
+                yield event(post_id)
+        while time.monotonic() < deadline:
+            post_id = subscription.get(max(
+                min(settings.SSE_HEARTBEAT, deadline - time.monotonic()), 0
+            ))
+            if post_id is None:
+                # Комментарий держит соединение через прокси
+                yield ': ping\n\n'
+            elif post_id > last_id:
+                last_id = post_id
+                yield event(post_id)
+    finally:
+        subscription.close()
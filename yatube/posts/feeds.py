@@ -0,0 +1,145 @@
+"""
+Ленты RSS и Atom: общая, группы и автора.
+
+Посты берутся теми же querysets, что и в HTML-представлениях, и пишутся
+в ответ по одному: заголовок документа, затем каждая запись, затем
+закрывающие теги, так что лента целиком в памяти не собирается. В кэше
+лежат только готовые записи под ключом из id поста, времени его
+изменения и адреса сайта (ссылки в записях абсолютные); они читаются
+одним get_many на FEED_BATCH постов. ETag из поколений области
+(posts.caching) даёт 304 без обращения к БД.
+"""
+import io
+from itertools import chain, islice
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.feedgenerator import Atom1Feed, Rss201rev2Feed
+from django.utils.html import escape, linebreaks
+from django.utils.text import Truncator
+from django.utils.xmlutils import SimplerXMLGenerator
+from django.views.decorators.http import require_safe
+
+from . import caching, views
+from .models import Group, User
+
+FEED_ITEMS = 50
+FEED_BATCH = 10
+ITEM_KEY = 'feed_item:{}:{}:{}:{}'
+ENCODING = 'utf-8'
+FORMATS = {'rss': Rss201rev2Feed, 'atom': Atom1Feed}
+# Закрывающий тег, перед которым в документе идут записи
+CLOSING_TAGS = {'rss': '</channel>', 'atom': '</feed>'}
+
+
+def post_item(request, post):
+    link = request.build_absolute_uri(
+        reverse('post', args=[post.author.username, post.id])
+    )
+    return {
+        'title': Truncator(post.text).words(10),
+        'link': link,
+        'unique_id': link,
+        'description': linebreaks(escape(post.text)),
+        'author_name': post.author.username,
+        'pubdate': post.pub_date,
+        'updateddate': post.updated,
+        'categories': [post.group.title] if post.group_id else (),
+    }
+
+
+def item_key(request, feed_format, post):
+    site = f'{request.scheme}://{request.get_host()}'
+    return ITEM_KEY.format(feed_format, site, post.id,
+                           int(post.updated.timestamp() * 10**6))
+
+
+def stream_feed(request, feed_format, posts, **feed):
+    """Куски документа ленты; записи пишутся по мере чтения из БД."""
+    posts = posts[:FEED_ITEMS].iterator()
+    first = next(posts, None)
+    generator = FORMATS[feed_format](
+        link=request.build_absolute_uri(feed.pop('link')),
+        feed_url=request.build_absolute_uri(),
+        language='ru', **feed
+    )
+    if first is not None:
+        # Записи генератору не передаются, поэтому дату ленты
+        # он узнаёт не из них, а из самого нового поста
+        generator.latest_post_date = lambda: first.pub_date
+    buffer = io.StringIO()
+    generator.write(buffer, ENCODING)
+    document = buffer.getvalue()
+    split = document.rindex(CLOSING_TAGS[feed_format])
+    yield document[:split]
+    handler = SimplerXMLGenerator(buffer, ENCODING)
+
+    def render(post):
+        buffer.seek(0)
+        buffer.truncate()
+        generator.items = []
+        generator.add_item(**post_item(request, post))
+        generator.write_items(handler)
+        return buffer.getvalue()
+
+    posts = chain([first] if first else [], posts)
+    while True:
+        batch = list(islice(posts, FEED_BATCH))
+        if not batch:
+            break
+        keys = {post.id: item_key(request, feed_format, post)
+                for post in batch}
+        found = cache.get_many(keys.values())
+        missing = {}
+        for post in batch:
+            item = found.get(keys[post.id])
+            if item is None:
+                item = missing[keys[post.id]] = render(post)
+            yield item
+        if missing:
+            cache.set_many(missing, settings.POST_CARD_TIMEOUT)
+    yield document[split:]
+
+
+def feed_response(request, feed_format, posts, **feed):
+    return StreamingHttpResponse(
+        stream_feed(request, feed_format, posts, **feed),
+        content_type=FORMATS[feed_format].content_type,
+    )
+
+
+@require_safe
+@caching.etag_versioned('index')
+def index_feed(request, feed_format):
+    return feed_response(
+        request, feed_format, views.index_posts(),
+        title='Yatube: последние записи', link=reverse('index'),
+        description='Новые записи всех авторов',
+    )
+
+
+@require_safe
+@caching.etag_versioned('group:{slug}')
+def group_feed(request, feed_format, slug):
+    group = get_object_or_404(Group, slug=slug)
+    return feed_response(
+        request, feed_format, views.group_posts_list(group),
+        title=f'Yatube: {group.title}',
+        link=reverse('group_posts', args=[slug]),
+        description=group.description,
+    )
+
+
+@require_safe
+@caching.etag_versioned('author:{username}', 'groups')
+def author_feed(request, feed_format, username):
+    author = get_object_or_404(User, username=username)
+    return feed_response(
+        request, feed_format, views.profile_posts(author),
+        title=f'Yatube: {author.get_full_name() or username}',
+        link=reverse('profile', args=[username]),
+        description=f'Записи автора {username}',
+    )
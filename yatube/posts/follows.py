@@ -0,0 +1,39 @@
+"""
+Множество авторов, на которых подписан пользователь, в кэше.
+
+Проверки «подписан ли» и отбор авторов для ленты подписок читают его
+вместо таблицы Follow. Сигналы Follow удаляют ключ подписчика сразу
+и ещё раз после фиксации транзакции, чтобы параллельный запрос не
+вернул в кэш множество, прочитанное до фиксации.
+"""
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Follow
+
+FOLLOWING_KEY = 'following:{}'
+
+
+def get_following(user_id):
+    """frozenset id авторов, на которых подписан пользователь."""
+    key = FOLLOWING_KEY.format(user_id)
+    authors = cache.get(key)
+    if authors is None:
+        authors = frozenset(Follow.objects.filter(
+            user_id=user_id
+        ).order_by().values_list('author_id', flat=True))
+        cache.set(key, authors, settings.FOLLOWING_TIMEOUT)
+    return authors
+
+
+def is_following(user, author_id):
+    return user.is_authenticated and author_id in get_following(user.pk)
+
+
+def invalidate(user_id):
+    key = FOLLOWING_KEY.format(user_id)
+    cache.delete(key)
+    transaction.on_commit(partial(cache.delete, key))
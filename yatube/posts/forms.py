@@ -1,6 +1,9 @@
 from django import forms
+from django.core.files.uploadedfile import UploadedFile
 from django.forms.widgets import Textarea
+from PIL import Image
 
+from . import images
 from .models import Comment, Post
 
 
@@ -9,6 +12,26 @@ class PostForm(forms.ModelForm):
         model = Post
         fields = ('text', 'group', 'image')
 
+    def clean_image(self):
+        image = self.cleaned_data.get('image')
+        post = self.instance
+        if isinstance(image, UploadedFile):
+            try:
+                image, post.image_width, post.image_height = images.ingest(
+                    image
+                )
+            except (OSError, ValueError, Image.DecompressionBombError):
+                # Проверка ImageField не декодирует картинку целиком:
+                # обрезанный файл падает только при перекодировании
+                raise forms.ValidationError(
+                    self.fields['image'].error_messages['invalid_image'],
+                    code='invalid_image',
+                )
+            post.image_size = image.size
+        elif not image:
+            post.image_width = post.image_height = post.image_size = None
+        return image
+
 
 class CommentForm(forms.ModelForm):
     class Meta:
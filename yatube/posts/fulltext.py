@@ -0,0 +1,196 @@
+"""
+Полнотекстовый поиск по постам.
+
+В SQLite текст постов индексирует виртуальная таблица FTS5 posts_post_fts.
+Триггеры на posts_post обновляют её при любом INSERT, UPDATE и DELETE,
+в том числе при update() и каскадном удалении. Токенизатор unicode61
+приводит слова к нижнему регистру. Букву ё он не трогает, поэтому
+в индекс текст попадает с ё, заменённой на е (так же меняется запрос,
+а во фрагментах результатов ё выводится как е).
+Слова запроса ищутся как префиксы, что заменяет стемминг русских
+окончаний. На других СУБД поиск сводится к icontains.
+
+Django пересоздаёт таблицу posts_post при части изменений полей, и
+триггеры при этом пропадают. После каждого migrate restore_index
+(обработчик post_migrate) создаёт недостающие триггеры и заново
+заполняет индекс; вручную то же делает manage.py rebuild_search.
+"""
+import re
+
+from django.db import DEFAULT_DB_ALIAS, connection, connections, transaction
+from django.db.models.expressions import RawSQL
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from .models import Post
+from .paginator import POST_ORDERING
+
+FTS_TABLE = 'posts_post_fts'
+NORMALIZED_TEXT = "replace(replace({}.text, 'ё', 'е'), 'Ё', 'Е')"
+SCHEMA = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    "text, tokenize='unicode61 remove_diacritics 2')",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON posts_post "
+    f"BEGIN INSERT INTO {FTS_TABLE}(rowid, text) "
+    f"VALUES (new.id, {NORMALIZED_TEXT.format('new')}); END",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON posts_post "
+    f"BEGIN DELETE FROM {FTS_TABLE} WHERE rowid = old.id; END",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au "
+    "AFTER UPDATE OF text ON posts_post "
+    f"BEGIN UPDATE {FTS_TABLE} SET text = {NORMALIZED_TEXT.format('new')} "
+    "WHERE rowid = new.id; END",
+)
+DROP_SCHEMA = (
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_ai',
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_ad',
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_au',
+    f'DROP TABLE IF EXISTS {FTS_TABLE}',
+)
+TRIGGERS = (f'{FTS_TABLE}_ai', f'{FTS_TABLE}_ad', f'{FTS_TABLE}_au')
+REBUILD = (
+    f'DELETE FROM {FTS_TABLE}',
+    f"INSERT INTO {FTS_TABLE}(rowid, text) "
+    f"SELECT id, {NORMALIZED_TEXT.format('posts_post')} FROM posts_post",
+)
+
+# Границы подсветки в snippet(): управляющие символы не встречаются
+# в тексте, поэтому их можно заменить на теги после экранирования
+MARK_START, MARK_END = '\x02', '\x03'
+SNIPPET_TOKENS = 24
+WORD_RE = re.compile(r'\w+')
+
+
+def is_available(using=connection):
+    return using.vendor == 'sqlite'
+
+
+def create_index(using=connection):
+    """Создаёт таблицу и триггеры, если их нет, и заполняет индекс."""
+    with using.cursor() as cursor:
+        for statement in SCHEMA + REBUILD:
+            cursor.execute(statement)
+
+
+def drop_index(using=connection):
+    with using.cursor() as cursor:
+        for statement in DROP_SCHEMA:
+            cursor.execute(statement)
+
+
+def missing_triggers(using=connection):
+    with using.cursor() as cursor:
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'trigger' "
+            'AND tbl_name = %s', ['posts_post']
+        )
+        existing = {name for name, in cursor.fetchall()}
+    return [name for name in TRIGGERS if name not in existing]
+
+
+def restore_index(sender, using=DEFAULT_DB_ALIAS, **kwargs):
+    """
+    Обработчик post_migrate: если индекс есть, а триггеров нет (таблицу
+    posts_post пересоздала миграция), восстанавливает их и индекс.
+    """
+    using = connections[using]
+    if not is_available(using) or \
+            FTS_TABLE not in using.introspection.table_names():
+        return
+    if missing_triggers(using):
+        with transaction.atomic(using=using.alias):
+            create_index(using)
+
+
+def match_query(query):
+    """
+    Выражение MATCH: каждое слово в кавычках и с *, чтобы операторы FTS5
+    в пользовательском вводе не разбирались.
+    """
+    words = WORD_RE.findall(query.lower().replace('ё', 'е'))
+    return ' '.join(f'"{word}"*' for word in words)
+
+
+def highlight(snippet):
+    html = escape(snippet)
+    return mark_safe(
+        html.replace(MARK_START, '<mark>').replace(MARK_END, '</mark>')
+    )
+
+
+def matching_ids(query):
+    """Подзапрос id постов, подходящих под запрос, для filter(id__in=...)."""
+    return RawSQL(f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s',
+                  [match_query(query)])
+
+
+class SearchResults:
+    """
+    Результаты поиска для Paginator: число и срезы считаются в SQL,
+    посты упорядочены по релевантности (bm25) и несут post.snippet.
+    """
+    def __init__(self, query):
+        self.query = query
+        self.match = match_query(query)
+        self._count = None
+
+    def count(self):
+        if self._count is None:
+            self._count = self._get_count()
+        return self._count
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            raise TypeError('SearchResults поддерживает только срезы')
+        start, stop = index.start or 0, index.stop
+        if not self.match or stop is not None and stop <= start:
+            return []
+        if not is_available():
+            return self._fallback_page(start, stop)
+        limit = -1 if stop is None else stop - start
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT rowid, snippet({FTS_TABLE}, 0, %s, %s, '…', %s) "
+                f'FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s '
+                'ORDER BY rank, rowid DESC LIMIT %s OFFSET %s',
+                [MARK_START, MARK_END, SNIPPET_TOKENS, self.match,
+                 limit, start]
+            )
+            rows = cursor.fetchall()
+        posts = Post.objects.select_related('author', 'group').in_bulk(
+            [post_id for post_id, _ in rows]
+        )
+        page = []
+        for post_id, snippet in rows:
+            if post_id in posts:
+                post = posts[post_id]
+                post.snippet = highlight(snippet)
+                page.append(post)
+        return page
+
+    def _get_count(self):
+        if not self.match:
+            return 0
+        if not is_available():
+            return self._fallback().count()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT count(*) FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s',
+                [self.match]
+            )
+            return cursor.fetchone()[0]
+
+    def _fallback(self):
+        return Post.objects.filter(text__icontains=self.query).order_by(
+            *POST_ORDERING
+        )
+
+    def _fallback_page(self, start, stop):
+        page = list(self._fallback().select_related('author', 'group')[
+            start:stop
+        ])
+        for post in page:
+            post.snippet = escape(post.text)
+        return page
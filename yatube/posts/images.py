@@ -0,0 +1,42 @@
+"""
+Подготовка загруженных картинок к хранению.
+
+Картинка поворачивается по EXIF, уменьшается до IMAGE_MAX_SIDE по большей
+стороне и перекодируется в WebP без метаданных. Анимированные GIF
+сохраняются как есть: при перекодировании пропали бы кадры.
+"""
+import os
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+
+FORMAT = 'WEBP'
+EXTENSION = '.webp'
+
+
+def _prepare(image):
+    image = ImageOps.exif_transpose(image)
+    side = settings.IMAGE_MAX_SIDE
+    image.thumbnail((side, side), Image.LANCZOS)
+    if image.mode in ('RGB', 'RGBA'):
+        return image
+    if image.mode in ('LA', 'PA') or 'transparency' in image.info:
+        return image.convert('RGBA')
+    return image.convert('RGB')
+
+
+def ingest(upload):
+    """Возвращает (файл для сохранения, ширина, высота)."""
+    upload.seek(0)
+    with Image.open(upload) as image:
+        if getattr(image, 'is_animated', False):
+            upload.seek(0)
+            return upload, image.width, image.height
+        image = _prepare(image)
+        buffer = BytesIO()
+        # Без аргумента exif метаданные в новый файл не попадают
+        image.save(buffer, FORMAT, quality=settings.IMAGE_QUALITY)
+    name = os.path.splitext(os.path.basename(upload.name))[0] + EXTENSION
+    return ContentFile(buffer.getvalue(), name=name), image.width, image.height
@@ -0,0 +1,247 @@
+"""
+Нагрузочное тестирование по HTTP.
+
+Виртуальные пользователи в потоках выполняют взвешенные сценарии против
+сервера по адресу base_url: листают ленту, группы и профили, читают ленту
+подписок, комментируют и публикуют посты. Сервер можно поднять в этом же
+процессе (serve). Время каждого запроса записывается под именем маршрута
+из posts.urls и about.urls, по нему считаются перцентили.
+"""
+import math
+import random
+import re
+import threading
+import time
+from collections import defaultdict
+from html import unescape
+from http.cookiejar import CookieJar
+from socketserver import ThreadingMixIn
+from urllib.error import HTTPError, URLError
+from urllib.parse import quote, urlencode, urlsplit
+from urllib.request import (HTTPCookieProcessor, HTTPRedirectHandler,
+                            build_opener)
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer, make_server
+
+from django.urls import Resolver404, resolve
+
+CSRF_RE = re.compile(r'name="csrfmiddlewaretoken" value="([^"]+)"')
+NEXT_RE = re.compile(r'href="\?(after=[^"]+)"')
+PERCENTILES = (50, 95, 99)
+TIMEOUT = 30
+# Символы, которые не нужно кодировать в пути с параметрами
+SAFE = "/?&=%:"
+# Сколько страниц пролистывает сценарий, выбирается от 0 до PAGING_DEPTH
+PAGING_DEPTH = 3
+
+
+class ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
+    daemon_threads = True
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+def serve(application, host='127.0.0.1', port=0):
+    """Запускает WSGI-приложение в фоновом потоке; возвращает (сервер, url)."""
+    server = make_server(host, port, application,
+                         server_class=ThreadingWSGIServer,
+                         handler_class=QuietHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://{host}:{server.server_port}'
+
+
+def route_name(path):
+    try:
+        return resolve(urlsplit(path).path).view_name
+    except Resolver404:
+        return 'not_found'
+
+
+def percentile(values, rank):
+    """Перцентиль методом ближайшего ранга по отсортированному списку."""
+    if not values:
+        return 0.0
+    return values[max(math.ceil(rank / 100 * len(values)) - 1, 0)]
+
+
+class Recorder:
+    """Потокобезопасный сборщик времени ответов по маршрутам."""
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.samples = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.exceptions = 0
+
+    def add(self, name, seconds, status):
+        with self.lock:
+            self.samples[name].append(seconds)
+            if not 200 <= status < 400:
+                self.errors[name] += 1
+
+    def add_exception(self):
+        with self.lock:
+            self.exceptions += 1
+
+    def summary(self, elapsed):
+        routes = {}
+        for name, samples in sorted(self.samples.items()):
+            samples = sorted(samples)
+            route = {
+                'count': len(samples),
+                'errors': self.errors[name],
+                'rps': round(len(samples) / elapsed, 2),
+                'mean_ms': round(sum(samples) / len(samples) * 1000, 2),
+                'max_ms': round(samples[-1] * 1000, 2),
+            }
+            for rank in PERCENTILES:
+                route[f'p{rank}_ms'] = round(
+                    percentile(samples, rank) * 1000, 2
+                )
+            routes[name] = route
+        total = sum(route['count'] for route in routes.values())
+        return {
+            'elapsed': round(elapsed, 3),
+            'requests': total,
+            'errors': sum(self.errors.values()),
+            'exceptions': self.exceptions,
+            'rps': round(total / elapsed, 2),
+            'routes': routes,
+        }
+
+
+class _NoRedirect(HTTPRedirectHandler):
+    # Перенаправление — отдельный запрос, его время пишется отдельно
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class VirtualUser:
+    def __init__(self, base_url, recorder):
+        self.base_url = base_url.rstrip('/')
+        self.recorder = recorder
+        self.opener = build_opener(HTTPCookieProcessor(CookieJar()),
+                                   _NoRedirect)
+        self.logged_in = False
+
+    def request(self, path, data=None):
+        url = self.base_url + quote(path, safe=SAFE)
+        body = None if data is None else urlencode(data).encode()
+        started = time.perf_counter()
+        try:
+            with self.opener.open(url, body, timeout=TIMEOUT) as response:
+                status, html = response.status, response.read()
+        except HTTPError as error:
+            status, html = error.code, error.read()
+            error.close()
+        except (URLError, OSError):
+            status, html = 0, b''
+        self.recorder.add(route_name(path), time.perf_counter() - started,
+                          status)
+        return html.decode('utf-8', 'replace')
+
+    def post_form(self, form_path, action, data):
+        """Открывает страницу формы и отправляет её с токеном CSRF."""
+        match = CSRF_RE.search(self.request(form_path))
+        data['csrfmiddlewaretoken'] = match.group(1) if match else ''
+        return self.request(action, data)
+
+    def login(self, username, password):
+        self.post_form('/auth/login/', '/auth/login/',
+                       {'username': username, 'password': password})
+        self.logged_in = True
+
+    def browse(self, path, rng):
+        html = self.request(path)
+        for _ in range(rng.randint(0, PAGING_DEPTH)):
+            match = NEXT_RE.search(html)
+            if match is None:
+                break
+            html = self.request(f'{path}?{unescape(match.group(1))}')
+
+
+def browse_index(client, targets, rng):
+    client.browse('/', rng)
+
+
+def browse_group(client, targets, rng):
+    client.browse(f'/group/{rng.choice(targets["groups"])}/', rng)
+
+
+def browse_profile(client, targets, rng):
+    client.browse(f'/{rng.choice(targets["authors"])}/', rng)
+
+
+def read_follow_feed(client, targets, rng):
+    client.browse('/follow/', rng)
+
+
+def add_comment(client, targets, rng):
+    username, post_id = rng.choice(targets['posts'])
+    client.post_form(f'/{username}/{post_id}/',
+                     f'/{username}/{post_id}/comment',
+                     {'text': f'Нагрузочный комментарий {rng.random()}'})
+
+
+def publish_post(client, targets, rng):
+    client.post_form('/new/', '/new/',
+                     {'text': f'Нагрузочный пост {rng.random()}'})
+
+
+# Сценарий: (функция, нужен вход, списки целей, без которых он невозможен)
+SCENARIOS = {
+    'index': (browse_index, False, ()),
+    'group': (browse_group, False, ('groups',)),
+    'profile': (browse_profile, False, ('authors',)),
+    'follow': (read_follow_feed, True, ()),
+    'comment': (add_comment, True, ('posts',)),
+    'post': (publish_post, True, ()),
+}
+DEFAULT_WEIGHTS = {
+    'index': 40, 'group': 15, 'profile': 15,
+    'follow': 15, 'comment': 10, 'post': 5,
+}
+
+
+def run(base_url, targets, weights, concurrency, duration,
+        credentials=(), seed=0):
+    """
+    Гоняет сценарии в concurrency потоках duration секунд; возвращает
+    сводку Recorder.summary. Сценарии без нужных целей или учётных
+    записей пропускаются.
+    """
+    weights = {
+        name: weight for name, weight in weights.items()
+        if weight > 0 and all(targets.get(key) for key in SCENARIOS[name][2])
+        and (credentials or not SCENARIOS[name][1])
+    }
+    if not weights:
+        raise ValueError('Нет сценариев, которые можно выполнить')
+    names, chances = list(weights), list(weights.values())
+    recorder = Recorder()
+    deadline = time.monotonic() + duration
+
+    def worker(number):
+        rng = random.Random(f'{seed}:{number}')
+        client = VirtualUser(base_url, recorder)
+        while time.monotonic() < deadline:
+            name = rng.choices(names, chances)[0]
+            scenario, needs_login, _ = SCENARIOS[name]
+            try:
+                if needs_login and not client.logged_in:
+                    client.login(*credentials[number % len(credentials)])
+                scenario(client, targets, rng)
+            except Exception:
+                recorder.add_exception()
+
+    threads = [threading.Thread(target=worker, args=(number,))
+               for number in range(concurrency)]
+    started = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    summary = recorder.summary(time.monotonic() - started)
+    summary.update(concurrency=concurrency, weights=weights, seed=seed)
+    return summary
@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from posts import timeline
+from posts.models import FeedEntry, Follow, User
+
+
+class Command(BaseCommand):
+    help = 'Заполняет материализованные ленты подписок по таблице Follow'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user', dest='username',
+            help='Перестроить ленту только этого пользователя',
+        )
+        parser.add_argument(
+            '--clear', action='store_true',
+            help='Удалить существующие записи лент перед заполнением',
+        )
+
+    def handle(self, *args, **options):
+        user_id = None
+        entries = FeedEntry.objects.all()
+        if options['username']:
+            try:
+                user_id = User.objects.get(username=options['username']).id
+            except User.DoesNotExist:
+                raise CommandError('Нет пользователя '
+                                   f'{options["username"]}')
+            entries = entries.filter(user_id=user_id)
+        with transaction.atomic():
+            if options['clear']:
+                entries.delete()
+            created = timeline.backfill(user_id)
+        follows = Follow.objects.order_by()
+        if user_id is not None:
+            follows = follows.filter(user_id=user_id)
+        self.stdout.write(
+            f'Обработано подписок: {follows.count()}, '
+            f'записей лент: {created}'
+        )
@@ -0,0 +1,80 @@
+import random
+import time
+from collections import Counter
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.paginator import Paginator
+
+from posts import fulltext
+from posts.models import Post
+from posts.paginator import POST_ORDERING
+from posts.views import RECORD_COUNT
+
+# Из скольких постов берутся слова для запросов
+SAMPLE_POSTS = 200
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает время первой страницы поиска через FTS5 '
+            'и через icontains')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'queries', nargs='*',
+            help='Запросы; по умолчанию слова из случайных постов',
+        )
+        parser.add_argument('--count', type=int, default=10,
+                            help='Сколько запросов выбрать из постов')
+        parser.add_argument('--repeat', type=int, default=5,
+                            help='Повторов каждого запроса')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        if not fulltext.is_available():
+            raise CommandError('Полнотекстовый индекс есть только в SQLite')
+        queries = options['queries'] or self.sample_queries(
+            options['count'], random.Random(options['seed'])
+        )
+        if not queries:
+            raise CommandError('Нет постов, из которых можно взять запросы')
+        searches = {
+            'fts5': lambda query: fulltext.SearchResults(query),
+            'icontains': lambda query: Post.objects.filter(
+                text__icontains=query
+            ).select_related('author', 'group').order_by(*POST_ORDERING),
+        }
+        totals = {}
+        for name, search in searches.items():
+            started = time.perf_counter()
+            for query in queries:
+                for _ in range(options['repeat']):
+                    page = Paginator(search(query), RECORD_COUNT).page(1)
+                    list(page)
+            elapsed = time.perf_counter() - started
+            totals[name] = elapsed / (len(queries) * options['repeat'])
+            self.stdout.write(f'{name}: {totals[name] * 1000:.2f} мс '
+                              'на запрос')
+        self.stdout.write(self.conclusion(totals))
+
+    def conclusion(self, totals):
+        """Вывод по измеренным временам, а не заранее известный."""
+        fast, slow = sorted(totals, key=totals.get)
+        if not totals[fast] or totals[slow] / totals[fast] < 1.05:
+            return 'fts5 и icontains работают одинаково быстро'
+        ratio = totals[slow] / totals[fast]
+        return f'{fast} быстрее {slow} в {ratio:.1f} раза'
+
+    def sample_queries(self, count, rng):
+        # Выборка из упорядоченных id зависит только от --seed
+        ids = list(Post.objects.order_by('pk').values_list('pk', flat=True))
+        texts = Post.objects.filter(
+            pk__in=rng.sample(ids, min(SAMPLE_POSTS, len(ids)))
+        ).order_by('pk').values_list('text', flat=True)
+        words = Counter()
+        for text in texts:
+            words.update(
+                word for word in fulltext.WORD_RE.findall(text.lower())
+                if len(word) > 3
+            )
+        common = [word for word, _ in words.most_common(count * 5)]
+        return rng.sample(common, min(count, len(common)))
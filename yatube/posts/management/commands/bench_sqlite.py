@@ -0,0 +1,119 @@
+import random
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection, transaction
+from django.test.utils import override_settings
+
+from posts import loadtest, pragmas
+from posts.models import Comment, Post, User
+from posts.views import RECORD_COUNT, get_comment_page, index_posts
+
+BENCH_TEXT = 'bench_sqlite'
+
+
+class Command(BaseCommand):
+    help = ('Смешанная нагрузка чтения и записи на SQLite в нескольких '
+            'потоках: без настройки (PRAGMA по умолчанию, BEGIN DEFERRED, '
+            'соединение на каждую операцию) и с SQLITE_PRAGMAS, '
+            'SQLITE_BEGIN и постоянным соединением. Запись идёт как в '
+            'представлениях: чтение и запись в одной транзакции. '
+            'Комментарии, созданные тестом, удаляются')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--duration', type=float, default=5,
+                            help='Секунд на каждый режим')
+        parser.add_argument('--writes', type=float, default=0.2,
+                            help='Доля операций записи')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite' or \
+                connection.is_in_memory_db():
+            raise CommandError('Нужна база SQLite в файле')
+        post_ids = list(Post.objects.values_list('id', flat=True)[:1000])
+        user_ids = list(User.objects.values_list('id', flat=True)[:100])
+        if not post_ids:
+            raise CommandError('Нет постов, к которым писать комментарии')
+        modes = {
+            'default': (pragmas.SQLITE_DEFAULTS,
+                        pragmas.SQLITE_DEFAULT_BEGIN, False),
+            'tuned': (settings.SQLITE_PRAGMAS, settings.SQLITE_BEGIN, True),
+        }
+        try:
+            for name, (values, begin, persistent) in modes.items():
+                # Режим журнала меняется, только когда база не занята
+                connection.close()
+                with override_settings(SQLITE_PRAGMAS=values,
+                                       SQLITE_BEGIN=begin):
+                    summary = self.run(post_ids, user_ids, persistent,
+                                       options)
+                self.print_summary(name, summary)
+        finally:
+            connection.close()
+            Comment.objects.filter(text=BENCH_TEXT).delete()
+
+    def run(self, post_ids, user_ids, persistent, options):
+        recorder = loadtest.Recorder()
+        deadline = time.perf_counter() + options['duration']
+        threads = [
+            threading.Thread(target=self.work, args=(
+                recorder, deadline, random.Random(options['seed'] + number),
+                post_ids, user_ids, persistent, options['writes'],
+            ))
+            for number in range(options['threads'])
+        ]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return recorder.summary(time.perf_counter() - started)
+
+    def work(self, recorder, deadline, rng, post_ids, user_ids, persistent,
+             writes):
+        try:
+            while time.perf_counter() < deadline:
+                name = 'write' if rng.random() < writes else 'read'
+                started = time.perf_counter()
+                status = 200
+                try:
+                    if name == 'write':
+                        self.write(rng, post_ids, user_ids)
+                    else:
+                        list(index_posts()[:RECORD_COUNT])
+                        post = Post.objects.get(pk=rng.choice(post_ids))
+                        list(get_comment_page(post))
+                except OperationalError:
+                    # «database is locked» после истечения busy_timeout
+                    status = 500
+                recorder.add(name, time.perf_counter() - started, status)
+                if not persistent:
+                    connection.close()
+        finally:
+            connection.close()
+
+    def write(self, rng, post_ids, user_ids):
+        # Как add_comment: пост читается в той же транзакции, что и запись
+        with transaction.atomic():
+            post = Post.objects.select_related('author').get(
+                pk=rng.choice(post_ids)
+            )
+            Comment.objects.create(post=post,
+                                   author_id=rng.choice(user_ids),
+                                   text=BENCH_TEXT)
+
+    def print_summary(self, name, summary):
+        self.stdout.write(
+            f"{name}: {summary['rps']} операций в секунду, "
+            f"ошибок: {summary['errors']}"
+        )
+        for operation, route in summary['routes'].items():
+            self.stdout.write(
+                f"  {operation:<6}{route['rps']:>10} в секунду"
+                + ''.join(f"{f'p{rank}':>6} {route[f'p{rank}_ms']} мс"
+                          for rank in loadtest.PERCENTILES)
+            )
@@ -0,0 +1,83 @@
+import time
+
+from django.apps import apps
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import DEFAULT_DB_ALIAS, IntegrityError, connections
+
+from posts import bulkload
+
+
+class Command(BaseCommand):
+    help = ('Потоково загружает дамп (JSON-массив фикстуры или NDJSON) '
+            'пользователей, групп, постов, комментариев и подписок')
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='+',
+                            help='Файлы дампа; .gz распаковывается, '
+                                 '- читает стандартный ввод')
+        parser.add_argument('--batch-size', type=int, default=5000,
+                            help='Объектов в одной транзакции')
+        parser.add_argument('--ignore-conflicts', action='store_true',
+                            help='Пропускать строки, которые уже есть в БД')
+        parser.add_argument('--skip-derived', action='store_true',
+                            help='Не пересчитывать счётчики и ленты')
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **options):
+        using = options['database']
+        loader = bulkload.BulkLoader(options['batch_size'],
+                                     options['ignore_conflicts'], using)
+        connection = connections[using]
+        self.started = self.reported = time.monotonic()
+        # Как и loaddata, проверяем внешние ключи один раз в конце:
+        # комментарий может встретиться в дампе раньше своего поста
+        with connection.constraint_checks_disabled():
+            models = [apps.get_model(label) for label in bulkload.MODELS]
+            with bulkload.raw_dates(*models):
+                for path in options['paths']:
+                    self.load(path, loader)
+                loader.flush()
+        tables = [model._meta.db_table for model in loader.models]
+        try:
+            connection.check_constraints(table_names=tables)
+        except IntegrityError as error:
+            raise CommandError(f'Дамп нарушает внешние ключи: {error}')
+        self.reset_sequences(connection, loader.models)
+        self.report(loader, final=True)
+        if options['skip_derived']:
+            cache.clear()
+        else:
+            bulkload.refresh_derived(self.stdout)
+
+    def load(self, path, loader):
+        try:
+            dump = bulkload.open_dump(path)
+        except OSError as error:
+            raise CommandError(f'Не удалось открыть {path}: {error}')
+        with dump as stream:
+            for data in bulkload.iter_objects(stream):
+                loader.add(data)
+                if loader.size == 0:
+                    self.report(loader)
+
+    def report(self, loader, final=False):
+        now = time.monotonic()
+        if not final and now - self.reported < 1:
+            return
+        self.reported = now
+        total = sum(loader.loaded.values())
+        rate = total / max(now - self.started, 1e-6)
+        self.stdout.write(f'Загружено объектов: {total}, {rate:.0f} в секунду')
+        if final:
+            for label, count in sorted(loader.loaded.items()):
+                self.stdout.write(f'  {label}: {count}')
+            for label, count in sorted(loader.skipped.items()):
+                self.stdout.write(f'  пропущено {label}: {count}')
+
+    def reset_sequences(self, connection, models):
+        statements = connection.ops.sequence_reset_sql(no_style(), models)
+        with connection.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(sql)
@@ -0,0 +1,59 @@
+import time
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import bulkload, dataset
+
+
+class Command(BaseCommand):
+    help = ('Создаёт детерминированный синтетический набор данных: '
+            'пользователей, группы, посты, комментарии и подписки')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size', choices=dataset.SIZES, default='small',
+                            help='Готовый размер набора')
+        for name in ('users', 'groups', 'posts', 'comments'):
+            parser.add_argument(f'--{name}', type=int,
+                                help='Заменяет число из --size')
+        parser.add_argument('--follows', type=int,
+                            help='Среднее число подписок пользователя')
+        parser.add_argument('--images', type=float, default=0.1,
+                            help='Доля постов со ссылкой на картинку')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--prefix', default='gen',
+                            help='Начало имён пользователей и адресов групп')
+        parser.add_argument('--batch-size', type=int,
+                            default=dataset.BATCH_SIZE)
+        parser.add_argument('--skip-derived', action='store_true',
+                            help='Не пересчитывать счётчики и ленты')
+
+    def handle(self, *args, **options):
+        sizes = dict(dataset.SIZES[options['size']])
+        for name in sizes:
+            if options[name] is not None:
+                sizes[name] = options[name]
+        if sizes['users'] < 1:
+            raise CommandError('Нужен хотя бы один пользователь')
+        self.started = self.reported = time.monotonic()
+        builder = dataset.DatasetBuilder(
+            seed=options['seed'], images=options['images'],
+            prefix=options['prefix'], batch_size=options['batch_size'],
+            progress=self.report, **sizes
+        )
+        created = builder.build()
+        elapsed = time.monotonic() - self.started
+        self.stdout.write(
+            f'Создано за {elapsed:.1f} с: '
+            + ', '.join(f'{label} {count}' for label, count in created.items())
+        )
+        if options['skip_derived']:
+            cache.clear()
+        else:
+            bulkload.refresh_derived(self.stdout)
+
+    def report(self, label, count):
+        now = time.monotonic()
+        if now - self.reported >= 1:
+            self.reported = now
+            self.stdout.write(f'{label}: {count}')
@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from posts import caching, images, thumbnails
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = ('Перекодирует картинки постов, загруженные до появления '
+            'обработки, и записывает их размеры')
+
+    def handle(self, *args, **options):
+        posts = Post.objects.exclude(image='').exclude(image=None).filter(
+            image_size=None
+        ).select_related('author', 'group')
+        done = failed = 0
+        for post in posts.iterator():
+            try:
+                self.ingest(post)
+            except Exception as error:
+                failed += 1
+                self.stderr.write(f'Пост {post.id}: {error}')
+            else:
+                done += 1
+        self.stdout.write(f'Обработано картинок: {done}, ошибок: {failed}')
+
+    def ingest(self, post):
+        original = post.image.name
+        with post.image.open('rb'):
+            content, width, height = images.ingest(post.image)
+            if content is not post.image:
+                post.image.save(content.name, content, save=False)
+        Post.objects.filter(pk=post.pk).update(
+            image=post.image.name, image_width=width, image_height=height,
+            image_size=post.image.size, thumbnail='', updated=timezone.now()
+        )
+        if post.image.name != original:
+            post.image.storage.delete(original)
+        caching.bump(*caching.post_scopes(post))
+        thumbnails.generate(post.pk)
@@ -0,0 +1,149 @@
+import json
+import os
+import random
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import loadtest
+from posts.models import Follow, Group, Post, User
+
+LOGIN_PREFIX = 'loadtest'
+FOLLOWS_PER_USER = 10
+PASSWORD_ENV = 'LOADTEST_PASSWORD'
+
+
+class Command(BaseCommand):
+    help = ('Нагрузочный тест: взвешенные сценарии в нескольких потоках, '
+            'перцентили времени ответа по маршрутам. Учётные записи, '
+            'созданные тестом, удаляются вместе с их постами и '
+            'комментариями, если не указан --keep-users')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--url',
+            help='Адрес запущенного сервера с той же базой данных; '
+                 'по умолчанию yatube.wsgi поднимается в этом процессе',
+        )
+        parser.add_argument('--concurrency', type=int, default=8)
+        parser.add_argument('--duration', type=float, default=10,
+                            help='Длительность в секундах')
+        parser.add_argument(
+            '--weights',
+            help='Веса сценариев, например index=5,comment=0; сценарии: '
+                 + ', '.join(loadtest.SCENARIOS),
+        )
+        parser.add_argument('--users', type=int, default=8,
+                            help='Учётных записей для сценариев со входом')
+        parser.add_argument(
+            '--password', default=os.environ.get(PASSWORD_ENV),
+            help='Пароль учётных записей loadtestN; по умолчанию из '
+                 f'переменной окружения {PASSWORD_ENV}',
+        )
+        parser.add_argument('--keep-users', action='store_true',
+                            help='Не удалять созданные учётные записи')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', help='Файл для сводки в JSON')
+
+    def handle(self, *args, **options):
+        weights = self.parse_weights(options['weights'])
+        if not options['password']:
+            raise CommandError(f'Укажите --password или {PASSWORD_ENV}: '
+                               'учётные записи создаются в той же базе, '
+                               'что и у сайта')
+        rng = random.Random(options['seed'])
+        credentials, created = self.prepare_users(options['users'],
+                                                  options['password'], rng)
+        try:
+            self.run_scenarios(options, weights, credentials)
+        finally:
+            if not options['keep_users']:
+                User.objects.filter(pk__in=created).delete()
+
+    def run_scenarios(self, options, weights, credentials):
+        targets = self.collect_targets()
+        if settings.DEBUG:
+            self.stderr.write('DEBUG включён: панель отладки и журнал SQL '
+                              'искажают результаты')
+        server = None
+        base_url = options['url']
+        if not base_url:
+            from yatube.wsgi import application
+            server, base_url = loadtest.serve(application)
+        try:
+            summary = loadtest.run(
+                base_url, targets, weights, options['concurrency'],
+                options['duration'], credentials, options['seed'],
+            )
+        except ValueError as error:
+            raise CommandError(error)
+        finally:
+            if server is not None:
+                server.shutdown()
+        summary['url'] = options['url'] or 'in-process'
+        self.print_summary(summary)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as output:
+                json.dump(summary, output, ensure_ascii=False, indent=2)
+
+    def parse_weights(self, value):
+        weights = dict(loadtest.DEFAULT_WEIGHTS)
+        for item in filter(None, (value or '').split(',')):
+            name, _, weight = item.partition('=')
+            if name not in loadtest.SCENARIOS or not weight.isdigit():
+                raise CommandError(f'Неверный вес сценария: {item}')
+            weights[name] = int(weight)
+        return weights
+
+    def prepare_users(self, count, password, rng):
+        """
+        Учётные записи loadtestN с подписками на случайных авторов:
+        (имена и пароли, id созданных записей).
+        """
+        authors = list(
+            User.objects.filter(posts__isnull=False).exclude(
+                username__startswith=LOGIN_PREFIX
+            ).values_list('id', flat=True).distinct()[:1000]
+        )
+        credentials, created_ids = [], []
+        for number in range(count):
+            username = f'{LOGIN_PREFIX}{number}'
+            user, created = User.objects.get_or_create(username=username)
+            if created or not user.check_password(password):
+                user.set_password(password)
+                user.save()
+            if created:
+                created_ids.append(user.pk)
+                for author_id in rng.sample(
+                    authors, min(FOLLOWS_PER_USER, len(authors))
+                ):
+                    Follow.objects.create(user=user, author_id=author_id)
+            credentials.append((username, password))
+        return credentials, created_ids
+
+    def collect_targets(self):
+        posts = list(Post.objects.order_by('-pub_date', '-id').values_list(
+            'author__username', 'id'
+        )[:500])
+        return {
+            'groups': list(Group.objects.values_list('slug', flat=True)[:100]),
+            'authors': sorted({username for username, _ in posts}),
+            'posts': list(posts),
+        }
+
+    def print_summary(self, summary):
+        self.stdout.write(
+            f"Запросов: {summary['requests']} за {summary['elapsed']} с, "
+            f"{summary['rps']} в секунду, ошибок: {summary['errors']}, "
+            f"исключений в сценариях: {summary['exceptions']}"
+        )
+        header = f"{'маршрут':<22}{'число':>8}{'ошибки':>8}" + ''.join(
+            f'{f"p{rank}, мс":>11}' for rank in loadtest.PERCENTILES
+        )
+        self.stdout.write(header)
+        for name, route in summary['routes'].items():
+            self.stdout.write(
+                f"{name:<22}{route['count']:>8}{route['errors']:>8}"
+                + ''.join(f"{route[f'p{rank}_ms']:>11}"
+                          for rank in loadtest.PERCENTILES)
+            )
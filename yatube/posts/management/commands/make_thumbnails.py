@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from posts import thumbnails
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = 'Создаёт миниатюры картинок постов, у которых их ещё нет'
+
+    def handle(self, *args, **options):
+        posts = Post.objects.exclude(image='').exclude(image=None).filter(
+            thumbnail=''
+        )
+        done = failed = 0
+        for post_id in posts.values_list('id', flat=True).iterator():
+            try:
+                thumbnails.generate(post_id)
+            except Exception as error:
+                failed += 1
+                self.stderr.write(f'Пост {post_id}: {error}')
+            else:
+                done += 1
+        self.stdout.write(f'Создано миниатюр: {done}, ошибок: {failed}')
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from posts import fulltext
+
+
+class Command(BaseCommand):
+    help = ('Пересоздаёт полнотекстовый индекс постов и его триггеры '
+            '(migrate делает это сам, если триггеры пропали)')
+
+    def handle(self, *args, **options):
+        if not fulltext.is_available():
+            raise CommandError('Полнотекстовый индекс есть только в SQLite')
+        with transaction.atomic():
+            fulltext.create_index()
+        self.stdout.write('Поисковый индекс пересоздан')
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts import counters
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает счётчики комментариев, постов и подписок'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            posts = counters.recount_posts()
+            users = counters.recount_users()
+        self.stdout.write(
+            f'Пересчитано постов: {posts}, пользователей: {users}'
+        )
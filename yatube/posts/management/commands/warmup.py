@@ -0,0 +1,89 @@
+import ipaddress
+import time
+from html import unescape
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+from django.test import Client
+from django.urls import reverse
+
+from posts import loadtest, warmup
+from posts.models import Group, User
+
+
+class Command(BaseCommand):
+    help = ('Заполняет кэш после развёртывания: компилирует шаблоны и '
+            'запрашивает первые страницы ленты, самых больших групп и '
+            'профилей самых популярных авторов, как анонимный посетитель')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pages', type=int, default=3,
+                            help='Сколько страниц общей ленты')
+        parser.add_argument('--groups', type=int, default=5)
+        parser.add_argument('--profiles', type=int, default=5)
+        parser.add_argument(
+            '--host', default=self.default_host(),
+            help=('Имя сайта: адрес страницы входит в ключ кэша. '
+                  'По умолчанию первое доменное имя из ALLOWED_HOSTS'),
+        )
+        parser.add_argument('--secure', action='store_true',
+                            help='Сайт открывают по HTTPS')
+
+    def default_host(self):
+        """Имя рабочего сайта: без масок, IP-адресов и localhost."""
+        for host in settings.ALLOWED_HOSTS:
+            if host.startswith(('.', '*')) or host == 'localhost':
+                continue
+            try:
+                ipaddress.ip_address(host.strip('[]'))
+            except ValueError:
+                return host
+        return None
+
+    def handle(self, *args, **options):
+        if not options['host']:
+            raise CommandError('В ALLOWED_HOSTS нет имени сайта: '
+                               'укажите --host')
+        started = time.perf_counter()
+        warmup.preload()
+        client = Client(HTTP_HOST=options['host'])
+        urls = list(self.pages(client, options))
+        for url in self.urls(options):
+            self.fetch(client, url, options['secure'])
+            urls.append(url)
+        self.stdout.write(f'Прогрето страниц: {len(urls)} за '
+                          f'{time.perf_counter() - started:.1f} с')
+
+    def fetch(self, client, url, secure):
+        started = time.perf_counter()
+        response = client.get(url, secure=secure)
+        elapsed = (time.perf_counter() - started) * 1000
+        self.stdout.write(f'{response.status_code} {elapsed:8.1f} мс  {url}')
+        if response.status_code != 200:
+            raise CommandError(f'Страница {url} ответила '
+                               f'{response.status_code}: проверьте --host')
+        return response
+
+    def pages(self, client, options):
+        """Страницы общей ленты по ссылкам «дальше»."""
+        url = reverse('index')
+        for _ in range(options['pages']):
+            response = self.fetch(client, url, options['secure'])
+            yield url
+            found = loadtest.NEXT_RE.search(response.content.decode())
+            if not found:
+                break
+            url = f"{reverse('index')}?{unescape(found.group(1))}"
+
+    def urls(self, options):
+        groups = Group.objects.annotate(
+            posts_total=Count('posts')
+        ).order_by('-posts_total', 'id').values_list('slug', flat=True)
+        for slug in groups[:options['groups']]:
+            yield reverse('group_posts', args=[slug])
+        authors = User.objects.filter(stats__posts_count__gt=0).order_by(
+            '-stats__followers_count', '-stats__posts_count', 'id'
+        ).values_list('username', flat=True)
+        for username in authors[:options['profiles']]:
+            yield reverse('profile', args=[username])
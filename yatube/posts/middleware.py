@@ -0,0 +1,172 @@
+"""
+Замеры времени запроса: заголовок Server-Timing и строка журнала в JSON.
+
+Замеряется доля SERVER_TIMING_SAMPLE_RATE запросов: число и время SQL,
+время рендеринга шаблонов, попадания и промахи кэша, время представления;
+в журнал также пишется доля попаданий по уровням двухуровневого кэша.
+Ничего не подменяется на уровне классов: на время замеренного запроса
+кэш default в текущем потоке заменяется считающей обёрткой
+(counted_cache), а время шаблонов считает бэкенд шаблонов
+posts.template_backends. Остальные запросы проходят без накладных
+расходов, кроме проверки, идёт ли замер.
+"""
+import json
+import logging
+import random
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, cache, caches
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+_local = threading.local()
+_MISSING = object()
+
+
+class RequestStats:
+    def __init__(self):
+        self.view_started = None
+        self.view = 0.0
+        self.sql = 0.0
+        self.queries = 0
+        self.template = 0.0
+        self.hits = 0
+        self.misses = 0
+        # Вложенные шаблоны ({% include %}) и get внутри get_many
+        # не должны считаться дважды
+        self.depth = {'template': 0, 'cache': 0}
+
+    def __call__(self, execute, sql, params, many, context):
+        # execute_wrapper для всех соединений с БД
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql += time.perf_counter() - started
+            self.queries += 1
+
+    def header(self):
+        return ', '.join((
+            f'sql;dur={self.sql * 1000:.1f};desc="{self.queries} queries"',
+            f'tpl;dur={self.template * 1000:.1f}',
+            f'cache;desc="{self.hits} hits, {self.misses} misses"',
+            f'view;dur={self.view * 1000:.1f}',
+        ))
+
+    def as_dict(self):
+        return {
+            'view_ms': round(self.view * 1000, 2),
+            'sql_ms': round(self.sql * 1000, 2),
+            'sql_count': self.queries,
+            'template_ms': round(self.template * 1000, 2),
+            'cache_hits': self.hits,
+            'cache_misses': self.misses,
+        }
+
+
+def current():
+    """Замер текущего запроса или None, если запрос не попал в выборку."""
+    return getattr(_local, 'stats', None)
+
+
+@contextmanager
+def timing_template():
+    """Время рендеринга шаблона идёт в замер текущего запроса."""
+    stats = current()
+    if stats is None or stats.depth['template']:
+        yield
+        return
+    stats.depth['template'] += 1
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        stats.template += time.perf_counter() - started
+        stats.depth['template'] -= 1
+
+
+class CountedCache:
+    """Кэш, который считает попадания и промахи get и get_many."""
+    def __init__(self, cache, stats):
+        self.cache = cache
+        self.stats = stats
+
+    def __getattr__(self, name):
+        return getattr(self.cache, name)
+
+    def get(self, key, default=None, version=None):
+        value = self.cache.get(key, _MISSING, version)
+        if value is _MISSING:
+            self.stats.misses += 1
+            return default
+        self.stats.hits += 1
+        return value
+
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        found = self.cache.get_many(keys, version)
+        self.stats.hits += len(found)
+        self.stats.misses += len(keys) - len(found)
+        return found
+
+
+@contextmanager
+def counted_cache(stats):
+    """
+    Кэш default считает чтения только в этом потоке и только внутри блока:
+    экземпляры кэшей у CacheHandler свои в каждом потоке.
+    """
+    original = caches[DEFAULT_CACHE_ALIAS]
+    caches._caches.caches[DEFAULT_CACHE_ALIAS] = CountedCache(original,
+                                                              stats)
+    try:
+        yield
+    finally:
+        caches._caches.caches[DEFAULT_CACHE_ALIAS] = original
+
+
+class ServerTimingMiddleware:
+    """
+    Ставится последним в MIDDLEWARE, чтобы время представления
+    не включало работу остальных middleware.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if random.random() >= settings.SERVER_TIMING_SAMPLE_RATE:
+            return self.get_response(request)
+        stats = _local.stats = RequestStats()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(stats))
+                stack.enter_context(counted_cache(stats))
+                response = self.get_response(request)
+                if stats.view_started is not None:
+                    stats.view = time.perf_counter() - stats.view_started
+        finally:
+            _local.stats = None
+        response['Server-Timing'] = stats.header()
+        match = request.resolver_match
+        record = {
+            'route': match.view_name if match else None,
+            'method': request.method,
+            'status': response.status_code,
+            **stats.as_dict(),
+        }
+        tier_stats = getattr(cache, 'tier_stats', None)
+        if tier_stats is not None:
+            # Попадания по уровням кэша за всё время работы процесса
+            record['cache_tiers'] = tier_stats()
+        logger.info(json.dumps(record))
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        stats = current()
+        if stats is not None:
+            stats.view_started = time.perf_counter()
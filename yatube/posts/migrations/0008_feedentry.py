@@ -0,0 +1,48 @@
+# Generated by Django 2.2.6 on 2026-10-18 08:46
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def fill_feeds(apps, schema_editor):
+    # Ленты существующих подписчиков, иначе после выката они пусты
+    FeedEntry = apps.get_model('posts', 'FeedEntry')
+    Follow = apps.get_model('posts', 'Follow')
+    Post = apps.get_model('posts', 'Post')
+    # DISTINCT: до 0014 одна подписка могла храниться несколько раз
+    schema_editor.execute(f"""
+        INSERT INTO {FeedEntry._meta.db_table} (user_id, post_id, pub_date)
+        SELECT DISTINCT follow.user_id, post.id, post.pub_date
+        FROM {Follow._meta.db_table} follow
+        JOIN {Post._meta.db_table} post ON post.author_id = follow.author_id
+    """)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0007_auto_20210613_2131'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeedEntry',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('pub_date', models.DateTimeField()),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='feed_entries', to='posts.Post')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='feed_entries', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='feedentry',
+            index=models.Index(fields=['user', '-pub_date', '-post'], name='feed_user_pub_date_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='feedentry',
+            constraint=models.UniqueConstraint(fields=('user', 'post'), name='unique_feed_entry'),
+        ),
+        migrations.RunPython(fill_feeds, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,68 @@
+# Generated by Django 2.2.6 on 2026-10-18 08:49
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+BATCH_SIZE = 500
+
+
+def count_by(queryset, field):
+    """{значение field: число строк} одним запросом с GROUP BY."""
+    return dict(queryset.order_by().values_list(field).annotate(
+        models.Count('pk')
+    ))
+
+
+def fill_counters(apps, schema_editor):
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split('.'))
+    Follow = apps.get_model('posts', 'Follow')
+    Post = apps.get_model('posts', 'Post')
+    UserStats = apps.get_model('posts', 'UserStats')
+    # Посты без комментариев уже получили 0 по умолчанию
+    posts = list(Post.objects.only('pk').annotate(
+        total=models.Count('comments')
+    ).filter(total__gt=0))
+    for post in posts:
+        post.comment_count = post.total
+    Post.objects.bulk_update(posts, ['comment_count'],
+                             batch_size=BATCH_SIZE)
+    posts_count = count_by(Post.objects, 'author_id')
+    follows_count = count_by(Follow.objects, 'user_id')
+    followers_count = count_by(Follow.objects, 'author_id')
+    UserStats.objects.bulk_create([
+        UserStats(
+            user_id=user_id,
+            posts_count=posts_count.get(user_id, 0),
+            follows_count=follows_count.get(user_id, 0),
+            followers_count=followers_count.get(user_id, 0),
+        )
+        for user_id in User.objects.values_list('pk', flat=True).iterator()
+    ], batch_size=BATCH_SIZE)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0008_feedentry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('posts_count', models.PositiveIntegerField(default=0, verbose_name='Posts')),
+                ('follows_count', models.PositiveIntegerField(default=0, verbose_name='Follows')),
+                ('followers_count', models.PositiveIntegerField(default=0, verbose_name='Followers')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Comments'),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
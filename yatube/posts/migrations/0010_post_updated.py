@@ -0,0 +1,20 @@
+# Generated by Django 2.2.6 on 2026-10-18 09:10
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0009_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='updated',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now, verbose_name='Last modified'),
+            preserve_default=False,
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 2.2.6 on 2026-10-18 13:30
+
+from django.db import migrations
+
+# Схема на момент миграции: posts.fulltext может измениться позже
+FTS_TABLE = 'posts_post_fts'
+NORMALIZED_TEXT = "replace(replace({}.text, 'ё', 'е'), 'Ё', 'Е')"
+SCHEMA = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    "text, tokenize='unicode61 remove_diacritics 2')",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON posts_post "
+    f"BEGIN INSERT INTO {FTS_TABLE}(rowid, text) "
+    f"VALUES (new.id, {NORMALIZED_TEXT.format('new')}); END",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON posts_post "
+    f"BEGIN DELETE FROM {FTS_TABLE} WHERE rowid = old.id; END",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au "
+    "AFTER UPDATE OF text ON posts_post "
+    f"BEGIN UPDATE {FTS_TABLE} SET text = {NORMALIZED_TEXT.format('new')} "
+    "WHERE rowid = new.id; END",
+    f'DELETE FROM {FTS_TABLE}',
+    f"INSERT INTO {FTS_TABLE}(rowid, text) "
+    f"SELECT id, {NORMALIZED_TEXT.format('posts_post')} FROM posts_post",
+)
+DROP_SCHEMA = (
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_ai',
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_ad',
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_au',
+    f'DROP TABLE IF EXISTS {FTS_TABLE}',
+)
+
+
+def create_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        for statement in SCHEMA:
+            schema_editor.execute(statement)
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        for statement in DROP_SCHEMA:
+            schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0012_image_metadata'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
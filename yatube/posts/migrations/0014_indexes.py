@@ -0,0 +1,82 @@
+# Generated by Django 2.2.6 on 2026-10-18 14:10
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def remove_duplicate_follows(apps, schema_editor):
+    # Без ограничения одна подписка могла сохраниться несколько раз
+    Follow = apps.get_model('posts', 'Follow')
+    duplicates = list(Follow.objects.order_by().values(
+        'user_id', 'author_id'
+    ).annotate(first=Min('id'), total=Count('id')).filter(total__gt=1))
+    for row in duplicates:
+        Follow.objects.filter(
+            user_id=row['user_id'], author_id=row['author_id']
+        ).exclude(id=row['first']).delete()
+    recount_follows(apps, duplicates)
+
+
+def recount_follows(apps, duplicates):
+    """
+    Счётчики подписок учитывали дубли, а удаление дубля сигналом могло
+    убрать посты автора из ленты при оставшейся подписке.
+    """
+    Follow = apps.get_model('posts', 'Follow')
+    FeedEntry = apps.get_model('posts', 'FeedEntry')
+    Post = apps.get_model('posts', 'Post')
+    UserStats = apps.get_model('posts', 'UserStats')
+    for field, counted in (('user_id', 'follows_count'),
+                           ('author_id', 'followers_count')):
+        totals = Follow.objects.filter(**{
+            f'{field}__in': {row[field] for row in duplicates}
+        }).order_by().values_list(field).annotate(Count('id'))
+        for user_id, total in totals:
+            UserStats.objects.filter(user_id=user_id).update(
+                **{counted: total}
+            )
+    # Посты авторов с большим числом подписчиков в ленты не раскладываются
+    fan_out = set(UserStats.objects.filter(
+        user_id__in={row['author_id'] for row in duplicates},
+        followers_count__lt=settings.TIMELINE_FANOUT_LIMIT,
+    ).values_list('user_id', flat=True))
+    for row in duplicates:
+        if row['author_id'] not in fan_out:
+            continue
+        posts = Post.objects.filter(
+            author_id=row['author_id']
+        ).values_list('id', 'pub_date')
+        FeedEntry.objects.bulk_create([
+            FeedEntry(user_id=row['user_id'], post_id=post_id,
+                      pub_date=pub_date)
+            for post_id, pub_date in posts.iterator()
+        ], batch_size=500, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0013_post_fulltext'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['post', '-created', '-id'], name='comment_post_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['group', '-pub_date', '-id'], name='post_group_pub_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['author', '-pub_date', '-id'], name='post_author_pub_date_idx'),
+        ),
+        migrations.RunPython(remove_duplicate_follows,
+                             migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='follow',
+            constraint=models.UniqueConstraint(fields=('user', 'author'), name='unique_followings'),
+        ),
+    ]
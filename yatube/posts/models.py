@@ -1,4 +1,5 @@
 from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
 from django.db import models
 
 User = get_user_model()
@@ -26,12 +27,34 @@ class Post(models.Model):
                               on_delete=models.SET_NULL,
                               blank=True, null=True, related_name='posts')
     image = models.ImageField(upload_to='posts/', blank=True, null=True)
+    image_width = models.PositiveIntegerField("Image width", null=True,
+                                              blank=True, editable=False)
+    image_height = models.PositiveIntegerField("Image height", null=True,
+                                               blank=True, editable=False)
+    image_size = models.PositiveIntegerField("Image size, bytes", null=True,
+                                             blank=True, editable=False)
+    thumbnail = models.CharField("Thumbnail", max_length=255, blank=True,
+                                 editable=False)
+    comment_count = models.PositiveIntegerField("Comments", default=0)
+    updated = models.DateTimeField("Last modified", auto_now=True)
 
     def __str__(self):
         return self.text[:15]
 
+    @property
+    def thumbnail_url(self):
+        return default_storage.url(self.thumbnail)
+
     class Meta():
         ordering = ['-pub_date']
+        # Ленты группы и автора: отбор по внешнему ключу и сортировка
+        # POST_ORDERING читаются одним диапазоном индекса
+        indexes = [
+            models.Index(fields=['group', '-pub_date', '-id'],
+                         name='post_group_pub_date_idx'),
+            models.Index(fields=['author', '-pub_date', '-id'],
+                         name='post_author_pub_date_idx'),
+        ]
 
 
 class Comment(models.Model):
@@ -44,6 +67,10 @@ class Comment(models.Model):
 
     class Meta():
         ordering = ['-created']
+        indexes = [
+            models.Index(fields=['post', '-created', '-id'],
+                         name='comment_post_created_idx'),
+        ]
 
     def __str__(self):
         return self.text
@@ -57,6 +84,39 @@ class Follow(models.Model):
     subscription_date = models.DateTimeField(auto_now_add=True)
 
     class Meta():
-        ordering = ['-subscription_date'],
-        models.UniqueConstraint(fields=['user', 'author'],
-                                name='unique_followings')
+        ordering = ['-subscription_date']
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'author'],
+                                    name='unique_followings'),
+        ]
+
+
+class UserStats(models.Model):
+    """Счётчики пользователя, обновляемые при создании и удалении записей"""
+    user = models.OneToOneField(User, on_delete=models.CASCADE,
+                                primary_key=True, related_name="stats")
+    posts_count = models.PositiveIntegerField("Posts", default=0)
+    follows_count = models.PositiveIntegerField("Follows", default=0)
+    followers_count = models.PositiveIntegerField("Followers", default=0)
+
+    def __str__(self):
+        return f'Статистика {self.user_id}'
+
+
+class FeedEntry(models.Model):
+    """Запись материализованной ленты подписок пользователя"""
+    user = models.ForeignKey(User, on_delete=models.CASCADE,
+                             related_name="feed_entries")
+    post = models.ForeignKey(Post, on_delete=models.CASCADE,
+                             related_name="feed_entries")
+    pub_date = models.DateTimeField()
+
+    class Meta():
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'post'],
+                                    name='unique_feed_entry'),
+        ]
+        indexes = [
+            models.Index(fields=['user', '-pub_date', '-post'],
+                         name='feed_user_pub_date_idx'),
+        ]
@@ -0,0 +1,110 @@
+"""
+Курсорная (keyset) пагинация.
+
+Вместо COUNT(*) и OFFSET страница выбирается условием по ключу сортировки
+последней показанной записи, поэтому глубокие страницы стоят столько же,
+сколько первая. Номера страниц (?page=) обслуживает обычный Paginator,
+от которого наследуется CursorPaginator, чтобы старые ссылки работали.
+
+Курсорная страница остаётся обычным Page: has_next() и has_previous()
+считаются из number и num_pages, которые заполняются без COUNT(*).
+"""
+import base64
+import binascii
+import json
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.paginator import Paginator
+from django.db.models import Q
+
+POST_ORDERING = ('-pub_date', '-id')
+COMMENT_ORDERING = ('-created', '-id')
+GROUP_ORDERING = ('title', 'id')
+
+
+class CursorPaginator(Paginator):
+    def __init__(self, object_list, per_page, ordering=POST_ORDERING):
+        self.ordering = tuple(ordering)
+        self.keys = [name.lstrip('-') for name in self.ordering]
+        super().__init__(object_list.order_by(*self.ordering), per_page)
+
+    def _key_field(self, name):
+        query = self.object_list.query
+        if name in query.annotations:
+            return query.annotations[name].output_field
+        if name == 'pk':
+            return self.object_list.model._meta.pk
+        return self.object_list.model._meta.get_field(name)
+
+    def encode_cursor(self, obj):
+        values = [getattr(obj, name) for name in self.keys]
+        values = [
+            value.isoformat() if hasattr(value, 'isoformat') else value
+            for value in values
+        ]
+        raw = json.dumps(values, separators=(',', ':')).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        """Значения ключа из курсора или None, если курсор испорчен."""
+        try:
+            raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+            values = json.loads(raw.decode())
+            if len(values) != len(self.keys):
+                return None
+            return [
+                self._key_field(name).to_python(value)
+                for name, value in zip(self.keys, values)
+            ]
+        except (binascii.Error, ValueError, TypeError,
+                FieldDoesNotExist, ValidationError):
+            return None
+
+    def _seek(self, values, forward):
+        """Условие "строго после" (или "строго до") ключа values."""
+        condition = Q()
+        equal = {}
+        for name, descending, value in zip(
+            self.keys, [key.startswith('-') for key in self.ordering], values
+        ):
+            lookup = 'lt' if descending == forward else 'gt'
+            condition |= Q(**equal, **{f'{name}__{lookup}': value})
+            equal[name] = value
+        return condition
+
+    def _reversed_ordering(self):
+        return [
+            name[1:] if name.startswith('-') else f'-{name}'
+            for name in self.ordering
+        ]
+
+    def get_cursor_page(self, after=None, before=None):
+        """Страница после курсора after, перед курсором before или первая."""
+        limit = self.per_page
+        after = after and self.decode_cursor(after)
+        before = before and self.decode_cursor(before)
+        if before:
+            rows = list(
+                self.object_list.filter(self._seek(before, forward=False))
+                .order_by(*self._reversed_ordering())[:limit + 1]
+            )
+            has_previous, has_next = len(rows) > limit, True
+            rows = rows[:limit][::-1]
+        else:
+            object_list = self.object_list
+            if after:
+                object_list = object_list.filter(
+                    self._seek(after, forward=True)
+                )
+            rows = list(object_list[:limit + 1])
+            has_previous, has_next = bool(after), len(rows) > limit
+            rows = rows[:limit]
+        number = 2 if has_previous and rows else 1
+        self.__dict__['num_pages'] = number + int(has_next and bool(rows))
+        page = self._get_page(rows, number, self)
+        page.is_cursor = True
+        page.next_cursor = (self.encode_cursor(rows[-1])
+                            if page.has_next() else None)
+        page.previous_cursor = (self.encode_cursor(rows[0])
+                                if page.has_previous() else None)
+        return page
@@ -0,0 +1,63 @@
+"""
+Настройка соединений SQLite.
+
+При каждом новом соединении выполняются PRAGMA из SQLITE_PRAGMAS, в
+порядке словаря. Журнал WAL позволяет читателям работать, пока идёт
+запись; synchronous=NORMAL в режиме WAL не теряет целостность при сбое;
+busy_timeout заставляет писателя подождать занятую базу, а не сразу
+падать с «database is locked». Вместе с CONN_MAX_AGE соединение и его
+кэш страниц живут между запросами.
+
+Транзакции transaction.atomic() начинаются с BEGIN SQLITE_BEGIN.
+Представления сначала читают, а потом пишут: отложенная (DEFERRED)
+транзакция при первой записи повышает блокировку и, если базу уже
+изменила другая транзакция, сразу падает с «database is locked» —
+busy_timeout здесь не помогает. BEGIN IMMEDIATE берёт блокировку записи
+в начале транзакции, и конкурирующий писатель ждёт её до busy_timeout.
+"""
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+# Значения SQLite по умолчанию, с которыми работает база без настройки;
+# busy_timeout как у модуля sqlite3 (timeout=5)
+SQLITE_DEFAULTS = {
+    'journal_mode': 'DELETE',
+    'synchronous': 'FULL',
+    'mmap_size': 0,
+    'cache_size': -2000,
+    'busy_timeout': 5000,
+    'temp_store': 'DEFAULT',
+}
+SQLITE_DEFAULT_BEGIN = 'DEFERRED'
+
+
+def apply(connection, pragmas):
+    with connection.cursor() as cursor:
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+
+
+def current(connection, names=SQLITE_DEFAULTS):
+    """Текущие значения PRAGMA соединения."""
+    values = {}
+    with connection.cursor() as cursor:
+        for name in names:
+            cursor.execute(f'PRAGMA {name}')
+            values[name] = cursor.fetchone()[0]
+    return values
+
+
+def set_begin(connection, mode):
+    """Режим, в котором atomic() начинает транзакции соединения."""
+    def start_transaction():
+        connection.cursor().execute(f'BEGIN {mode}')
+    # Django начинает транзакцию SQLite этим методом обёртки соединения
+    connection._start_transaction_under_autocommit = start_transaction
+
+
+@receiver(connection_created)
+def configure(sender, connection, **kwargs):
+    if connection.vendor == 'sqlite':
+        apply(connection, settings.SQLITE_PRAGMAS)
+        set_begin(connection, settings.SQLITE_BEGIN)
@@ -0,0 +1,86 @@
+"""
+Чтение с реплик, запись в основную БД.
+
+ReplicaMiddleware разрешает читать с реплик (DATABASE_REPLICAS) только
+безопасным запросам пользователя, который давно ничего не записывал.
+Запрос, который что-то записал, сразу переходит на основную БД, а ответ
+ставит cookie: следующие REPLICA_PIN_SECONDS секунд все чтения этого
+браузера тоже идут в основную БД, и пользователь видит свой пост или
+комментарий, даже если реплика отстаёт. Вне запросов (команды, фоновые
+потоки) чтения всегда идут в основную БД. Страницы для общего кэша
+собираются из основной БД (primary_reads): страница из отстающей реплики
+считалась бы свежей для нового поколения.
+"""
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+
+PIN_COOKIE = 'primary_until'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+
+_state = threading.local()
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if getattr(_state, 'replica_reads', False) and \
+                settings.DATABASE_REPLICAS:
+            return random.choice(settings.DATABASE_REPLICAS)
+        return None
+
+    def db_for_write(self, model, **hints):
+        # После записи запрос читает то, что записал
+        _state.replica_reads = False
+        _state.wrote = True
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплики — копии основной БД
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        return db not in settings.DATABASE_REPLICAS
+
+
+def is_pinned(request):
+    try:
+        return float(request.COOKIES.get(PIN_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+@contextmanager
+def primary_reads():
+    """Чтения внутри блока идут в основную БД."""
+    replica_reads = getattr(_state, 'replica_reads', False)
+    _state.replica_reads = False
+    try:
+        yield
+    finally:
+        _state.replica_reads = (replica_reads
+                                and not getattr(_state, 'wrote', False))
+
+
+class ReplicaMiddleware:
+    """Ставится первым в MIDDLEWARE, чтобы чтение сессии шло по правилам."""
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        _state.replica_reads = (request.method in SAFE_METHODS
+                                and not is_pinned(request))
+        _state.wrote = False
+        try:
+            response = self.get_response(request)
+            wrote = _state.wrote
+        finally:
+            _state.replica_reads = _state.wrote = False
+        if wrote or request.method not in SAFE_METHODS:
+            seconds = settings.REPLICA_PIN_SECONDS
+            response.set_cookie(PIN_COOKIE, str(int(time.time() + seconds)),
+                                max_age=seconds, httponly=True,
+                                samesite='Lax')
+        return response
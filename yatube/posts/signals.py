@@ -0,0 +1,176 @@
+import threading
+
+from django.db import transaction
+from django.db.models.signals import (post_delete, post_save, pre_delete,
+                                      pre_save)
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import caching, counters, events, follows, timeline
+from .models import Comment, Follow, Group, Post, User, UserStats
+
+
+# Поля пользователя, которые видны на страницах
+USER_SHOWN_FIELDS = ('username', 'first_name', 'last_name')
+
+# id постов, которые удаляются в этом потоке: комментарии удаляются
+# каскадом раньше поста, и обновлять его счётчик и кэш незачем
+_deleting = threading.local()
+
+
+def deleting_posts():
+    if not hasattr(_deleting, 'posts'):
+        _deleting.posts = set()
+    return _deleting.posts
+
+
+def user_shown(user):
+    return tuple(getattr(user, field) for field in USER_SHOWN_FIELDS)
+
+
+def post_id_scopes(posts):
+    """
+    Области post:<id> постов: страница и ответ API поста показывают
+    автора и группу.
+    """
+    return [f'post:{pk}' for pk in posts.values_list('pk', flat=True)]
+
+
+@receiver(pre_save, sender=User)
+def user_changing(sender, instance, raw=False, update_fields=None,
+                  **kwargs):
+    if raw or instance.pk is None:
+        return
+    if update_fields is not None and \
+            not set(update_fields) & set(USER_SHOWN_FIELDS):
+        # Вход обновляет только last_login
+        instance._shown_before = user_shown(instance)
+        return
+    instance._shown_before = User.objects.filter(
+        pk=instance.pk
+    ).values_list(*USER_SHOWN_FIELDS).first()
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        UserStats.objects.get_or_create(user=instance)
+    before = getattr(instance, '_shown_before', None)
+    if before == user_shown(instance):
+        return
+    scopes = [f'author:{instance.username}']
+    if before and before[0] != instance.username:
+        # Карточки постов показывают имя автора и ссылку на профиль
+        instance.posts.update(updated=timezone.now())
+        scopes.append(f'author:{before[0]}')
+        scopes.append('index')
+        scopes.extend(post_id_scopes(instance.posts.all()))
+        scopes.extend(
+            f'group:{slug}' for slug in Group.objects.filter(
+                posts__author=instance
+            ).distinct().values_list('slug', flat=True)
+        )
+    caching.bump(*scopes)
+
+
+@receiver(pre_save, sender=Post)
+def post_moving(sender, instance, raw=False, **kwargs):
+    if raw or instance.pk is None:
+        return
+    old_group = Group.objects.filter(posts__pk=instance.pk).first()
+    if old_group and old_group.pk != instance.group_id:
+        caching.bump(f'group:{old_group.slug}')
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        counters.bump_user(instance.author_id, posts_count=1)
+        timeline.fan_out(instance)
+        transaction.on_commit(events.broadcaster.notify)
+    caching.bump(*caching.post_scopes(instance))
+
+
+@receiver(pre_delete, sender=Post)
+def post_deleting(sender, instance, **kwargs):
+    deleting_posts().add(instance.pk)
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    deleting_posts().discard(instance.pk)
+    counters.bump_user(instance.author_id, posts_count=-1)
+    caching.bump(*caching.post_scopes(instance))
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        counters.bump_comments(instance.post_id, 1)
+    caching.bump(*caching.post_scopes(instance.post))
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    if instance.post_id in deleting_posts():
+        # Кэш поста сбросит post_deleted
+        return
+    counters.bump_comments(instance.post_id, -1)
+    post = Post.objects.select_related('author', 'group').filter(
+        pk=instance.post_id
+    ).first()
+    if post:
+        caching.bump(*caching.post_scopes(post))
+
+
+@receiver(post_save, sender=Group)
+def group_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    scopes = ['index', 'groups', f'group:{instance.slug}']
+    if not created:
+        instance.posts.update(updated=timezone.now())
+        scopes.extend(post_id_scopes(instance.posts.all()))
+    caching.bump(*scopes)
+
+
+@receiver(pre_delete, sender=Group)
+def group_deleting(sender, instance, **kwargs):
+    # После удаления у постов уже не будет группы, по которой их найти
+    caching.bump(*post_id_scopes(instance.posts.all()))
+
+
+@receiver(post_delete, sender=Group)
+def group_deleted(sender, instance, **kwargs):
+    caching.bump('index', 'groups', f'group:{instance.slug}')
+
+
+@receiver(post_save, sender=Follow)
+def follow_created(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        counters.bump_user(instance.user_id, follows_count=1)
+        counters.bump_user(instance.author_id, followers_count=1)
+        timeline.add_author(instance.user_id, instance.author_id)
+        follows.invalidate(instance.user_id)
+        bump_follow_scopes(instance)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    counters.bump_user(instance.user_id, follows_count=-1)
+    counters.bump_user(instance.author_id, followers_count=-1)
+    timeline.remove_author(instance.user_id, instance.author_id)
+    timeline.resume_fan_out(instance.author_id)
+    follows.invalidate(instance.user_id)
+    bump_follow_scopes(instance)
+
+
+def bump_follow_scopes(follow):
+    caching.bump(f'author:{follow.user.username}',
+                 f'author:{follow.author.username}')
@@ -0,0 +1,29 @@
+"""
+Шаблоны Django с замером времени рендеринга (posts.middleware).
+
+DjangoTemplates, чьи шаблоны добавляют время рендеринга в замер
+текущего запроса; вне замеренных запросов остаётся одна проверка.
+"""
+from django.template import TemplateDoesNotExist
+from django.template.backends.django import (DjangoTemplates, Template,
+                                             reraise)
+
+from .middleware import timing_template
+
+
+class TimedTemplate(Template):
+    def render(self, context=None, request=None):
+        with timing_template():
+            return super().render(context, request)
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return TimedTemplate(self.engine.get_template(template_name),
+                                 self)
+        except TemplateDoesNotExist as exc:
+            reraise(exc, self)
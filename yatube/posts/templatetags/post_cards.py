@@ -0,0 +1,13 @@
+from django import template
+
+from posts import cards
+
+register = template.Library()
+
+
+@register.simple_tag
+def post_card(post):
+    card_html = getattr(post, 'card_html', None)
+    if card_html is None:
+        card_html = cards.render_cards([post])[post.id]
+    return card_html
@@ -0,0 +1,122 @@
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post, User
+
+
+class ApiTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='Leo')
+        cls.reader = User.objects.create_user(username='Sofia')
+        cls.group = Group.objects.create(title='Дневники', slug='diary',
+                                         description='Тест')
+        for i in range(12):
+            Post.objects.create(text=f'Пост {i}', author=cls.author,
+                                group=cls.group)
+        cls.post = Post.objects.filter(author=cls.author).first()
+        for i in range(3):
+            Comment.objects.create(post=cls.post, author=cls.reader,
+                                   text=f'Комментарий {i}')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.reader)
+
+    def test_posts_walk_with_cursor(self):
+        url = reverse('api:posts')
+        first = self.guest_client.get(url).json()
+        self.assertEqual(len(first['results']), 10)
+        self.assertEqual(first['results'][0]['text'], 'Пост 11')
+        self.assertEqual(first['results'][0]['group'], 'diary')
+        self.assertIsNone(first['previous'])
+        second = self.guest_client.get(url, {'after': first['next']}).json()
+        self.assertEqual([post['text'] for post in second['results']],
+                         ['Пост 1', 'Пост 0'])
+        self.assertIsNone(second['next'])
+
+    def test_endpoints(self):
+        urls = {
+            reverse('api:post', args=[self.post.id]): 'text',
+            reverse('api:post_comments', args=[self.post.id]): 'results',
+            reverse('api:groups'): 'results',
+            reverse('api:group', args=[self.group.slug]): 'group',
+            reverse('api:profile', args=[self.author.username]): 'author',
+        }
+        for url, key in urls.items():
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertIn(key, response.json())
+                self.assertTrue(response.has_header('ETag'))
+
+    def test_queries_do_not_grow_with_page(self):
+        """Записи страницы сериализуются без запросов на каждую."""
+        urls = {
+            reverse('api:posts'): 1,
+            reverse('api:group', args=[self.group.slug]): 2,
+            reverse('api:profile', args=[self.author.username]): 2,
+            reverse('api:post_comments', args=[self.post.id]): 2,
+        }
+        for url, count in urls.items():
+            with self.subTest(url=url):
+                cache.clear()
+                with self.assertNumQueries(count):
+                    self.guest_client.get(url)
+
+    def test_etag_revalidation(self):
+        """Неизменившийся ответ подтверждается 304 без запросов к БД."""
+        url = reverse('api:group', args=[self.group.slug])
+        etag = self.guest_client.get(url)['ETag']
+        with self.assertNumQueries(0):
+            response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        Post.objects.create(text='Новый пост', author=self.author,
+                            group=self.group)
+        response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_post_etag_follows_author_and_group(self):
+        """Смена имени автора, группы или её удаление меняют ETag поста."""
+        url = reverse('api:post', args=[self.post.id])
+        author = User.objects.get(pk=self.author.pk)
+        group = Group.objects.get(pk=self.group.pk)
+
+        def rename_author():
+            author.username = 'Lev'
+            author.save()
+
+        def rename_group():
+            group.title = 'Записки'
+            group.save()
+
+        for change in (rename_author, rename_group, group.delete):
+            with self.subTest(change=change.__name__):
+                etag = self.guest_client.get(url)['ETag']
+                change()
+                response = self.guest_client.get(url,
+                                                 HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 200)
+
+    def test_follow_feed(self):
+        url = reverse('api:follow')
+        self.assertEqual(self.guest_client.get(url).status_code, 401)
+        response = self.authorized_client.get(url)
+        self.assertEqual(len(response.json()['results']), 10)
+        response = self.authorized_client.get(
+            url, HTTP_IF_NONE_MATCH=response['ETag']
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_missing_objects_and_methods(self):
+        response = self.guest_client.get(reverse('api:post', args=[0]))
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.json(), {'detail': 'Не найдено'})
+        response = self.guest_client.post(reverse('api:posts'))
+        self.assertEqual(response.status_code, 405)
@@ -0,0 +1,85 @@
+import datetime as dt
+import io
+import json
+import os
+import tempfile
+
+from django.conf import settings
+from django.core.management import call_command
+from django.test import TestCase
+
+from .. import bulkload
+from ..models import Comment, FeedEntry, Follow, Group, Post, User
+
+DUMP = os.path.join(settings.BASE_DIR, 'dump.json')
+
+OBJECTS = [
+    {'model': 'auth.user', 'pk': 10,
+     'fields': {'username': 'leo', 'password': '', 'groups': [],
+                'date_joined': '2019-10-05T21:37:36Z'}},
+    {'model': 'auth.user', 'pk': 11,
+     'fields': {'username': 'sofia', 'password': '',
+                'date_joined': '2019-10-05T21:37:36Z'}},
+    {'model': 'posts.comment', 'pk': 1,
+     'fields': {'post': 5, 'author': 11, 'text': 'Первый',
+                'created': '2021-06-10T19:45:26Z'}},
+    {'model': 'posts.post', 'pk': 5,
+     'fields': {'text': 'Дневник, {"и скобки"}', 'author': 10,
+                'group': 3, 'pub_date': '1854-03-14T00:00:00Z'}},
+    {'model': 'posts.group', 'pk': 3,
+     'fields': {'title': 'Дневники', 'slug': 'diary', 'description': ''}},
+    {'model': 'posts.follow', 'pk': 1,
+     'fields': {'user': 11, 'author': 10,
+                'subscription_date': '2021-06-13T21:02:16Z'}},
+    {'model': 'sessions.session', 'pk': 'x', 'fields': {}},
+]
+
+
+class BulkLoadTests(TestCase):
+    def write_dump(self, text):
+        handle, path = tempfile.mkstemp(suffix='.json')
+        with os.fdopen(handle, 'w', encoding='utf-8') as dump:
+            dump.write(text)
+        self.addCleanup(os.remove, path)
+        return path
+
+    def test_iter_objects_reads_array_and_ndjson_in_small_chunks(self):
+        """Объекты разбираются правильно, даже если разрезаны кусками."""
+        array = json.dumps(OBJECTS, ensure_ascii=False, indent=2)
+        ndjson = '\n'.join(json.dumps(obj) for obj in OBJECTS) + '\n\n'
+        for text in (array, ndjson):
+            with self.subTest(text=text[:10]):
+                parsed = list(bulkload.iter_objects(io.StringIO(text),
+                                                    chunk_size=7))
+                self.assertEqual(parsed, OBJECTS)
+
+    def test_broken_array_raises(self):
+        with self.assertRaises(json.JSONDecodeError):
+            list(bulkload.iter_objects(io.StringIO('[{"model": 1}, {"mo')))
+
+    def test_command_loads_dump_and_derived_data(self):
+        """Команда сохраняет даты из дампа и пересчитывает счётчики."""
+        path = self.write_dump(json.dumps(OBJECTS))
+        out = io.StringIO()
+        call_command('bulkload', path, '--batch-size', '2', stdout=out)
+        post = Post.objects.get(pk=5)
+        self.assertEqual(post.pub_date,
+                         dt.datetime(1854, 3, 14, tzinfo=dt.timezone.utc))
+        self.assertEqual(post.group, Group.objects.get(slug='diary'))
+        self.assertEqual(post.comment_count, 1)
+        self.assertEqual(Comment.objects.get().created.year, 2021)
+        self.assertTrue(Follow.objects.filter(user_id=11,
+                                              author_id=10).exists())
+        self.assertTrue(FeedEntry.objects.filter(user_id=11,
+                                                 post=post).exists())
+        self.assertEqual(User.objects.get(pk=10).stats.posts_count, 1)
+        self.assertIn('пропущено sessions.session: 1', out.getvalue())
+        self.assertIn('в секунду', out.getvalue())
+        self.assertEqual(Post._meta.get_field('pub_date').auto_now_add, True)
+
+    def test_command_loads_repository_dump(self):
+        call_command('bulkload', DUMP, stdout=io.StringIO())
+        with open(DUMP, encoding='utf-8') as dump:
+            posts = [obj for obj in json.load(dump)
+                     if obj['model'] == 'posts.post']
+        self.assertEqual(Post.objects.count(), len(posts))
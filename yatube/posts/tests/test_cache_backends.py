@@ -0,0 +1,97 @@
+import shutil
+import tempfile
+import threading
+import time
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from .. import caching
+from ..cache_backends import SharedFileCache, TieredCache
+
+
+class TieredCacheTests(SimpleTestCase):
+    """Два экземпляра TieredCache над одним каталогом — два процесса."""
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.shared = SharedFileCache(directory, {})
+        patcher = mock.patch.object(TieredCache, 'shared', self.shared)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        options = {'LOCAL_MAX_ENTRIES': 3, 'SHARED_ONLY': ['generation:']}
+        # Свои имена в каждом тесте: у кэша с тем же именем общие
+        # память и счётчики
+        self.first = TieredCache(f'{self.id()}.first', {'OPTIONS': options})
+        self.second = TieredCache(f'{self.id()}.second',
+                                  {'OPTIONS': options})
+        self.addCleanup(self.first.clear)
+        self.addCleanup(self.second.clear)
+
+    def test_shared_tier_fills_local_tier(self):
+        self.first.set('page', 'html')
+        self.assertEqual(self.second.get('page'), 'html')
+        self.assertEqual(self.second.get('page'), 'html')
+        self.assertEqual(self.second.get_many(['page', 'missing']),
+                         {'page': 'html'})
+        stats = self.second.tier_stats()
+        self.assertEqual(stats['l1'], {'hits': 2, 'misses': 2,
+                                       'hit_rate': 0.5})
+        self.assertEqual(stats['l2'], {'hits': 1, 'misses': 1,
+                                       'hit_rate': 0.5})
+
+    def test_local_copy_does_not_outlive_shared_entry(self):
+        now = time.time()
+        self.first.set('page', 'html', 2)
+        with mock.patch('time.time', return_value=now + 1.5):
+            self.assertEqual(self.second.get('page'), 'html')
+        with mock.patch('time.time', return_value=now + 2.5):
+            self.assertIsNone(self.second.get('page'))
+            self.assertIsNone(self.second.get_many(['page']).get('page'))
+
+    def test_generation_bump_reaches_other_process(self):
+        """Поколение читается из общего уровня, старые страницы не видны."""
+        with mock.patch('posts.caching.cache', self.first):
+            key = f"page:{caching.get_generation('index')}"
+            self.first.set(key, 'old')
+        with mock.patch('posts.caching.cache', self.second):
+            self.assertEqual(
+                self.second.get(f"page:{caching.get_generation('index')}"),
+                'old'
+            )
+        with mock.patch('posts.caching.cache', self.first):
+            caching.bump('index')
+        with mock.patch('posts.caching.cache', self.second):
+            self.assertIsNone(
+                self.second.get(f"page:{caching.get_generation('index')}")
+            )
+
+    def test_local_tier_is_bounded(self):
+        for number in range(10):
+            self.first.set(f'key:{number}', number)
+        self.assertLessEqual(len(self.first.local._cache), 3)
+        self.assertEqual(self.second.get('key:0'), 0)
+
+    def test_incr_is_atomic_across_instances(self):
+        self.first.set('generation:x', 0)
+
+        def bump(cache):
+            for _ in range(25):
+                cache.incr('generation:x')
+
+        threads = [threading.Thread(target=bump, args=[cache])
+                   for cache in (self.first, self.second) * 4]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(self.second.get('generation:x'), 200)
+
+    def test_delete_and_clear_reach_both_tiers(self):
+        self.first.set('page', 'html')
+        self.first.delete('page')
+        self.assertIsNone(self.first.get('page'))
+        self.first.set('page', 'html')
+        self.first.clear()
+        self.assertFalse(self.first.has_key('page'))
+        self.assertIsNone(self.second.get('page'))
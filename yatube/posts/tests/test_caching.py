@@ -0,0 +1,271 @@
+import threading
+import time
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponse
+from django.test import (Client, RequestFactory, SimpleTestCase, TestCase,
+                         override_settings)
+from django.urls import reverse
+from django.utils import timezone
+
+from .. import caching, cards, routers
+from ..models import Comment, Group, Post, User
+
+
+class VersionedCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='Leo')
+        cls.group = Group.objects.create(title='Дневники', slug='diary',
+                                         description='Тест')
+        cls.post = Post.objects.create(text='Первая запись',
+                                       author=cls.user, group=cls.group)
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def test_bump_changes_generation(self):
+        before = caching.get_generation('index', 'group:diary')
+        self.assertEqual(caching.get_generation('index', 'group:diary'),
+                         before)
+        caching.bump('group:diary')
+        after = caching.get_generation('index', 'group:diary')
+        self.assertEqual(after.split('.')[0], before.split('.')[0])
+        self.assertNotEqual(after, before)
+
+    def test_pages_are_cached_until_content_changes(self):
+        """Страницы берутся из кэша, пока их содержимое не изменилось."""
+        adresses = [
+            reverse('index'),
+            reverse('group_posts', args=[self.group.slug]),
+            reverse('profile', args=[self.user.username]),
+        ]
+        for adress in adresses:
+            with self.subTest(adress=adress):
+                self.guest_client.get(adress)
+                Post.objects.filter(pk=self.post.pk).update(
+                    text='Тайно', updated=timezone.now()
+                )
+                response = self.guest_client.get(adress)
+                self.assertContains(response, 'Первая запись')
+                Post.objects.create(text='Вторая запись', author=self.user,
+                                    group=self.group)
+                response = self.guest_client.get(adress)
+                self.assertContains(response, 'Вторая запись')
+                self.assertContains(response, 'Тайно')
+                Post.objects.filter(pk=self.post.pk).update(
+                    text='Первая запись', updated=timezone.now()
+                )
+                Post.objects.exclude(pk=self.post.pk).delete()
+
+    def test_guest_page_is_not_served_to_user(self):
+        user_client = Client()
+        user_client.force_login(self.user)
+        self.guest_client.get(reverse('index'))
+        self.assertContains(user_client.get(reverse('index')),
+                            'Пользователь: Leo')
+
+    def test_page_rendered_before_commit_is_not_fresh(self):
+        """Страница, собранная до фиксации из старых данных, устаревает."""
+        adress = reverse('index')
+        self.guest_client.get(adress)
+        old = Post.objects.filter(pk=self.post.pk)
+        before = old.values('text', 'updated').get()
+        callbacks = []
+        with mock.patch.object(transaction, 'on_commit', callbacks.append):
+            self.post.text = 'Исправлено'
+            self.post.save()
+            after = old.values('text', 'updated').get()
+            # Параллельный запрос до фиксации ещё видит прежний пост
+            old.update(**before)
+            self.assertContains(self.guest_client.get(adress),
+                                'Первая запись')
+            old.update(**after)
+        for callback in callbacks:
+            callback()
+        self.assertContains(self.guest_client.get(adress), 'Исправлено')
+        self.post.text = 'Первая запись'
+        self.post.save()
+
+    def test_only_shown_user_fields_invalidate_author(self):
+        before = caching.get_generation('author:Leo')
+        self.user.set_password('secret-pass')
+        self.user.save()
+        self.client.login(username='Leo', password='secret-pass')
+        self.assertEqual(caching.get_generation('author:Leo'), before)
+        self.user.first_name = 'Лев'
+        self.user.save()
+        self.assertNotEqual(caching.get_generation('author:Leo'), before)
+
+    def test_comment_and_group_changes_invalidate_pages(self):
+        adress = reverse('group_posts', args=[self.group.slug])
+        self.guest_client.get(adress)
+        Comment.objects.create(post=self.post, author=self.user, text='Да')
+        self.assertContains(self.guest_client.get(adress), 'Комментариев: 1')
+        self.group.title = 'Записки'
+        self.group.save()
+        self.assertContains(self.guest_client.get(reverse('index')),
+                            '#Записки')
+
+
+class StalePageTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='Leo')
+        Post.objects.create(text='Первая запись', author=cls.user)
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def lock_page(self):
+        """Страницу index будто бы собирает другой запрос."""
+        self.lock = caching.rebuild_lock(
+            RequestFactory().get(reverse('index')), 'index'
+        )
+        cache.add(self.lock, True, None)
+
+    def test_stale_page_is_served_while_rebuilt(self):
+        """Пока страницу пересобирает другой запрос, отдаётся прежняя."""
+        etag = self.guest_client.get(reverse('index'))['ETag']
+        Post.objects.create(text='Вторая запись', author=self.user)
+        self.lock_page()
+        with self.assertNumQueries(0):
+            response = self.guest_client.get(reverse('index'))
+        self.assertNotContains(response, 'Вторая запись')
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertTrue(response['ETag'].startswith('"stale.'))
+        cache.delete(self.lock)
+        self.assertContains(self.guest_client.get(reverse('index')),
+                            'Вторая запись')
+
+    def test_expired_page_is_stale(self):
+        self.guest_client.get(reverse('index'))
+        Post.objects.filter(text='Первая запись').update(
+            text='Тайно', updated=timezone.now()
+        )
+        self.lock_page()
+        later = time.time() + caching.settings.PAGE_CACHE_TIMEOUT + 1
+        with mock.patch('posts.caching.time.time', return_value=later):
+            self.assertContains(self.guest_client.get(reverse('index')),
+                                'Первая запись')
+            cache.delete(self.lock)
+            self.assertContains(self.guest_client.get(reverse('index')),
+                                'Тайно')
+
+    def test_lock_is_per_variant(self):
+        """Сборка страницы гостя не задерживает страницу пользователя."""
+        user_client = Client()
+        user_client.force_login(self.user)
+        self.guest_client.get(reverse('index'))
+        user_client.get(reverse('index'))
+        Post.objects.create(text='Вторая запись', author=self.user)
+        self.lock_page()
+        self.assertNotContains(self.guest_client.get(reverse('index')),
+                               'Вторая запись')
+        self.assertContains(user_client.get(reverse('index')),
+                            'Вторая запись')
+
+    @override_settings(PAGE_REBUILD_TIMEOUT=0)
+    def test_writer_does_not_get_stale_page(self):
+        """Браузер, который только что записал, ждёт новую страницу."""
+        self.guest_client.get(reverse('index'))
+        Post.objects.create(text='Вторая запись', author=self.user)
+        self.lock_page()
+        self.guest_client.cookies[routers.PIN_COOKIE] = str(
+            int(time.time()) + 60
+        )
+        self.assertContains(self.guest_client.get(reverse('index')),
+                            'Вторая запись')
+
+
+class CoalescingTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def test_concurrent_misses_share_one_render(self):
+        calls = []
+
+        @caching.cache_page_versioned(60, 'coalescing')
+        def slow_view(request):
+            calls.append(request)
+            time.sleep(0.2)
+            return HttpResponse(f'render {len(calls)}')
+
+        responses = []
+
+        def get():
+            responses.append(slow_view(RequestFactory().get('/slow/')))
+
+        threads = [threading.Thread(target=get) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(calls), 1)
+        self.assertEqual({response.content for response in responses},
+                         {b'render 1'})
+
+
+class PostCardCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='Leo')
+        for i in range(12):
+            Post.objects.create(text=f'Запись {i}', author=cls.user)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_feed_reads_cards_with_one_get_many(self):
+        """Лента с готовыми карточками читает их одним get_many."""
+        self.client.get(reverse('index'))
+        caching.bump('index')
+        with mock.patch('posts.cards.render_to_string') as render, \
+                mock.patch.object(cache, 'get_many',
+                                  wraps=cache.get_many) as get_many:
+            response = self.client.get(reverse('index'))
+        render.assert_not_called()
+        card_calls = [call for call in get_many.call_args_list
+                      if 'post_card' in str(call)]
+        self.assertEqual(len(card_calls), 1)
+        self.assertContains(response, 'Запись 11')
+
+    def test_card_is_shared_between_viewers(self):
+        """Кнопка редактирования видна только автору при общей карточке."""
+        post = Post.objects.first()
+        author_client = Client()
+        author_client.force_login(self.user)
+        adress = reverse('post', args=[self.user.username, post.id])
+        edit = reverse('post_edit', args=[self.user.username, post.id])
+        self.assertContains(author_client.get(adress), edit)
+        response = self.client.get(adress)
+        self.assertContains(response, post.text)
+        self.assertNotContains(response, edit)
+
+    def test_edit_changes_card_key(self):
+        post = Post.objects.first()
+        key = cards.card_key(post)
+        post.text = 'Исправлено'
+        post.save()
+        self.assertNotEqual(cards.card_key(post), key)
+        self.assertIn('Исправлено', cards.render_cards([post])[post.id])
+
+    def test_rename_updates_cards_and_feed(self):
+        self.client.get(reverse('index'))
+        user = User.objects.get(pk=self.user.pk)
+        user.username = 'Lev'
+        user.save()
+        response = self.client.get(reverse('index'))
+        self.assertContains(response, '@Lev')
+        self.assertContains(response, reverse('profile', args=['Lev']))
+        self.assertNotContains(response, '@Leo')
+        user.username = 'Leo'
+        user.save()
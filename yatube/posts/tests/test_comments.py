@@ -0,0 +1,67 @@
+from unittest import mock
+
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Comment, Post, User
+
+
+@mock.patch('posts.views.COMMENT_COUNT', 3)
+class CommentPageTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='Leo')
+        cls.post = Post.objects.create(text='Вирусный пост',
+                                       author=cls.author)
+        for i in range(7):
+            Comment.objects.create(post=cls.post, author=cls.author,
+                                   text=f'Комментарий {i}')
+
+    def setUp(self):
+        self.guest_client = Client()
+        self.url = reverse('post_comments',
+                           args=[self.author.username, self.post.id])
+
+    def texts(self, comments):
+        return [comment.text for comment in comments]
+
+    def test_post_view_shows_newest_page(self):
+        response = self.guest_client.get(
+            reverse('post', args=[self.author.username, self.post.id])
+        )
+        comments = response.context['comments']
+        self.assertEqual(self.texts(comments),
+                         ['Комментарий 6', 'Комментарий 5', 'Комментарий 4'])
+        self.assertContains(response,
+                            f'{self.url}?after={comments.next_cursor}')
+        self.assertNotContains(response, 'Комментарий 3')
+
+    def test_fragments_walk_all_comments(self):
+        """Фрагменты по ссылкам «Показать ещё» отдают все комментарии."""
+        seen = []
+        after = ''
+        while after is not None:
+            response = self.guest_client.get(self.url, {'after': after})
+            self.assertTemplateUsed(response, 'subpattern/comment_list.html')
+            self.assertTemplateNotUsed(response, 'base.html')
+            comments = response.context['comments']
+            seen += self.texts(comments)
+            after = comments.next_cursor
+        self.assertEqual(seen, [f'Комментарий {i}' for i in range(6, -1, -1)])
+
+    def test_json_page(self):
+        first = self.guest_client.get(self.url, {'format': 'json'}).json()
+        self.assertEqual(len(first['comments']), 3)
+        self.assertEqual(first['comments'][0]['author'], 'Leo')
+        second = self.guest_client.get(
+            self.url, {'format': 'json', 'after': first['next']}
+        ).json()
+        self.assertEqual([item['text'] for item in second['comments']],
+                         ['Комментарий 3', 'Комментарий 2', 'Комментарий 1'])
+
+    def test_unknown_post_is_404(self):
+        response = self.guest_client.get(
+            reverse('post_comments', args=['nobody', self.post.id])
+        )
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,70 @@
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Comment, Group, Post, User
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='Leo')
+        cls.reader = User.objects.create_user(username='Sofia')
+        cls.group = Group.objects.create(title='Дневники', slug='diary',
+                                         description='Тест')
+        cls.post = Post.objects.create(text='Первая запись',
+                                       author=cls.author, group=cls.group)
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.reader)
+        self.urls = [
+            reverse('index'),
+            reverse('group_posts', args=[self.group.slug]),
+            reverse('profile', args=[self.author.username]),
+            reverse('post', args=[self.author.username, self.post.id]),
+        ]
+
+    def test_unchanged_pages_are_not_modified(self):
+        """Повторный запрос с ETag получает 304 без запросов к БД."""
+        for url in self.urls:
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                self.assertIn('no-cache', response['Cache-Control'])
+                with self.assertNumQueries(0):
+                    response = self.guest_client.get(
+                        url, HTTP_IF_NONE_MATCH=response['ETag']
+                    )
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response.content, b'')
+
+    def test_changes_refresh_pages(self):
+        etags = {url: self.guest_client.get(url)['ETag'] for url in self.urls}
+        Post.objects.filter(pk=self.post.pk).first().save()
+        for url, etag in etags.items():
+            with self.subTest(url=url):
+                response = self.guest_client.get(url,
+                                                 HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 200)
+
+    def test_comment_refreshes_post_page(self):
+        url = reverse('post', args=[self.author.username, self.post.id])
+        etag = self.guest_client.get(url)['ETag']
+        Comment.objects.create(post=self.post, author=self.reader,
+                               text='Новый комментарий')
+        response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertContains(response, 'Новый комментарий')
+
+    def test_etag_depends_on_viewer(self):
+        for url in self.urls:
+            with self.subTest(url=url):
+                etag = self.guest_client.get(url)['ETag']
+                response = self.authorized_client.get(
+                    url, HTTP_IF_NONE_MATCH=etag
+                )
+                self.assertEqual(response.status_code, 200)
+                self.assertNotEqual(response['ETag'], etag)
+                self.assertIn('private', response['Cache-Control'])
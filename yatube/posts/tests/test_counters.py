@@ -0,0 +1,93 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Comment, Follow, Post, User, UserStats
+
+
+class CountersTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='Leo')
+        cls.reader = User.objects.create_user(username='Sofia')
+
+    def setUp(self):
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def stats(self, user):
+        return UserStats.objects.get(user=user)
+
+    def test_post_and_comment_counters(self):
+        """Счётчики постов и комментариев следуют за созданием и удалением."""
+        post = Post.objects.create(text='Пост', author=self.author)
+        self.reader_client.post(
+            reverse('add_comment', args=[self.author, post.id]),
+            data={'text': 'Комментарий'}
+        )
+        post.refresh_from_db()
+        self.assertEqual(post.comment_count, 1)
+        self.assertEqual(self.stats(self.author).posts_count, 1)
+        Comment.objects.get(post=post).delete()
+        post.refresh_from_db()
+        self.assertEqual(post.comment_count, 0)
+        post.delete()
+        self.assertEqual(self.stats(self.author).posts_count, 0)
+
+    def delete_with_comments(self, count):
+        post = Post.objects.create(text='Пост', author=self.author)
+        for _ in range(count):
+            Comment.objects.create(post=post, author=self.reader, text='Да')
+        with CaptureQueriesContext(connection) as context:
+            post.delete()
+        return len(context.captured_queries)
+
+    def test_post_delete_does_not_touch_each_comment(self):
+        """Каскадное удаление комментариев не стоит запросов на каждый."""
+        self.assertEqual(self.delete_with_comments(30),
+                         self.delete_with_comments(2))
+        post = Post.objects.create(text='Пост', author=self.author)
+        Comment.objects.create(post=post, author=self.reader, text='Да')
+        Comment.objects.get(post=post).delete()
+        post.refresh_from_db()
+        self.assertEqual(post.comment_count, 0)
+
+    def test_follow_counters(self):
+        self.reader_client.get(reverse('profile_follow', args=[self.author]))
+        self.assertEqual(self.stats(self.reader).follows_count, 1)
+        self.assertEqual(self.stats(self.author).followers_count, 1)
+        self.reader_client.get(
+            reverse('profile_unfollow', args=[self.author])
+        )
+        self.assertEqual(self.stats(self.reader).follows_count, 0)
+        self.assertEqual(self.stats(self.author).followers_count, 0)
+
+    def test_recount_repairs_drift(self):
+        post = Post.objects.create(text='Пост', author=self.author)
+        Comment.objects.create(post=post, author=self.reader, text='Да')
+        Follow.objects.create(user=self.reader, author=self.author)
+        Post.objects.update(comment_count=7)
+        UserStats.objects.all().delete()
+        call_command('recount', stdout=StringIO())
+        post.refresh_from_db()
+        self.assertEqual(post.comment_count, 1)
+        stats = self.stats(self.author)
+        self.assertEqual(
+            (stats.posts_count, stats.follows_count, stats.followers_count),
+            (1, 0, 1)
+        )
+        self.assertEqual(self.stats(self.reader).follows_count, 1)
+
+    def test_profile_shows_counters(self):
+        Post.objects.create(text='Пост', author=self.author)
+        Follow.objects.create(user=self.reader, author=self.author)
+        response = self.reader_client.get(
+            reverse('profile', args=[self.author])
+        )
+        self.assertContains(response, 'Записей: 1')
+        self.assertContains(response, 'Подписан: 1')
@@ -0,0 +1,78 @@
+from collections import Counter
+from io import StringIO
+
+from django.core.management import call_command
+from django.db.models import Count
+from django.test import TestCase
+
+from .. import dataset
+from ..models import Comment, FeedEntry, Follow, Group, Post, User
+
+SIZES = {'users': 60, 'groups': 5, 'posts': 600, 'comments': 900,
+         'follows': 6}
+
+
+class DatasetTests(TestCase):
+    def build(self, prefix, seed=1):
+        builder = dataset.DatasetBuilder(seed=seed, prefix=prefix, **SIZES)
+        return builder, builder.build()
+
+    def shape(self, builder):
+        """Строки набора относительно его первых id."""
+        users, posts = builder.bases[User], builder.bases[Post]
+        post_rows = Post.objects.filter(id__gte=posts).order_by('id')
+        return (
+            [(row.author_id - users, row.text, row.pub_date)
+             for row in post_rows],
+            list(Follow.objects.filter(user_id__gte=users).order_by(
+                'user_id', 'author_id'
+            ).values_list('user_id', 'author_id')),
+        )
+
+    def test_same_seed_gives_same_rows(self):
+        """Одинаковый seed даёт одинаковый набор."""
+        first, created = self.build('a')
+        self.assertEqual(created['posts'], SIZES['posts'])
+        self.assertEqual(created['comments'], SIZES['comments'])
+        posts, follows = self.shape(first)
+        second, _ = self.build('b')
+        other_posts, other_follows = self.shape(second)
+        self.assertEqual(other_posts, posts)
+        shift = second.bases[User] - first.bases[User]
+        self.assertEqual(
+            [(user - shift, author - shift) for user, author in other_follows],
+            follows
+        )
+        third, _ = self.build('c', seed=2)
+        self.assertNotEqual(self.shape(third)[0], posts)
+
+    def test_distributions_are_skewed(self):
+        self.build('gen')
+        followers = Counter(
+            Follow.objects.order_by().values_list('author_id', flat=True)
+        )
+        average = sum(followers.values()) / SIZES['users']
+        self.assertGreater(max(followers.values()), 4 * average)
+        hot = Comment.objects.values('post').annotate(
+            total=Count('id')
+        ).order_by('-total')[:SIZES['posts'] // 100]
+        self.assertGreater(sum(row['total'] for row in hot),
+                           SIZES['comments'] // 5)
+        for comment in Comment.objects.select_related('post')[:50]:
+            self.assertGreaterEqual(comment.created, comment.post.pub_date)
+        self.assertTrue(Post.objects.exclude(image='').exists())
+        self.assertEqual(Group.objects.count(), SIZES['groups'])
+
+    def test_command_fills_derived_data(self):
+        call_command('gendata', '--users', '20', '--groups', '2',
+                     '--posts', '100', '--comments', '50', '--follows', '3',
+                     stdout=StringIO())
+        post = Post.objects.annotate(total=Count('comments')).filter(
+            total__gt=0
+        ).first()
+        self.assertEqual(post.comment_count, post.total)
+        self.assertTrue(FeedEntry.objects.exists())
+        user = User.objects.get(username='gen0')
+        self.assertEqual(user.stats.posts_count, user.posts.count())
+        self.assertTrue(self.client.login(username='gen0',
+                                          password=dataset.PASSWORD))
@@ -0,0 +1,162 @@
+import threading
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import OperationalError
+from django.test import Client, TestCase, override_settings
+from django.urls import resolve, reverse
+
+from .. import events, follows
+from ..models import Follow, Group, Post, User
+
+
+@mock.patch.object(events.Broadcaster, 'start')
+class PostEventsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='Leo')
+        cls.reader = User.objects.create_user(username='Sofia')
+        cls.group = Group.objects.create(title='Дневники', slug='diary',
+                                         description='Тест')
+        cls.other_group = Group.objects.create(title='Прочее', slug='other',
+                                               description='Тест')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.broadcaster = events.Broadcaster()
+        self.broadcaster.last_id = self.broadcaster.latest_id()
+
+    def drain(self, subscription):
+        ids = []
+        while True:
+            post_id = subscription.get(0)
+            if post_id is None:
+                return ids
+            ids.append(post_id)
+
+    def test_one_poll_fans_out_by_feed(self, start):
+        """Один запрос к БД раскладывает новые посты по всем подпискам."""
+        subscriptions = {
+            'index': self.broadcaster.subscribe(events.feed_filter('index')),
+            'group': self.broadcaster.subscribe(
+                events.feed_filter('group', group_id=self.group.id)
+            ),
+            'follow': self.broadcaster.subscribe(
+                events.feed_filter('follow', user_id=self.reader.id)
+            ),
+        }
+        in_group = Post.objects.create(text='В группе', author=self.reader,
+                                       group=self.group)
+        followed = Post.objects.create(text='Подписка', author=self.author,
+                                       group=self.other_group)
+        follows.get_following(self.reader.id)
+        with self.assertNumQueries(1), \
+                mock.patch.object(follows, 'get_following',
+                                  wraps=follows.get_following) as following:
+            self.assertEqual(self.broadcaster.poll(), 2)
+        # Множество подписок читается один раз на опрос, а не на каждый пост
+        following.assert_called_once_with(self.reader.id)
+        expected = {
+            'index': [in_group.id, followed.id],
+            'group': [in_group.id],
+            'follow': [followed.id],
+        }
+        for name, subscription in subscriptions.items():
+            with self.subTest(feed=name):
+                self.assertEqual(self.drain(subscription), expected[name])
+        self.assertEqual(self.broadcaster.poll(), 0)
+
+    def test_closed_subscription_stops_receiving(self, start):
+        subscription = self.broadcaster.subscribe(
+            events.feed_filter('index')
+        )
+        subscription.close()
+        Post.objects.create(text='Пост', author=self.author)
+        self.broadcaster.poll()
+        self.assertEqual(self.drain(subscription), [])
+        self.assertFalse(self.broadcaster.subscriptions)
+
+    def test_connection_stays_open_between_polls(self, start):
+        subscription = self.broadcaster.subscribe(
+            events.feed_filter('index')
+        )
+        polls = []
+
+        def wait(timeout):
+            polls.append(timeout)
+            if len(polls) == 3:
+                subscription.close()
+
+        with mock.patch.object(events, 'connection') as connection, \
+                mock.patch.object(self.broadcaster.wakeup, 'wait', wait):
+            self.broadcaster.run()
+        self.assertEqual(len(polls), 3)
+        connection.close.assert_called_once_with()
+
+    def test_poll_error_does_not_stop_thread(self, start):
+        subscription = self.broadcaster.subscribe(
+            events.feed_filter('index')
+        )
+        poll = self.broadcaster.poll
+        polls = []
+
+        def flaky_poll():
+            polls.append(True)
+            if len(polls) == 1:
+                raise OperationalError('database is locked')
+            if len(polls) == 2:
+                Post.objects.create(text='После ошибки', author=self.author)
+                poll()
+                subscription.close()
+
+        with mock.patch.object(events, 'connection'), \
+                mock.patch.object(self.broadcaster, 'poll', flaky_poll), \
+                mock.patch.object(self.broadcaster.wakeup, 'wait'), \
+                self.assertLogs('posts.events', 'ERROR'):
+            self.broadcaster.run()
+        self.assertEqual(len(polls), 2)
+        self.assertEqual(len(self.drain(subscription)), 1)
+
+    def test_thread_is_restarted_after_crash(self, start):
+        self.broadcaster.thread = threading.current_thread()
+        with mock.patch.object(events, 'connection'), \
+                mock.patch.object(self.broadcaster, 'poll',
+                                  side_effect=SystemExit):
+            self.broadcaster.subscribe(events.feed_filter('index'))
+            with self.assertRaises(SystemExit):
+                self.broadcaster.run()
+        self.assertIsNone(self.broadcaster.thread)
+        self.broadcaster.subscribe(events.feed_filter('index'))
+        start.assert_called_once_with()
+
+    @override_settings(SSE_MAX_AGE=0)
+    def test_stream_replays_missed_posts(self, start):
+        """При переподключении досылаются посты после Last-Event-ID."""
+        first = Post.objects.create(text='Первый', author=self.author,
+                                    group=self.group)
+        second = Post.objects.create(text='Второй', author=self.author,
+                                     group=self.group)
+        Post.objects.create(text='Не в группе', author=self.author)
+        response = Client().get(
+            reverse('group_events', args=[self.group.slug]),
+            HTTP_LAST_EVENT_ID=str(first.id),
+        )
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        body = b''.join(response.streaming_content).decode()
+        self.assertTrue(body.startswith('retry: '))
+        self.assertNotIn(f'id: {first.id}\n', body)
+        self.assertIn(f'id: {second.id}\nevent: post\n'
+                      f'data: {{"id": {second.id}}}\n\n', body)
+        self.assertEqual(body.count('event: post'), 1)
+
+    def test_follow_stream_requires_login(self, start):
+        response = Client().get(reverse('follow_events'))
+        self.assertEqual(response.status_code, 401)
+
+    def test_events_username_can_be_followed(self, start):
+        for name in ('profile', 'profile_follow', 'profile_unfollow'):
+            with self.subTest(name=name):
+                url = reverse(name, args=['events'])
+                self.assertEqual(resolve(url).url_name, name)
@@ -0,0 +1,116 @@
+from unittest import mock
+from xml.etree import ElementTree
+
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import resolve, reverse
+
+from .. import feeds
+from ..models import Group, Post, User
+
+ATOM = '{http://www.w3.org/2005/Atom}'
+
+
+class FeedTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='Leo')
+        cls.other = User.objects.create_user(username='Sofia')
+        cls.group = Group.objects.create(title='Дневники', slug='diary',
+                                         description='Тест')
+        for i in range(5):
+            Post.objects.create(text=f'Пост <{i}>', author=cls.author,
+                                group=cls.group)
+        Post.objects.create(text='Чужой пост', author=cls.other)
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def read(self, url):
+        response = self.guest_client.get(url)
+        self.assertEqual(response.status_code, 200)
+        if response.streaming:
+            return response, b''.join(response.streaming_content)
+        return response, response.content
+
+    def test_rss_and_atom_feeds(self):
+        cases = {
+            reverse('index_feed', args=['rss']): 6,
+            reverse('group_feed', args=['rss', 'diary']): 5,
+            reverse('author_feed', args=['rss', 'Sofia']): 1,
+        }
+        for url, count in cases.items():
+            with self.subTest(url=url):
+                _, content = self.read(url)
+                items = ElementTree.fromstring(content).findall(
+                    'channel/item'
+                )
+                self.assertEqual(len(items), count)
+        _, content = self.read(reverse('index_feed', args=['atom']))
+        entries = ElementTree.fromstring(content).findall(f'{ATOM}entry')
+        self.assertEqual(entries[0].find(f'{ATOM}title').text, 'Чужой пост')
+        self.assertEqual(entries[1].find(f'{ATOM}summary').text,
+                         '<p>Пост &lt;4&gt;</p>')
+
+    def test_items_are_cached(self):
+        """В кэше лежат записи, а не весь документ."""
+        url = reverse('index_feed', args=['rss'])
+        _, streamed = self.read(url)
+        with mock.patch('posts.feeds.post_item',
+                        wraps=feeds.post_item) as item:
+            response, cached = self.read(url)
+            self.assertTrue(response.streaming)
+            self.assertEqual(cached, streamed)
+            self.assertEqual(item.call_count, 0)
+            Post.objects.create(text='Свежий пост', author=self.author)
+            _, content = self.read(url)
+            self.assertIn('Свежий пост', content.decode())
+            self.assertEqual(item.call_count, 1)
+
+    def test_item_links_follow_host(self):
+        url = reverse('index_feed', args=['rss'])
+        self.read(url)
+        response = self.guest_client.get(url, HTTP_HOST='127.0.0.1')
+        content = b''.join(response.streaming_content).decode()
+        self.assertIn('http://127.0.0.1/Leo/', content)
+        self.assertNotIn('testserver', content)
+
+    def test_streaming_reads_posts_lazily(self):
+        """Записи пишутся в ответ по одной, а не собираются заранее."""
+        with mock.patch('posts.feeds.post_item',
+                        wraps=feeds.post_item) as item:
+            response = self.guest_client.get(
+                reverse('index_feed', args=['rss'])
+            )
+            chunks = iter(response.streaming_content)
+            next(chunks)
+            self.assertEqual(item.call_count, 0)
+            next(chunks)
+            self.assertEqual(item.call_count, 1)
+            list(chunks)
+            self.assertEqual(item.call_count, 6)
+
+    def test_conditional_get(self):
+        url = reverse('group_feed', args=['atom', 'diary'])
+        etag = self.guest_client.get(url)['ETag']
+        with self.assertNumQueries(0):
+            response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_unknown_format_and_group(self):
+        urls = [
+            '/feeds/json/',
+            reverse('group_feed', args=['rss', 'missing']),
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                self.assertEqual(response.status_code, 404)
+
+    def test_feeds_username_can_be_followed(self):
+        for name in ('profile_follow', 'profile_unfollow'):
+            with self.subTest(name=name):
+                url = reverse(name, args=['feeds'])
+                self.assertEqual(resolve(url).url_name, name)
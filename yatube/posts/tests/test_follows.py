@@ -0,0 +1,58 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .. import follows
+from ..models import Follow, Post, User
+
+
+class FollowingCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='Reader')
+        cls.author = User.objects.create_user(username='Writer')
+        cls.other = User.objects.create_user(username='Other')
+        cls.post = Post.objects.create(text='Пост автора', author=cls.author)
+        Follow.objects.create(user=cls.reader, author=cls.other)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def test_following_set_is_cached(self):
+        self.assertEqual(follows.get_following(self.reader.pk),
+                         {self.other.pk})
+        with self.assertNumQueries(0):
+            self.assertTrue(follows.is_following(self.reader, self.other.pk))
+            self.assertFalse(follows.is_following(self.reader,
+                                                  self.author.pk))
+
+    def test_follow_views_invalidate_set(self):
+        """Подписка и отписка сразу видны в проверках."""
+        follows.get_following(self.reader.pk)
+        self.client.get(reverse('profile_follow', args=[self.author]))
+        self.assertIn(self.author.pk, follows.get_following(self.reader.pk))
+        self.client.get(reverse('profile_unfollow', args=[self.author]))
+        self.assertNotIn(self.author.pk,
+                         follows.get_following(self.reader.pk))
+
+    def test_pages_do_not_query_follow(self):
+        """Страницы автора и поста не проверяют подписку запросом к БД."""
+        follows.get_following(self.reader.pk)
+        urls = [
+            reverse('profile', args=[self.other]),
+            reverse('post', args=[self.author, self.post.id]),
+        ]
+        table = Follow._meta.db_table
+        for url in urls:
+            with self.subTest(url=url):
+                with CaptureQueriesContext(connection) as queries:
+                    self.client.get(url)
+                self.assertFalse([
+                    query for query in queries.captured_queries
+                    if f'FROM "{table}"' in query['sql']
+                ])
@@ -1,20 +1,23 @@
 import shutil
 import tempfile
+from io import BytesIO
 
-from django.conf import settings
 from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
-from django.test import Client, TestCase
+from django.test import Client, TestCase, override_settings
 from django.urls import reverse
+from PIL import Image
 
 from ..models import Group, Post, User
 
+TEMP_MEDIA_ROOT = tempfile.mkdtemp()
 
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
 class CreateFormTests(TestCase):
     @classmethod
     def setUpClass(cls):
         super().setUpClass()
-        settings.MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
         cls.user = User.objects.create_user(username='Nikolai')
         cls.group = Group.objects.create(title='reader',
                                          slug='test',
@@ -51,7 +54,7 @@ class CreateFormTests(TestCase):
 
     @classmethod
     def tearDownClass(cls):
-        shutil.rmtree(settings.MEDIA_ROOT, ignore_errors=True)
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
         super().tearDownClass()
 
     def setUp(self):
@@ -77,10 +80,28 @@ class CreateFormTests(TestCase):
                 text=self.form_data['text'],
                 author=User.objects.get(username='Nikolai'),
                 group=self.group.id,
-                image='posts/small.gif'
+                image='posts/small.webp'
             ).exists()
         )
 
+    def test_truncated_image_is_rejected(self):
+        buffer = BytesIO()
+        Image.new('RGB', (200, 200), (200, 30, 30)).save(buffer, 'JPEG')
+        truncated = SimpleUploadedFile(
+            name='broken.jpg', content=buffer.getvalue()[:-400],
+            content_type='image/jpeg'
+        )
+        post_count = Post.objects.count()
+        response = self.authorized_client.post(
+            reverse('new_post'),
+            data={'text': 'Битая картинка', 'image': truncated}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['form'].has_error(
+            'image', 'invalid_image'
+        ))
+        self.assertEqual(Post.objects.count(), post_count)
+
     def test_edit_post(self):
         self.authorized_client.post(
             reverse('post_edit', args=[self.user, self.post.id]),
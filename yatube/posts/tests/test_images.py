@@ -0,0 +1,92 @@
+import os
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from ..models import Post, User
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp()
+
+ORIENTATION = 0x0112
+
+
+def image_file(name, size, format='JPEG', **save_options):
+    buffer = BytesIO()
+    Image.new('RGB', size, (200, 30, 30)).save(buffer, format,
+                                               **save_options)
+    return SimpleUploadedFile(name, buffer.getvalue())
+
+
+@override_settings(IMAGE_MAX_SIDE=100, MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ImageIngestTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='Leo')
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.author_client = Client()
+        self.author_client.force_login(self.user)
+
+    def publish(self, image):
+        self.author_client.post(reverse('new_post'),
+                                data={'text': 'С картинкой', 'image': image})
+        return Post.objects.get(text='С картинкой')
+
+    def test_upload_is_rotated_capped_and_reencoded(self):
+        """Картинка поворачивается по EXIF, уменьшается и теряет EXIF."""
+        exif = Image.Exif()
+        exif[ORIENTATION] = 6
+        post = self.publish(image_file('photo.jpg', (400, 200),
+                                       exif=exif.tobytes()))
+        self.assertTrue(post.image.name.endswith('.webp'))
+        self.assertEqual((post.image_width, post.image_height), (50, 100))
+        self.assertEqual(post.image_size, post.image.size)
+        with Image.open(post.image.path) as stored:
+            self.assertEqual(stored.format, 'WEBP')
+            self.assertEqual(stored.size, (50, 100))
+            self.assertNotIn(ORIENTATION, stored.getexif())
+
+    def test_animated_gif_is_kept(self):
+        frames = [Image.new('P', (20, 10), color) for color in (1, 2)]
+        buffer = BytesIO()
+        frames[0].save(buffer, 'GIF', save_all=True,
+                       append_images=frames[1:])
+        post = self.publish(SimpleUploadedFile('anim.gif',
+                                               buffer.getvalue()))
+        self.assertEqual(post.image.name, 'posts/anim.gif')
+        self.assertEqual((post.image_width, post.image_height), (20, 10))
+
+    def test_edit_without_image_keeps_metadata(self):
+        post = self.publish(image_file('photo.png', (80, 40), 'PNG'))
+        self.author_client.post(
+            reverse('post_edit', args=[self.user.username, post.id]),
+            data={'text': 'Новый текст'}
+        )
+        post.refresh_from_db()
+        self.assertEqual(post.text, 'Новый текст')
+        self.assertEqual((post.image_width, post.image_height), (80, 40))
+
+    def test_command_ingests_old_images(self):
+        post = Post.objects.create(
+            text='Старый пост', author=self.user,
+            image=image_file('old.png', (300, 300), 'PNG')
+        )
+        original = post.image.path
+        call_command('ingest_images', stdout=StringIO(), stderr=StringIO())
+        post.refresh_from_db()
+        self.assertTrue(post.image.name.endswith('.webp'))
+        self.assertEqual((post.image_width, post.image_height), (100, 100))
+        self.assertEqual(post.image_size, post.image.size)
+        self.assertFalse(os.path.exists(original))
@@ -0,0 +1,91 @@
+from unittest import skipUnless
+
+from django.core.cache import cache
+from django.db import IntegrityError, connection, transaction
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post, User
+
+
+@skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN есть в SQLite')
+class QueryPlanTests(TestCase):
+    """
+    Запросы списков читают строки по индексу в нужном порядке:
+    в плане нет временного B-дерева для ORDER BY.
+    """
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='Leo')
+        cls.reader = User.objects.create_user(username='Sofia')
+        cls.group = Group.objects.create(title='Дневники', slug='diary',
+                                         description='Тест')
+        for i in range(15):
+            Post.objects.create(text=f'Пост {i}', author=cls.author,
+                                group=cls.group)
+        cls.post = Post.objects.filter(author=cls.author).first()
+        for i in range(3):
+            Comment.objects.create(post=cls.post, author=cls.reader,
+                                   text=f'Комментарий {i}')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def plan(self, sql):
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            return [row[-1] for row in cursor.fetchall()]
+
+    def listing_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return [query['sql'] for query in queries.captured_queries
+                if 'ORDER BY' in query['sql']]
+
+    def test_listings_use_index_order(self):
+        page = self.client.get(reverse('index')).context['page']
+        after = f'?after={page.next_cursor}'
+        page = self.client.get(reverse('follow_index')).context['page']
+        feed_after = f'?after={page.next_cursor}'
+        urls = [
+            reverse('index'),
+            reverse('index') + after,
+            reverse('group_posts', args=[self.group.slug]),
+            reverse('group_posts', args=[self.group.slug]) + after,
+            reverse('profile', args=[self.author.username]),
+            reverse('profile', args=[self.author.username]) + after,
+            reverse('follow_index'),
+            reverse('follow_index') + feed_after,
+            reverse('post', args=[self.author.username, self.post.id]),
+        ]
+        for url in urls:
+            cache.clear()
+            queries = self.listing_queries(url)
+            self.assertTrue(queries, url)
+            for sql in queries:
+                with self.subTest(url=url, sql=sql):
+                    plan = self.plan(sql)
+                    self.assertFalse(
+                        [step for step in plan if 'TEMP B-TREE' in step],
+                        plan
+                    )
+                    self.assertTrue(
+                        [step for step in plan if 'INDEX' in step], plan
+                    )
+
+    def test_follow_pair_is_unique(self):
+        """Проверка подписки ищет по уникальному индексу (user, author)."""
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Follow.objects.create(user=self.reader, author=self.author)
+        plan = self.plan(
+            str(Follow.objects.filter(user=self.reader,
+                                      author=self.author).query)
+        )
+        self.assertIn('USING INDEX', plan[0])
+        self.assertIn('user_id=? AND author_id=?', plan[0])
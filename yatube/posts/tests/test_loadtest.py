@@ -0,0 +1,87 @@
+import json
+import os
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.core.management import CommandError, call_command
+from django.test import LiveServerTestCase, SimpleTestCase
+
+from .. import loadtest
+from ..management.commands import loadtest as loadtest_command
+from ..models import Group, Post, User
+
+
+class PercentileTests(SimpleTestCase):
+    def test_percentile_nearest_rank(self):
+        values = list(range(1, 101))
+        self.assertEqual(loadtest.percentile(values, 50), 50)
+        self.assertEqual(loadtest.percentile(values, 99), 99)
+        self.assertEqual(loadtest.percentile([7], 95), 7)
+        self.assertEqual(loadtest.percentile([], 95), 0.0)
+
+    def test_route_name(self):
+        self.assertEqual(loadtest.route_name('/group/diary/?after=x'),
+                         'group_posts')
+        self.assertEqual(loadtest.route_name('/about/author/'),
+                         'about:author')
+
+
+class LoadTestCommandTests(LiveServerTestCase):
+    def setUp(self):
+        author = User.objects.create_user(username='Leo')
+        group = Group.objects.create(title='Дневники', slug='diary',
+                                     description='Тест')
+        for i in range(15):
+            Post.objects.create(text=f'Запись {i}', author=author,
+                                group=group)
+
+    def test_command_reports_routes_as_json(self):
+        """Сценарии выполняются, сводка пишется в JSON по маршрутам."""
+        handle, path = tempfile.mkstemp(suffix='.json')
+        os.close(handle)
+        self.addCleanup(os.remove, path)
+        call_command(
+            'loadtest', '--url', self.live_server_url, '--duration', '1',
+            '--concurrency', '2', '--users', '1', '--password', 'secret-42',
+            '--weights', 'index=1,group=1,profile=1,follow=1,comment=1,post=1',
+            '--output', path, '--keep-users',
+            stdout=StringIO(), stderr=StringIO(),
+        )
+        with open(path, encoding='utf-8') as output:
+            summary = json.load(output)
+        self.assertGreater(summary['requests'], 0)
+        self.assertEqual(summary['exceptions'], 0)
+        self.assertIn('index', summary['routes'])
+        self.assertIn('login', summary['routes'])
+        for route in summary['routes'].values():
+            self.assertLessEqual(route['p50_ms'], route['p99_ms'])
+        self.assertTrue(
+            User.objects.get(username='loadtest0').follower.exists()
+        )
+
+    def test_password_is_required(self):
+        with mock.patch.dict(os.environ, {loadtest_command.PASSWORD_ENV: ''}):
+            with self.assertRaisesMessage(CommandError, '--password'):
+                call_command('loadtest', '--url', self.live_server_url,
+                             stdout=StringIO())
+        self.assertFalse(User.objects.filter(
+            username__startswith=loadtest_command.LOGIN_PREFIX
+        ).exists())
+
+    def test_created_users_are_removed(self):
+        User.objects.create_user(username='loadtest0')
+        with mock.patch.dict(os.environ,
+                             {loadtest_command.PASSWORD_ENV: 'secret-42'}):
+            call_command(
+                'loadtest', '--url', self.live_server_url,
+                '--duration', '0.2', '--concurrency', '1', '--users', '2',
+                '--weights', 'index=0,group=0,profile=0,follow=1',
+                stdout=StringIO(), stderr=StringIO(),
+            )
+        self.assertEqual(
+            list(User.objects.filter(
+                username__startswith=loadtest_command.LOGIN_PREFIX
+            ).values_list('username', flat=True)),
+            ['loadtest0']
+        )
@@ -0,0 +1,70 @@
+import json
+import re
+
+from django.core.cache import cache, caches
+from django.template.base import Template
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from .. import middleware
+from ..cache_backends import TieredCache
+from ..models import Group, Post, User
+
+
+class ServerTimingTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='Timer')
+        cls.group = Group.objects.create(title='Замеры', slug='timing',
+                                         description='Тест')
+        Post.objects.create(text='Пост для замеров', author=cls.user,
+                            group=cls.group)
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    @override_settings(SERVER_TIMING_SAMPLE_RATE=1)
+    def test_sampled_request_has_header_and_log(self):
+        """Замеренный запрос отдаёт Server-Timing и пишет JSON в журнал."""
+        with self.assertLogs('posts.middleware', 'INFO') as logs:
+            response = self.guest_client.get(
+                reverse('group_posts', args=[self.group.slug])
+            )
+        header = response['Server-Timing']
+        for metric in ('sql', 'tpl', 'cache', 'view'):
+            with self.subTest(metric=metric):
+                self.assertRegex(header, rf'(^|, ){metric};')
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record['route'], 'group_posts')
+        self.assertEqual(record['status'], 200)
+        self.assertGreater(record['sql_count'], 0)
+        self.assertGreater(record['template_ms'], 0)
+        self.assertGreater(record['cache_misses'], 0)
+        self.assertIn(f'desc="{record["sql_count"]} queries"', header)
+
+    @override_settings(SERVER_TIMING_SAMPLE_RATE=1)
+    def test_cached_page_counts_hits(self):
+        url = reverse('index')
+        self.guest_client.get(url)
+        with self.assertLogs('posts.middleware', 'INFO') as logs:
+            response = self.guest_client.get(url)
+        record = json.loads(logs.records[0].getMessage())
+        self.assertGreater(record['cache_hits'], 0)
+        hits = re.search(r'(\d+) hits', response['Server-Timing'])
+        self.assertEqual(int(hits.group(1)), record['cache_hits'])
+        self.assertGreater(record['cache_tiers']['l1']['hits'], 0)
+
+    @override_settings(SERVER_TIMING_SAMPLE_RATE=0)
+    def test_unsampled_request_is_not_measured(self):
+        response = self.guest_client.get(reverse('index'))
+        self.assertFalse(response.has_header('Server-Timing'))
+
+    @override_settings(SERVER_TIMING_SAMPLE_RATE=1)
+    def test_measuring_does_not_patch_classes(self):
+        """Замер не подменяет методы шаблонов и кэшей для всего процесса."""
+        self.guest_client.get(reverse('index'))
+        self.assertEqual(Template.render.__module__, 'django.template.base')
+        self.assertEqual(TieredCache.get.__qualname__, 'TieredCache.get')
+        self.assertNotIsInstance(caches['default'], middleware.CountedCache)
@@ -0,0 +1,118 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+from unittest import skipUnless
+
+from django.core.management import CommandError, call_command
+from django.db import OperationalError, connection, connections
+from django.test import (Client, SimpleTestCase, TransactionTestCase,
+                         override_settings)
+from django.urls import reverse
+
+from .. import pragmas
+from ..models import Comment, Post, User
+
+
+@skipUnless(connection.vendor == 'sqlite', 'PRAGMA есть только в SQLite')
+class PragmaTests(SimpleTestCase):
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix='.sqlite3')
+        os.close(handle)
+        self.addCleanup(os.remove, self.path)
+
+    def connect(self):
+        """Новое соединение с файлом: настройки ставит connection_created."""
+        wrapper = connections['default'].__class__(
+            {**connection.settings_dict, 'NAME': self.path}, alias='pragmas'
+        )
+        wrapper.ensure_connection()
+        self.addCleanup(wrapper.close)
+        return wrapper
+
+    def test_new_connection_is_configured(self):
+        self.assertEqual(pragmas.current(self.connect()), {
+            'journal_mode': 'wal',
+            'synchronous': 1,
+            'mmap_size': 256 * 1024 * 1024,
+            'cache_size': -64 * 1024,
+            'busy_timeout': 5000,
+            'temp_store': 2,
+        })
+
+    @override_settings(SQLITE_PRAGMAS={'busy_timeout': 100})
+    def test_pragmas_come_from_settings(self):
+        values = pragmas.current(self.connect())
+        self.assertEqual(values['journal_mode'], 'delete')
+        self.assertEqual(values['busy_timeout'], 100)
+
+    def test_benchmark_needs_file_database(self):
+        if connection.is_in_memory_db():
+            with self.assertRaises(CommandError):
+                call_command('bench_sqlite', duration=0)
+
+
+@skipUnless(connection.vendor == 'sqlite', 'PRAGMA есть только в SQLite')
+class ConcurrentWriteTests(TransactionTestCase):
+    """Параллельные POST к базе в файле, как у сервера с потоками."""
+    threads = 8
+    comments = 5
+
+    def setUp(self):
+        self.users = [User.objects.create_user(username=f'writer{i}')
+                      for i in range(self.threads)]
+        self.post = Post.objects.create(text='Пост', author=self.users[0])
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.path = os.path.join(directory, 'db.sqlite3')
+        # Копия тестовой базы в памяти с уже созданными записями
+        connection.ensure_connection()
+        target = sqlite3.connect(self.path)
+        connection.connection.backup(target)
+        target.close()
+
+    def connect(self):
+        return connections['default'].__class__(
+            {**connection.settings_dict, 'NAME': self.path}, alias='default'
+        )
+
+    def write_comments(self, user, barrier, errors):
+        # Соединения потоковые: этот поток работает с базой в файле
+        connections['default'] = self.connect()
+        try:
+            client = Client()
+            client.force_login(user)
+            url = reverse('add_comment',
+                          args=[self.post.author.username, self.post.id])
+            barrier.wait()
+            for number in range(self.comments):
+                try:
+                    response = client.post(url, {'text': f'Ответ {number}'})
+                except OperationalError as error:
+                    errors.append(str(error))
+                    continue
+                if response.status_code != 302:
+                    errors.append(response.status_code)
+        finally:
+            connections['default'].close()
+
+    def test_concurrent_posts_do_not_fail(self):
+        barrier = threading.Barrier(self.threads)
+        errors = []
+        threads = [
+            threading.Thread(target=self.write_comments,
+                             args=[user, barrier, errors])
+            for user in self.users
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        database = self.connect()
+        self.addCleanup(database.close)
+        with database.cursor() as cursor:
+            cursor.execute(f'SELECT count(*) FROM {Comment._meta.db_table}')
+            self.assertEqual(cursor.fetchone()[0],
+                             self.threads * self.comments)
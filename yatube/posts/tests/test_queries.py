@@ -0,0 +1,181 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from about import urls as about_urls
+
+from .. import urls as posts_urls
+from ..models import Comment, Follow, Group, Post, User
+
+SAVEPOINT_SQL = ('SAVEPOINT', 'RELEASE SAVEPOINT', 'ROLLBACK TO SAVEPOINT')
+
+# Бюджеты запросов к БД: (аноним, авторизованный пользователь)
+BUDGETS = {
+    'index': (1, 3),
+    'group_posts': (2, 4),
+    'profile': (2, 5),
+    'post': (2, 5),
+    'follow_index': (0, 4),
+    'search': (3, 5),
+    'new_post': (0, 3),
+    'post_edit': (0, 5),
+    'add_comment': (0, 4),
+    'post_comments': (2, 4),
+    'profile_follow': (0, 10),
+    'profile_unfollow': (0, 8),
+    'page_not_found': (1, 3),
+    'server_error': (1, 3),
+    'about:author': (0, 2),
+    'about:tech': (0, 2),
+    # Тело потока событий читает из БД общий опрос (posts.events),
+    # поэтому считаются запросы до первого байта
+    'post_events': (0, 0),
+    'group_events': (1, 1),
+    'follow_events': (0, 2),
+    'index_feed': (1, 1),
+    'group_feed': (2, 2),
+    'author_feed': (2, 2),
+}
+# Потоки, у которых тело не читается: события не кончаются
+ENDLESS = {'post_events', 'group_events', 'follow_events'}
+
+
+def named_routes():
+    """Имена всех адресов из posts.urls и about.urls."""
+    routes = {pattern.name for pattern in posts_urls.urlpatterns}
+    routes.update(f'{about_urls.app_name}:{pattern.name}'
+                  for pattern in about_urls.urlpatterns)
+    return routes
+
+
+class QueryBudgetTests(TestCase):
+    """
+    Число запросов на каждый адрес из posts.urls и about.urls ограничено
+    и не зависит ни от размера страницы, ни от числа комментариев.
+    """
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='Leo')
+        cls.reader = User.objects.create_user(username='Sofia')
+        cls.groups = [
+            Group.objects.create(title=f'Группа {i}', slug=f'group-{i}',
+                                 description='Тест')
+            for i in range(3)
+        ]
+        writers = [cls.author] + [
+            User.objects.create_user(username=f'writer{i}') for i in range(4)
+        ]
+        for i in range(40):
+            Post.objects.create(text=f'Пост {i}',
+                                author=writers[i % len(writers)],
+                                group=cls.groups[i % len(cls.groups)])
+        for writer in writers:
+            Follow.objects.create(user=cls.reader, author=writer)
+        cls.newcomer = User.objects.create_user(username='Tolstoy')
+        Post.objects.create(text='Первый пост', author=cls.newcomer)
+        cls.post = Post.objects.filter(author=cls.author).first()
+        cls.add_comments(3)
+
+    @classmethod
+    def add_comments(cls, count):
+        commenters = [cls.author, cls.reader]
+        for i in range(count):
+            for post in Post.objects.all()[:12]:
+                Comment.objects.create(post=post,
+                                       author=commenters[i % 2],
+                                       text=f'Комментарий {i}')
+
+    def setUp(self):
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.reader)
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+
+    def route_urls(self):
+        author, post_id = self.author.username, self.post.id
+        return {
+            'index': reverse('index'),
+            'group_posts': reverse('group_posts', args=['group-0']),
+            'profile': reverse('profile', args=[author]),
+            'post': reverse('post', args=[author, post_id]),
+            'follow_index': reverse('follow_index'),
+            'search': reverse('search') + '?q=пост',
+            'new_post': reverse('new_post'),
+            'post_edit': reverse('post_edit', args=[author, post_id]),
+            'add_comment': reverse('add_comment', args=[author, post_id]),
+            'post_comments': reverse('post_comments',
+                                     args=[author, post_id]),
+            'profile_follow': reverse('profile_follow', args=['Tolstoy']),
+            'profile_unfollow': reverse('profile_unfollow',
+                                        args=['Tolstoy']),
+            'page_not_found': reverse('page_not_found'),
+            'server_error': reverse('server_error'),
+            'about:author': reverse('about:author'),
+            'about:tech': reverse('about:tech'),
+            'post_events': reverse('post_events'),
+            'group_events': reverse('group_events', args=['group-0']),
+            'follow_events': reverse('follow_events'),
+            'index_feed': reverse('index_feed', args=['rss']),
+            'group_feed': reverse('group_feed', args=['rss', 'group-0']),
+            'author_feed': reverse('author_feed', args=['atom', author]),
+        }
+
+    def count_queries(self, client, url, budget, label, read=True):
+        cache.clear()
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url)
+            if response.streaming and read:
+                # Ленты пишут записи по мере чтения ответа
+                b''.join(response.streaming_content)
+        # Точки сохранения появляются из-за транзакции самого TestCase
+        queries = [
+            query['sql'] for query in context.captured_queries
+            if not query['sql'].startswith(SAVEPOINT_SQL)
+        ]
+        if len(queries) > budget:
+            sql = '\n'.join(
+                f'{number}. {query}'
+                for number, query in enumerate(queries, 1)
+            )
+            self.fail(f'{label} {url}: {len(queries)} запросов '
+                      f'при бюджете {budget}:\n{sql}')
+        return len(queries)
+
+    def measure(self):
+        counts = {}
+        for name, url in self.route_urls().items():
+            anonymous, authorized = BUDGETS[name]
+            clients = {
+                'аноним': (self.guest_client, anonymous),
+                'автор': (self.author_client, authorized),
+                'читатель': (self.authorized_client, authorized),
+            }
+            for label, (client, budget) in clients.items():
+                with self.subTest(route=name, client=label):
+                    counts[name, label] = self.count_queries(
+                        client, url, budget, f'{name} ({label})',
+                        read=name not in ENDLESS,
+                    )
+        return counts
+
+    def test_routes_fit_query_budget(self):
+        """Каждый адрес укладывается в свой бюджет запросов."""
+        # Новый адрес не пройдёт тест, пока у него нет бюджета
+        self.assertEqual(set(BUDGETS), named_routes())
+        self.assertEqual(set(self.route_urls()), named_routes())
+        self.measure()
+
+    def test_queries_do_not_grow_with_page_size_and_comments(self):
+        with mock.patch('posts.views.RECORD_COUNT', 5):
+            small = self.measure()
+        self.add_comments(20)
+        large = self.measure()
+        for key, count in small.items():
+            with self.subTest(route=key):
+                self.assertEqual(large[key], count)
@@ -0,0 +1,102 @@
+import os
+import sqlite3
+import tempfile
+from unittest import mock, skipUnless
+
+from django.core.cache import cache
+from django.db import connection, connections
+from django.http import HttpResponse
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from .. import routers
+from ..models import Group, Post, User
+
+
+@skipUnless(connection.vendor == 'sqlite', 'Реплика — копия файла SQLite')
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaRoutingTests(TestCase):
+    """
+    Реплика — снимок тестовой БД, сделанный до создания данных класса:
+    всё, что записано потом, видно только в основной БД, как при отставании
+    настоящей реплики.
+    """
+    databases = {'default', 'replica'}
+
+    @classmethod
+    def setUpClass(cls):
+        handle, cls.replica_path = tempfile.mkstemp(suffix='.sqlite3')
+        os.close(handle)
+        connection.ensure_connection()
+        replica = sqlite3.connect(cls.replica_path)
+        connection.connection.backup(replica)
+        replica.close()
+        connections.databases['replica'] = {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': cls.replica_path,
+        }
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='Leo', password='pw')
+        cls.group = Group.objects.create(title='Дневники', slug='diary',
+                                         description='Тест')
+        cls.post = Post.objects.create(text='Пост', author=cls.user,
+                                       group=cls.group)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        connections['replica'].close()
+        del connections.databases['replica']
+        os.remove(cls.replica_path)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.url = reverse('post', args=[self.user.username, self.post.id])
+
+    def test_safe_reads_go_to_replica(self):
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+        self.assertNotIn(routers.PIN_COOKIE, self.client.cookies)
+
+    def test_cached_pages_are_built_from_primary(self):
+        """Страница из отстающей реплики не попадает в общий кэш."""
+        url = reverse('group_posts', args=[self.group.slug])
+        self.assertContains(self.client.get(url), 'Пост')
+
+    def test_reads_follow_writes_until_pin_expires(self):
+        response = self.client.post(
+            reverse('login'), {'username': 'Leo', 'password': 'pw'}
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertIn(routers.PIN_COOKIE, self.client.cookies)
+        cache.clear()
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+        cache.clear()
+        later = routers.time.time() + 60
+        with mock.patch('posts.routers.time.time', return_value=later):
+            # Поста ещё нет в реплике
+            self.assertEqual(self.client.get(self.url).status_code, 404)
+
+    def test_write_in_safe_request_pins_browser(self):
+        """GET, который что-то записал, тоже привязывает к основной БД."""
+        def view(request):
+            Post.objects.create(text='Новый', author=self.user)
+            return HttpResponse()
+
+        middleware = routers.ReplicaMiddleware(view)
+        request = mock.Mock(method='GET', COOKIES={})
+        response = middleware(request)
+        self.assertIn(routers.PIN_COOKIE, response.cookies)
+        self.assertFalse(routers._state.replica_reads)
+
+    def test_router(self):
+        router = routers.ReplicaRouter()
+        routers._state.replica_reads = True
+        try:
+            self.assertEqual(router.db_for_read(Post), 'replica')
+            self.assertIsNone(router.db_for_write(Post))
+            self.assertIsNone(router.db_for_read(Post))
+        finally:
+            routers._state.replica_reads = routers._state.wrote = False
+        self.assertFalse(router.allow_migrate('replica', 'posts'))
+        self.assertTrue(router.allow_migrate('default', 'posts'))
@@ -0,0 +1,118 @@
+import random
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.sql import emit_post_migrate_signal
+from django.db import connection
+from django.test import Client, TestCase
+from django.urls import resolve, reverse
+
+from .. import fulltext
+from ..management.commands.bench_search import Command as BenchSearchCommand
+from ..models import Post
+
+User = get_user_model()
+
+
+class FullTextSearchTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='Leo')
+        cls.war = Post.objects.create(
+            text='Всё смешалось в доме Облонских. Ёлка стояла в углу.',
+            author=cls.user
+        )
+        cls.peace = Post.objects.create(
+            text='Облонские, Облонские и снова Облонские',
+            author=cls.user
+        )
+        Post.objects.create(text='Совсем другая история', author=cls.user)
+
+    def setUp(self):
+        self.guest_client = Client()
+
+    def search(self, query):
+        return list(fulltext.SearchResults(query)[:10])
+
+    def test_search_page_ranks_and_highlights(self):
+        """Поиск упорядочен по релевантности и подсвечивает совпадения."""
+        response = self.guest_client.get(reverse('search'), {'q': 'облонск'})
+        page = list(response.context['page'])
+        self.assertEqual(page, [self.peace, self.war])
+        self.assertContains(response, '<mark>Облонские</mark>', html=False)
+        self.assertContains(response, 'Найдено записей: 2')
+
+    def test_russian_tokenization(self):
+        """Регистр, ё и окончания не мешают поиску."""
+        self.assertEqual(self.search('ЕЛКА'), [self.war])
+        self.assertEqual(self.search('дом'), [self.war])
+        self.assertEqual(len(self.search('истори')), 1)
+
+    def test_fts_syntax_and_html_are_escaped(self):
+        post = Post.objects.create(text='<script>alert(1)</script> NEAR',
+                                   author=self.user)
+        self.assertEqual(self.search('NEAR("alert'), [post])
+        response = self.guest_client.get(reverse('search'), {'q': 'alert'})
+        self.assertNotContains(response, '<script>alert', html=False)
+
+    def test_index_follows_edits_and_deletes(self):
+        Post.objects.filter(pk=self.war.pk).update(text='Анна Каренина')
+        self.assertEqual(self.search('каренин'), [self.war])
+        self.assertEqual(self.search('ёлка'), [])
+        Post.objects.filter(pk=self.peace.pk).delete()
+        self.assertEqual(self.search('облонские'), [])
+
+    def test_admin_search_uses_index(self):
+        admin = User.objects.create_superuser('admin', 'a@a.ru', 'pass')
+        self.client.force_login(admin)
+        response = self.client.get('/admin/posts/post/', {'q': 'ёлк'})
+        self.assertEqual(list(response.context['cl'].result_list),
+                         [self.war])
+
+    def test_rebuild_restores_lost_triggers(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DROP TRIGGER {fulltext.FTS_TABLE}_ai')
+        post = Post.objects.create(text='Левин косил траву',
+                                   author=self.user)
+        self.assertEqual(self.search('левин'), [])
+        call_command('rebuild_search', stdout=StringIO())
+        self.assertEqual(self.search('левин'), [post])
+
+    def test_migrate_restores_lost_triggers(self):
+        """Триггеры, пропавшие при пересоздании таблицы, вернёт migrate."""
+        with connection.cursor() as cursor:
+            for trigger in fulltext.TRIGGERS:
+                cursor.execute(f'DROP TRIGGER {trigger}')
+        post = Post.objects.create(text='Левин косил траву',
+                                   author=self.user)
+        self.assertEqual(fulltext.missing_triggers(), list(fulltext.TRIGGERS))
+        emit_post_migrate_signal(0, False, connection.alias)
+        self.assertEqual(fulltext.missing_triggers(), [])
+        self.assertEqual(self.search('левин'), [post])
+
+    def test_search_username_can_be_followed(self):
+        for name in ('profile', 'profile_follow', 'profile_unfollow'):
+            with self.subTest(name=name):
+                url = reverse(name, args=['search'])
+                self.assertEqual(resolve(url).url_name, name)
+
+    def test_benchmark_command(self):
+        out = StringIO()
+        call_command('bench_search', 'облонские', '--repeat', '1',
+                     stdout=out)
+        self.assertIn('fts5', out.getvalue())
+        self.assertIn('icontains', out.getvalue())
+
+    def test_benchmark_is_reproducible_and_reports_measured_winner(self):
+        for i in range(30):
+            Post.objects.create(text=f'Слово{i} повесть роман{i % 7}',
+                                author=self.user)
+        command = BenchSearchCommand()
+        self.assertEqual(command.sample_queries(5, random.Random(3)),
+                         command.sample_queries(5, random.Random(3)))
+        self.assertEqual(command.conclusion({'fts5': 2, 'icontains': 1}),
+                         'icontains быстрее fts5 в 2.0 раза')
+        self.assertEqual(command.conclusion({'fts5': 1, 'icontains': 3}),
+                         'fts5 быстрее icontains в 3.0 раза')
@@ -0,0 +1,116 @@
+import shutil
+import tempfile
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from .. import thumbnails
+from ..models import Post, User
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp()
+
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+class ImmediateExecutor:
+    def submit(self, function, *args):
+        function(*args)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ThumbnailTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='Leo')
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        self.author_client = Client()
+        self.author_client.force_login(self.user)
+
+    def upload(self, name='thumb.gif'):
+        return SimpleUploadedFile(name=name, content=SMALL_GIF,
+                                  content_type='image/gif')
+
+    def test_pages_show_placeholder_without_pillow(self):
+        """Пока миниатюры нет, страницы не вызывают sorl и Pillow."""
+        post = Post.objects.create(text='Пост', author=self.user,
+                                   image=self.upload())
+        with mock.patch('sorl.thumbnail.base.ThumbnailBackend'
+                        '.get_thumbnail') as get_thumbnail:
+            response = self.client.get(
+                reverse('post', args=[self.user.username, post.id])
+            )
+        get_thumbnail.assert_not_called()
+        self.assertContains(response, 'Изображение обрабатывается')
+
+    @override_settings(THUMBNAIL_WORKERS=2)
+    def test_upload_schedules_thumbnail(self):
+        """Сохранение картинки ставит миниатюру в очередь."""
+        with mock.patch.object(thumbnails.transaction, 'on_commit',
+                               lambda callback: callback()), \
+                mock.patch.object(thumbnails, 'get_executor',
+                                  return_value=ImmediateExecutor()):
+            self.author_client.post(
+                reverse('new_post'),
+                data={'text': 'С картинкой', 'image': self.upload()},
+            )
+        post = Post.objects.get(text='С картинкой')
+        self.assertTrue(post.thumbnail)
+        response = self.client.get(reverse('index'))
+        self.assertContains(response, post.thumbnail_url)
+        self.assertNotContains(response, 'Изображение обрабатывается')
+
+    def test_without_workers_thumbnail_is_made_on_commit(self):
+        post = Post.objects.create(text='Пост', author=self.user,
+                                   image=self.upload())
+        callbacks = []
+        with mock.patch.object(thumbnails.transaction, 'on_commit',
+                               callbacks.append), \
+                mock.patch.object(thumbnails, 'get_executor') as executor:
+            thumbnails.schedule(post)
+        self.assertEqual(len(callbacks), 1)
+        callbacks[0]()
+        executor.assert_not_called()
+        post.refresh_from_db()
+        self.assertTrue(post.thumbnail)
+
+    def test_new_image_resets_thumbnail(self):
+        post = Post.objects.create(text='Пост', author=self.user,
+                                   image=self.upload())
+        thumbnails.generate(post.id)
+        post.refresh_from_db()
+        self.assertTrue(post.thumbnail)
+        with mock.patch.object(thumbnails, 'schedule') as schedule:
+            self.author_client.post(
+                reverse('post_edit', args=[self.user.username, post.id]),
+                data={'text': 'Пост', 'image': self.upload('other.gif')},
+            )
+        schedule.assert_called_once()
+        post.refresh_from_db()
+        self.assertEqual(post.thumbnail, '')
+
+    def test_failed_thumbnail_is_logged(self):
+        post = Post.objects.create(text='Пост', author=self.user,
+                                   image='posts/missing.gif')
+        with self.assertLogs('posts.thumbnails', 'ERROR'), \
+                mock.patch.object(thumbnails.connection, 'close'):
+            thumbnails._run(post.id)
+        post.refresh_from_db()
+        self.assertEqual(post.thumbnail, '')
@@ -0,0 +1,93 @@
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..models import FeedEntry, Follow, Post, User
+
+
+class TimelineTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='Leo')
+        cls.reader = User.objects.create_user(username='Sofia')
+        cls.stranger = User.objects.create_user(username='Ivan')
+
+    def setUp(self):
+        cache.clear()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def feed_ids(self):
+        response = self.reader_client.get(reverse('follow_index'))
+        return [post.id for post in response.context['page']]
+
+    def test_new_post_fans_out_to_followers(self):
+        """Новый пост попадает в материализованную ленту подписчика."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        post = Post.objects.create(text='Новый пост', author=self.author)
+        self.assertTrue(
+            FeedEntry.objects.filter(user=self.reader, post=post).exists()
+        )
+        self.assertFalse(
+            FeedEntry.objects.filter(user=self.stranger).exists()
+        )
+        self.assertEqual(self.feed_ids(), [post.id])
+
+    def test_follow_and_unfollow_update_feed(self):
+        """Подписка переносит старые посты в ленту, отписка их убирает."""
+        posts = [
+            Post.objects.create(text=f'Пост {i}', author=self.author)
+            for i in range(3)
+        ]
+        self.reader_client.get(
+            reverse('profile_follow', args=[self.author.username])
+        )
+        self.assertEqual(self.feed_ids(), [post.id for post in posts[::-1]])
+        self.reader_client.get(
+            reverse('profile_unfollow', args=[self.author.username])
+        )
+        self.assertFalse(FeedEntry.objects.filter(user=self.reader).exists())
+        self.assertEqual(self.feed_ids(), [])
+
+    def test_deleted_post_leaves_feed(self):
+        Follow.objects.create(user=self.reader, author=self.author)
+        post = Post.objects.create(text='Удалю', author=self.author)
+        post.delete()
+        self.assertFalse(FeedEntry.objects.exists())
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=1)
+    def test_popular_author_posts_are_pulled(self):
+        """Посты авторов с большой аудиторией подмешиваются при чтении."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        post = Post.objects.create(text='Для всех', author=self.author)
+        self.assertFalse(FeedEntry.objects.filter(post=post).exists())
+        self.assertEqual(self.feed_ids(), [post.id])
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=2)
+    def test_author_below_limit_is_fanned_out_again(self):
+        """Посты, которые подмешивались при чтении, не пропадают из ленты."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        Follow.objects.create(user=self.stranger, author=self.author)
+        post = Post.objects.create(text='Для всех', author=self.author)
+        self.assertFalse(FeedEntry.objects.filter(post=post).exists())
+        self.assertEqual(self.feed_ids(), [post.id])
+        Follow.objects.get(user=self.stranger).delete()
+        self.assertEqual(
+            list(FeedEntry.objects.values_list('user', 'post')),
+            [(self.reader.id, post.id)]
+        )
+        self.assertEqual(self.feed_ids(), [post.id])
+
+    def test_backfill_command_rebuilds_feeds(self):
+        Follow.objects.create(user=self.reader, author=self.author)
+        post = Post.objects.create(text='Пост', author=self.author)
+        FeedEntry.objects.all().delete()
+        call_command('backfill_timeline', stdout=StringIO())
+        self.assertEqual(
+            list(FeedEntry.objects.values_list('user', 'post')),
+            [(self.reader.id, post.id)]
+        )
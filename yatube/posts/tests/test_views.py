@@ -2,20 +2,21 @@ import shutil
 import tempfile
 
 from django import forms
-from django.conf import settings
 from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
-from django.test import Client, TestCase
+from django.test import Client, TestCase, override_settings
 from django.urls import reverse
 
 from ..models import Follow, Group, Post, User
 
+TEMP_MEDIA_ROOT = tempfile.mkdtemp()
 
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
 class ViewsTests(TestCase):
     @classmethod
     def setUpClass(cls):
         super().setUpClass()
-        settings.MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
         cls.user = User.objects.create_user(username='Mark')
         cls.user2 = User.objects.create_user(username='Nikolai')
         cls.user3 = User.objects.create_user(username='Maks')
@@ -62,7 +63,7 @@ class ViewsTests(TestCase):
 
     @classmethod
     def tearDownClass(cls):
-        shutil.rmtree(settings.MEDIA_ROOT, ignore_errors=True)
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
         super().tearDownClass()
 
     def setUp(self):
@@ -252,3 +253,34 @@ class PaginatorViewsTest(TestCase):
                 response = self.client.get(adress + '?page=2')
                 posts = len(response.context.get('page').object_list)
                 self.assertEqual(posts, 3)
+
+    def test_cursor_pages(self):
+        """Курсоры ?after= и ?before= листают ленту без номеров страниц."""
+        cache.clear()
+        adresses = [
+            reverse('index'),
+            reverse('group_posts', kwargs={'slug': 'test'}),
+            reverse('profile', args=[self.user])
+        ]
+        for adress in adresses:
+            with self.subTest(adress=adress):
+                first = self.client.get(adress).context['page']
+                self.assertFalse(first.has_previous())
+                response = self.client.get(
+                    adress, {'after': first.next_cursor}
+                )
+                self.check_paginator(response, 3)
+                second = response.context['page']
+                self.assertFalse(second.has_next())
+                self.assertLess(second[0].pub_date, first[9].pub_date)
+                back = self.client.get(
+                    adress, {'before': second.previous_cursor}
+                ).context['page']
+                self.assertEqual(list(back), list(first))
+
+    def test_broken_cursor_shows_first_page(self):
+        response = self.client.get(
+            reverse('group_posts', kwargs={'slug': 'test'}),
+            {'after': 'не курсор'}
+        )
+        self.check_paginator(response, 10)
@@ -0,0 +1,67 @@
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.template import engines
+from django.test import Client, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from .. import warmup
+from ..management.commands.warmup import Command as WarmupCommand
+from ..models import Group, Post, User
+
+
+class PreloadTests(SimpleTestCase):
+    def test_project_templates_are_compiled(self):
+        names = warmup.template_names()
+        for name in ('base.html', 'subpattern/menu.html',
+                     'registration/login.html'):
+            with self.subTest(name=name):
+                self.assertIn(name, names)
+        self.assertFalse(any(name.startswith('admin/') for name in names))
+        warmup.preload_templates()
+        loader = engines['django'].engine.template_loaders[0]
+        self.assertIn('base.html', loader.get_template_cache)
+
+    def test_urlconf_is_populated(self):
+        self.assertGreater(warmup.preload_urls(), 0)
+
+
+class WarmupCommandTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='Leo')
+        cls.group = Group.objects.create(title='Дневники', slug='diary',
+                                         description='Тест')
+        for i in range(15):
+            Post.objects.create(text=f'Пост {i}', author=cls.author,
+                                group=cls.group)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_pages_are_served_from_cache_after_warmup(self):
+        out = StringIO()
+        call_command('warmup', pages=3, groups=1, profiles=1,
+                     host='testserver', stdout=out)
+        # Во второй странице ленты последняя, ссылки «дальше» нет
+        self.assertIn('Прогрето страниц: 4', out.getvalue())
+        urls = [
+            reverse('index'),
+            reverse('group_posts', args=[self.group.slug]),
+            reverse('profile', args=[self.author.username]),
+        ]
+        for url in urls:
+            with self.subTest(url=url), self.assertNumQueries(0):
+                self.assertEqual(Client().get(url).status_code, 200)
+
+    @override_settings(ALLOWED_HOSTS=['127.0.0.1', '[::1]', 'localhost',
+                                      '.example.com', 'www.example.com'])
+    def test_default_host_is_site_name(self):
+        self.assertEqual(WarmupCommand().default_host(), 'www.example.com')
+
+    @override_settings(ALLOWED_HOSTS=['127.0.0.1', 'localhost'])
+    def test_host_is_required_without_site_name(self):
+        with self.assertRaisesMessage(CommandError, '--host'):
+            call_command('warmup', stdout=StringIO())
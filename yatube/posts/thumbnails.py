@@ -0,0 +1,81 @@
+"""
+Фоновое создание миниатюр.
+
+Миниатюра картинки поста готовится пулом потоков после фиксации
+транзакции, в которой пост сохранён. Пока её нет, карточка показывает
+заглушку, так что веб-запросы никогда не декодируют изображения.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+from sorl.thumbnail import get_thumbnail
+
+from . import caching
+from .models import Post
+
+logger = logging.getLogger(__name__)
+
+GEOMETRY = '960x339'
+OPTIONS = {'crop': 'center', 'upscale': True}
+
+_executor = None
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.THUMBNAIL_WORKERS,
+            thread_name_prefix='thumbnails',
+        )
+    return _executor
+
+
+def generate(post_id):
+    """Создаёт миниатюру поста и запоминает её в post.thumbnail."""
+    post = Post.objects.select_related('author', 'group').get(pk=post_id)
+    if not post.image:
+        return None
+    thumbnail = get_thumbnail(post.image, GEOMETRY, **OPTIONS)
+    if not thumbnail.exists():
+        # sorl не бросает исключение, если исходный файл не читается
+        raise FileNotFoundError(post.image.name)
+    # Картинку могли заменить, пока готовилась миниатюра
+    updated = Post.objects.filter(pk=post_id, image=post.image.name).update(
+        thumbnail=thumbnail.name, updated=timezone.now()
+    )
+    if updated:
+        caching.bump(*caching.post_scopes(post))
+    return thumbnail.name
+
+
+def _generate(post_id):
+    try:
+        generate(post_id)
+    except Exception:
+        logger.exception('Не удалось создать миниатюру поста %s', post_id)
+
+
+def _run(post_id):
+    try:
+        _generate(post_id)
+    finally:
+        # Соединение потока пула не закрывается обработчиком запросов
+        connection.close()
+
+
+def schedule(post):
+    """Ставит миниатюру поста в очередь после фиксации транзакции."""
+    if not post.image or post.thumbnail:
+        return
+    if settings.THUMBNAIL_WORKERS:
+        transaction.on_commit(
+            lambda: get_executor().submit(_run, post.pk)
+        )
+    else:
+        # Без пула (тесты) миниатюра создаётся в этом же потоке
+        transaction.on_commit(partial(_generate, post.pk))
@@ -0,0 +1,152 @@
+"""
+Материализованная лента подписок (fan-out on write).
+
+Новый пост раскладывается в FeedEntry каждого подписчика автора, поэтому
+follow_index читает ленту одним диапазоном по индексу (user, pub_date).
+Авторы, у которых подписчиков не меньше TIMELINE_FANOUT_LIMIT, в ленты
+не раскладываются: их посты подмешиваются при чтении (гибридный режим).
+Когда подписчиков снова становится меньше порога, посты автора
+дописываются в ленты (resume_fan_out), иначе они пропали бы из лент.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import F, Q
+
+from . import follows
+from .models import FeedEntry, Follow, Post, UserStats
+
+PULL_AUTHORS_KEY = 'timeline:pull_authors'
+ORDERING = ('-feed_pub_date', '-feed_post_id')
+BATCH_SIZE = 500
+
+
+def get_pull_authors():
+    """Множество id авторов, чьи посты не раскладываются по лентам."""
+    authors = cache.get(PULL_AUTHORS_KEY)
+    if authors is None:
+        authors = frozenset(UserStats.objects.filter(
+            followers_count__gte=settings.TIMELINE_FANOUT_LIMIT
+        ).values_list('user_id', flat=True))
+        cache.set(PULL_AUTHORS_KEY, authors,
+                  settings.TIMELINE_PULL_AUTHORS_TIMEOUT)
+    return authors
+
+
+def is_pull_author(author_id):
+    return UserStats.objects.filter(
+        user_id=author_id,
+        followers_count__gte=settings.TIMELINE_FANOUT_LIMIT
+    ).exists()
+
+
+def fan_out(post):
+    """Добавляет новый пост в ленты подписчиков автора."""
+    if is_pull_author(post.author_id):
+        if post.author_id not in get_pull_authors():
+            cache.delete(PULL_AUTHORS_KEY)
+        return 0
+    followers = Follow.objects.filter(
+        author_id=post.author_id
+    ).order_by().values_list('user_id', flat=True)
+    entries = [
+        FeedEntry(user_id=user_id, post_id=post.id, pub_date=post.pub_date)
+        for user_id in followers
+    ]
+    FeedEntry.objects.bulk_create(entries, batch_size=BATCH_SIZE,
+                                  ignore_conflicts=True)
+    return len(entries)
+
+
+def add_author(user_id, author_id):
+    """Переносит посты автора в ленту нового подписчика."""
+    if is_pull_author(author_id):
+        return 0
+    posts = Post.objects.filter(
+        author_id=author_id
+    ).values_list('id', 'pub_date')
+    entries = [
+        FeedEntry(user_id=user_id, post_id=post_id, pub_date=pub_date)
+        for post_id, pub_date in posts.iterator()
+    ]
+    FeedEntry.objects.bulk_create(entries, batch_size=BATCH_SIZE,
+                                  ignore_conflicts=True)
+    return len(entries)
+
+
+def resume_fan_out(author_id):
+    """
+    Автор, у которого подписчиков стало меньше TIMELINE_FANOUT_LIMIT,
+    снова раскладывается: его посты, которые подмешивались при чтении,
+    дописываются в ленты подписчиков.
+    """
+    crossed = UserStats.objects.filter(
+        user_id=author_id,
+        followers_count=settings.TIMELINE_FANOUT_LIMIT - 1
+    ).exists()
+    if not crossed:
+        return 0
+    cache.delete(PULL_AUTHORS_KEY)
+    return backfill(author_id=author_id)
+
+
+def backfill(user_id=None, author_id=None):
+    """
+    Заполняет ленты по всей таблице Follow одним INSERT ... SELECT;
+    уже существующие записи пропускаются. Возвращает число новых записей.
+    """
+    sql = f"""
+        INSERT INTO {FeedEntry._meta.db_table} (user_id, post_id, pub_date)
+        SELECT follow.user_id, post.id, post.pub_date
+        FROM {Follow._meta.db_table} follow
+        JOIN {Post._meta.db_table} post ON post.author_id = follow.author_id
+        LEFT JOIN {UserStats._meta.db_table} stats
+            ON stats.user_id = follow.author_id
+        WHERE COALESCE(stats.followers_count, 0) < %s
+        AND NOT EXISTS (
+            SELECT 1 FROM {FeedEntry._meta.db_table} entry
+            WHERE entry.user_id = follow.user_id AND entry.post_id = post.id
+        )
+    """
+    params = [settings.TIMELINE_FANOUT_LIMIT]
+    if user_id is not None:
+        sql += ' AND follow.user_id = %s'
+        params.append(user_id)
+    if author_id is not None:
+        sql += ' AND follow.author_id = %s'
+        params.append(author_id)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.rowcount
+
+
+def remove_author(user_id, author_id):
+    """Убирает посты автора из ленты отписавшегося пользователя."""
+    return FeedEntry.objects.filter(
+        user_id=user_id, post__author_id=author_id
+    ).delete()[0]
+
+
+def feed_for(user):
+    """
+    Посты ленты подписок пользователя. Ключ сортировки ORDERING: дата
+    и id поста из FeedEntry, чтобы лента читалась по индексу этой таблицы
+    без сортировки.
+    """
+    pull_authors = get_pull_authors()
+    followed_pull_authors = []
+    if pull_authors:
+        followed_pull_authors = sorted(
+            pull_authors & follows.get_following(user.pk)
+        )
+    if not followed_pull_authors:
+        return Post.objects.filter(feed_entries__user=user).annotate(
+            feed_pub_date=F('feed_entries__pub_date'),
+            feed_post_id=F('feed_entries__post_id'),
+        ).order_by(*ORDERING)
+    entries = FeedEntry.objects.filter(user=user).values('post_id')
+    return Post.objects.filter(
+        Q(id__in=entries) | Q(author_id__in=followed_pull_authors)
+    ).annotate(
+        feed_pub_date=F('pub_date'), feed_post_id=F('id')
+    ).order_by(*ORDERING)
@@ -1,6 +1,6 @@
-from django.urls import path
+from django.urls import path, re_path
 
-from . import views
+from . import feeds, views
 
 urlpatterns = [
     path('new/', views.new_post, name='new_post'),
@@ -8,10 +8,28 @@ urlpatterns = [
          name="follow_index"),
     path('group/<slug:slug>/', views.group_posts, name='group_posts'),
     path('', views.index, name='index'),
+    # Не search/: адрес закрыл бы профиль пользователя search
+    path('search/posts/', views.search, name='search'),
+    # Второй частью адреса идёт events, а не число или follow/unfollow:
+    # эти адреса не закрывают страницы пользователей events и feeds
+    path('feeds/events/', views.post_events, name='post_events'),
+    path('feeds/events/group/<slug:slug>/', views.post_events,
+         name='group_events'),
+    path('feeds/events/follow/', views.post_events, {'follow': True},
+         name='follow_events'),
+    # Формат перечислен явно, иначе адрес совпал бы с <username>/follow/
+    re_path(r'^feeds/(?P<feed_format>rss|atom)/$', feeds.index_feed,
+            name='index_feed'),
+    re_path(r'^feeds/(?P<feed_format>rss|atom)/group/(?P<slug>[-\w]+)/$',
+            feeds.group_feed, name='group_feed'),
+    re_path(r'^feeds/(?P<feed_format>rss|atom)/author/(?P<username>[^/]+)/$',
+            feeds.author_feed, name='author_feed'),
     path('<str:username>/', views.profile, name='profile'),
     path('<str:username>/<int:post_id>/', views.post_view, name='post'),
     path('<str:username>/<int:post_id>/edit/',
          views.post_edit, name='post_edit'),
+    path('<str:username>/<int:post_id>/comments/',
+         views.post_comments, name='post_comments'),
     path("<username>/<int:post_id>/comment",
          views.add_comment, name='add_comment'),
     path("<str:username>/follow/",
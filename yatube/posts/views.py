@@ -1,42 +1,92 @@
+from urllib.parse import urlencode
+
+from django.conf import settings
 from django.contrib.auth.decorators import login_required
 from django.core.paginator import Paginator
+from django.db import transaction
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
-from django.views.decorators.cache import cache_page
 
+from . import (caching, cards, events, follows, fulltext, thumbnails,
+               timeline)
 from .forms import CommentForm, PostForm
 from .models import Follow, Group, Post, User
+from .paginator import COMMENT_ORDERING, POST_ORDERING, CursorPaginator
 
 RECORD_COUNT = 10
+COMMENT_COUNT = 20
+
+
+def index_posts():
+    return Post.objects.select_related('author', 'group')
+
+
+def group_posts_list(group):
+    return group.posts.select_related('author')
+
 
+def profile_posts(author):
+    return author.posts.select_related('group')
 
-def get_page_numbers(request, filter):
-    paginator = Paginator(filter, RECORD_COUNT)
-    page_number = request.GET.get('page')
-    return paginator.get_page(page_number)
 
+def follow_posts(user):
+    return timeline.feed_for(user).select_related('author', 'group')
 
-@cache_page(20, key_prefix="index_page")
+
+def get_page_numbers(request, filter, ordering=POST_ORDERING):
+    paginator = CursorPaginator(filter, RECORD_COUNT, ordering)
+    if 'page' in request.GET:
+        page = paginator.get_page(request.GET.get('page'))
+    else:
+        page = paginator.get_cursor_page(after=request.GET.get('after'),
+                                         before=request.GET.get('before'))
+    cards.prefetch(page)
+    return page
+
+
+def get_comment_page(post, after=None):
+    """Страница комментариев поста, новые первыми, после курсора after."""
+    paginator = CursorPaginator(post.comments.select_related('author'),
+                                COMMENT_COUNT, COMMENT_ORDERING)
+    return paginator.get_cursor_page(after=after)
+
+
+@caching.conditional_page('index')
+@caching.cache_page_versioned(settings.PAGE_CACHE_TIMEOUT, 'index')
 def index(request):
-    post_list = Post.objects.all().order_by('-pub_date')
-    page = get_page_numbers(request, post_list)
+    page = get_page_numbers(request, index_posts())
     return render(request, "index.html", {"page": page})
 
 
+def search(request):
+    query = request.GET.get('q', '').strip()
+    paginator = Paginator(fulltext.SearchResults(query), RECORD_COUNT)
+    page = paginator.get_page(request.GET.get('page'))
+    return render(request, 'search.html', {
+        'query': query,
+        'page': page,
+        'page_query': urlencode({'q': query}) + '&',
+    })
+
+
+@caching.conditional_page('group:{slug}')
+@caching.cache_page_versioned(settings.PAGE_CACHE_TIMEOUT, 'group:{slug}')
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    post_list = group.posts.all()
-    page = get_page_numbers(request, post_list)
+    page = get_page_numbers(request, group_posts_list(group))
     return render(request,
                   "group.html",
                   {"group": group, "page": page})
 
 
+@caching.conditional_page('author:{username}', 'groups')
+@caching.cache_page_versioned(settings.PAGE_CACHE_TIMEOUT,
+                              'author:{username}', 'groups')
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
-    following = request.user.is_authenticated and Follow.objects.filter(
-        user=request.user, author=author
-    ).exists()
-    page = get_page_numbers(request, author.posts.all())
+    author = get_object_or_404(User.objects.select_related('stats'),
+                               username=username)
+    following = follows.is_following(request.user, author.id)
+    page = get_page_numbers(request, profile_posts(author))
     return render(request, 'profile.html',
                            {"author": author,
                             "following": following,
@@ -44,21 +94,25 @@ def profile(request, username):
                             })
 
 
+@caching.conditional_page('post:{post_id}', 'author:{username}')
 def post_view(request, username, post_id):
-    post = get_object_or_404(Post, author__username=username, id=post_id)
-    following = request.user.is_authenticated and Follow.objects.filter(
-        user=request.user, author=post.author
-    ).exists()
+    post = get_object_or_404(
+        Post.objects.select_related('author__stats', 'group'),
+        author__username=username, id=post_id
+    )
+    following = follows.is_following(request.user, post.author_id)
     form = CommentForm()
     return render(request, 'post.html',
                   {"author": post.author,
                    "post": post,
+                   "comments": get_comment_page(post),
                    'form': form,
                    "following": following,
                    })
 
 
 @login_required
+@transaction.atomic
 def new_post(request):
     form = PostForm(request.POST or None, files=request.FILES or None)
     if request.method == 'POST':
@@ -66,12 +120,14 @@ def new_post(request):
             post = form.save(commit=False)
             post.author = request.user
             post.save()
+            thumbnails.schedule(post)
             return redirect('index')
         return render(request, 'new_post.html', {'form': form})
     return render(request, 'new_post.html', {'form': form})
 
 
 @login_required
+@transaction.atomic
 def post_edit(request, username, post_id):
     post = get_object_or_404(Post, author__username=username, id=post_id)
     if request.user != post.author:
@@ -85,7 +141,11 @@ def post_edit(request, username, post_id):
     )
     if request.method == 'POST':
         if form.is_valid():
-            form.save()
+            post = form.save(commit=False)
+            if 'image' in form.changed_data:
+                post.thumbnail = ''
+            post.save()
+            thumbnails.schedule(post)
         return redirect('post',
                         username=post.author.username,
                         post_id=post.id)
@@ -94,8 +154,10 @@ def post_edit(request, username, post_id):
 
 
 @login_required
+@transaction.atomic
 def add_comment(request, username, post_id):
-    post = get_object_or_404(Post, author__username=username, id=post_id)
+    post = get_object_or_404(Post.objects.select_related('author'),
+                             author__username=username, id=post_id)
     form = CommentForm(request.POST or None)
     if request.method == 'POST':
         if form.is_valid():
@@ -104,19 +166,68 @@ def add_comment(request, username, post_id):
             comment.post = post
             comment.save()
         return redirect('post', username, post_id)
-    return render(request, 'comments.html', {'form': form, 'post': post})
+    return render(request, 'comments.html',
+                  {'form': form,
+                   'post': post,
+                   'comments': get_comment_page(post)})
+
+
+def post_comments(request, username, post_id):
+    """
+    Следующая страница комментариев после курсора ?after=: фрагмент HTML
+    для ссылки «Показать ещё» или JSON при ?format=json.
+    """
+    post = get_object_or_404(Post.objects.select_related('author'),
+                             author__username=username, id=post_id)
+    comments = get_comment_page(post, request.GET.get('after'))
+    if request.GET.get('format') == 'json':
+        return JsonResponse({
+            'comments': [
+                {'id': comment.id,
+                 'author': comment.author.username,
+                 'text': comment.text,
+                 'created': comment.created.isoformat()}
+                for comment in comments
+            ],
+            'next': comments.next_cursor,
+        })
+    return render(request, 'subpattern/comment_list.html',
+                  {'post': post, 'comments': comments})
 
 
 @login_required
 def follow_index(request):
-    following_posts = Post.objects.filter(
-        author__following__user=request.user
-    ).select_related('author')
-    page = get_page_numbers(request, following_posts)
+    page = get_page_numbers(request, follow_posts(request.user),
+                            timeline.ORDERING)
     return render(request, 'follow.html', {'page': page})
 
 
+def post_events(request, slug=None, follow=False):
+    """
+    Поток Server-Sent Events с id новых постов: вся лента, группа slug
+    или лента подписок пользователя.
+    """
+    feed, group_id, user_id = 'index', None, None
+    if slug is not None:
+        feed, group_id = 'group', get_object_or_404(Group, slug=slug).id
+    elif follow:
+        if not request.user.is_authenticated:
+            return HttpResponse(status=401)
+        feed, user_id = 'follow', request.user.pk
+    last_event_id = request.META.get('HTTP_LAST_EVENT_ID', '')
+    response = StreamingHttpResponse(
+        events.stream(feed, group_id, user_id,
+                      int(last_event_id) if last_event_id.isdigit() else None),
+        content_type='text/event-stream',
+    )
+    response['Cache-Control'] = 'no-cache'
+    # Прокси не должен копить поток в буфере
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
 @login_required
+@transaction.atomic
 def profile_follow(request, username):
     author = get_object_or_404(User, username=username)
     if author != request.user:
@@ -128,9 +239,10 @@ def profile_follow(request, username):
 
 
 @login_required
+@transaction.atomic
 def profile_unfollow(request, username):
     user = request.user
-    get_object_or_404(Follow,
+    get_object_or_404(Follow.objects.select_related('user', 'author'),
                       user_id=user.pk,
                       author__username=username).delete()
     return redirect('follow_index')
@@ -0,0 +1,54 @@
+"""
+Подготовка процесса к первым запросам.
+
+При запуске (PostsConfig.ready) все шаблоны проекта компилируются в кэш
+cached.Loader, а URLconf импортируется и разбирается, чтобы первый запрос
+после перезапуска не платил за это. Кэш страниц заполняет команда warmup.
+"""
+import os
+
+from django.conf import settings
+from django.template import engines
+from django.template.utils import get_app_template_dirs
+from django.urls import get_resolver
+
+
+def template_dirs():
+    """Каталоги DIRS и templates приложений проекта (не библиотек)."""
+    app_dirs = [
+        directory for directory in get_app_template_dirs('templates')
+        if directory.startswith(settings.BASE_DIR)
+    ]
+    return list(engines['django'].engine.dirs) + app_dirs
+
+
+def template_names():
+    names = set()
+    for directory in template_dirs():
+        for root, _, files in os.walk(directory):
+            for filename in files:
+                if filename.endswith('.html'):
+                    path = os.path.relpath(os.path.join(root, filename),
+                                           directory)
+                    names.add(path.replace(os.sep, '/'))
+    return sorted(names)
+
+
+def preload_templates():
+    """Компилирует шаблоны; с cached.Loader они остаются в памяти."""
+    engine = engines['django']
+    names = template_names()
+    for name in names:
+        engine.get_template(name)
+    return names
+
+
+def preload_urls():
+    resolver = get_resolver()
+    # reverse_dict заполняется разбором всех шаблонов URL
+    return len(resolver.reverse_dict)
+
+
+def preload():
+    preload_templates()
+    preload_urls()
@@ -51,6 +51,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'posts.routers.ReplicaMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -58,6 +59,7 @@ MIDDLEWARE = [
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     "debug_toolbar.middleware.DebugToolbarMiddleware",
+    'posts.middleware.ServerTimingMiddleware',
 ]
 
 ROOT_URLCONF = 'yatube.urls'
@@ -65,10 +67,19 @@ ROOT_URLCONF = 'yatube.urls'
 TEMPLATES_DIR = os.path.join(BASE_DIR, "templates")
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates, который замеряет рендеринг (posts.middleware)
+        'BACKEND': 'posts.template_backends.TimedDjangoTemplates',
+        'NAME': 'django',
         'DIRS': [TEMPLATES_DIR],
-        'APP_DIRS': True,
         'OPTIONS': {
+            # Скомпилированные шаблоны остаются в памяти процесса;
+            # после правки шаблона процесс нужно перезапустить
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
@@ -82,6 +93,10 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'yatube.wsgi.application'
 
+# При запуске компилировать шаблоны из DIRS и разбирать URLconf
+# (posts.warmup), а не в первом запросе
+WARMUP_ON_READY = True
+
 
 # Database
 # https://docs.djangoproject.com/en/2.2/ref/settings/#databases
@@ -90,9 +105,30 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        # Соединение живёт между запросами вместе с настройками PRAGMA
+        'CONN_MAX_AGE': 60,
     }
 }
 
+# PRAGMA для каждого нового соединения с SQLite (posts.pragmas):
+# читатели не ждут писателя, писатель ждёт занятую базу до 5 секунд
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -64 * 1024,
+    'busy_timeout': 5000,
+    'temp_store': 'MEMORY',
+}
+# Транзакции atomic() сразу берут блокировку записи (posts.pragmas)
+SQLITE_BEGIN = 'IMMEDIATE'
+
+# Реплики для чтения (алиасы из DATABASES, posts.routers); после записи
+# браузер REPLICA_PIN_SECONDS секунд читает только основную БД
+DATABASE_ROUTERS = ['posts.routers.ReplicaRouter']
+DATABASE_REPLICAS = []
+REPLICA_PIN_SECONDS = 10
+
 INTERNAL_IPS = [
     "127.0.0.1",
 ]
@@ -121,10 +157,86 @@ NOTEBOOK_ARGUMENTS = [
 ]
 IPYTHON_KERNEL_DISPLAY_NAME = 'Django Kernel'
 
+# Двухуровневый кэш (posts.cache_backends): LRU в памяти процесса
+# поверх общих для всех процессов файлов. Поколения, записи о страницах,
+# подписки, список авторов без рассылки в ленты и записи sorl-thumbnail
+# меняются на месте, поэтому читаются только из общего уровня
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-    }
+        'BACKEND': 'posts.cache_backends.TieredCache',
+        'LOCATION': 'yatube',
+        'OPTIONS': {
+            'SHARED': 'shared',
+            'LOCAL_MAX_ENTRIES': 1000,
+            'LOCAL_TIMEOUT': 60,
+            'SHARED_ONLY': [
+                'generation:', 'stale:', 'following:', 'timeline:',
+                'sorl-thumbnail',
+            ],
+        },
+    },
+    'shared': {
+        'BACKEND': 'posts.cache_backends.SharedFileCache',
+        'LOCATION': os.path.join(BASE_DIR, 'cache'),
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+}
+
+# Страницы в кэше помнят поколения (posts.caching), поэтому срок
+# свежести может быть долгим: изменения сразу делают страницу устаревшей
+PAGE_CACHE_TIMEOUT = 60 * 60
+# Сколько ещё хранится устаревшая страница, которую отдают, пока новую
+# собирает один запрос, и сколько ждут сборки при её отсутствии
+PAGE_CACHE_STALE_TIMEOUT = 60 * 60 * 24
+PAGE_REBUILD_TIMEOUT = 10
+# Карточка поста меняет ключ при каждом изменении поста
+POST_CARD_TIMEOUT = 60 * 60 * 24
+# Загруженные картинки уменьшаются до этого размера по большей стороне
+# и перекодируются в WebP с таким качеством (posts.images)
+IMAGE_MAX_SIDE = 1920
+IMAGE_QUALITY = 80
+# Потоки, создающие миниатюры загруженных картинок (posts.thumbnails);
+# при 0 миниатюры создаются сразу после фиксации, без пула
+THUMBNAIL_WORKERS = 2
+
+# Лента подписок: авторы с таким числом подписчиков и больше
+# не раскладываются по лентам, их посты подмешиваются при чтении
+TIMELINE_FANOUT_LIMIT = 1000
+TIMELINE_PULL_AUTHORS_TIMEOUT = 300
+# Множество авторов, на которых подписан пользователь (posts.follows);
+# сигналы Follow сбрасывают его сразу
+FOLLOWING_TIMEOUT = 60 * 60 * 24
+# Поток новых постов (posts.events): опрос БД раз в SSE_POLL_INTERVAL
+# секунд, пинг соединения, его предельная длительность и пауза
+# браузера перед переподключением, в секундах
+SSE_POLL_INTERVAL = 2
+SSE_HEARTBEAT = 15
+SSE_MAX_AGE = 300
+SSE_RETRY = 5
+# Доля запросов, для которых posts.middleware замеряет SQL, шаблоны
+# и кэш и отдаёт заголовок Server-Timing
+SERVER_TIMING_SAMPLE_RATE = 0.05
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'message': {'format': '%(message)s'},
+    },
+    'handlers': {
+        'timing': {
+            'class': 'logging.StreamHandler',
+            'formatter': 'message',
+        },
+    },
+    'loggers': {
+        # Строки JSON с замерами запросов
+        'posts.middleware': {
+            'handlers': ['timing'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
 }
 
 
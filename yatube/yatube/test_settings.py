@@ -0,0 +1,46 @@
+"""
+Настройки тестов: pytest (pytest.ini) и
+manage.py test --settings=yatube.test_settings.
+
+Кэш на диске и загруженные файлы лежат во временных каталогах,
+миниатюры создаются сразу после фиксации, без пула потоков,
+Server-Timing замеряют только тесты, которые его включают, а строки
+его журнала не попадают в вывод.
+"""
+import atexit
+import shutil
+import tempfile
+
+from .settings import *  # noqa: F401,F403
+from .settings import CACHES, LOGGING
+
+CACHES = {
+    **CACHES,
+    'shared': {
+        **CACHES['shared'],
+        'LOCATION': tempfile.mkdtemp(prefix='yatube-cache-'),
+    },
+}
+atexit.register(shutil.rmtree, CACHES['shared']['LOCATION'], True)
+
+MEDIA_ROOT = tempfile.mkdtemp(prefix='yatube-media-')
+atexit.register(shutil.rmtree, MEDIA_ROOT, True)
+
+THUMBNAIL_WORKERS = 0
+
+SERVER_TIMING_SAMPLE_RATE = 0
+
+LOGGING = {
+    **LOGGING,
+    'handlers': {
+        **LOGGING['handlers'],
+        'null': {'class': 'logging.NullHandler'},
+    },
+    'loggers': {
+        **LOGGING['loggers'],
+        'posts.middleware': {
+            **LOGGING['loggers']['posts.middleware'],
+            'handlers': ['null'],
+        },
+    },
+}